@@ -0,0 +1,91 @@
+"""
+Extraction benchmark: rule-based fast path vs LLM extractor.
+
+    python bench_extraction.py          # fast path only (offline)
+    python bench_extraction.py --llm    # also call the LLM extractor (needs GROQ keys)
+"""
+import sys
+import json
+import time
+import asyncio
+from datetime import date
+
+from core.fast_extractor import fast_extract, FIELDS
+
+CORPUS_FILE = "extraction_corpus.json"
+
+def field_matches(key, expected, actual) -> bool:
+    # special_requests is free text: only check it was (not) picked up
+    if key == "special_requests":
+        return bool(expected) == bool(actual and str(actual).lower() != "none")
+    if key == "name" and expected and actual:
+        return str(expected).lower() == str(actual).lower()
+    if key == "party_size" and actual is not None:
+        try: actual = int(actual)
+        except (TypeError, ValueError): pass
+    return expected == actual
+
+def score(expected: dict, actual: dict) -> bool:
+    return all(field_matches(k, expected.get(k), (actual or {}).get(k)) for k in FIELDS)
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))] if values else 0.0
+
+def report(label, rows):
+    latencies = [r["ms"] for r in rows]
+    correct = sum(r["correct"] for r in rows)
+    print(f"\n📊 {label}")
+    print(f"   Accuracy: {correct}/{len(rows)} ({correct / len(rows):.0%})")
+    print(f"   Latency:  p50 {percentile(latencies, 50):.3f} ms | p99 {percentile(latencies, 99):.3f} ms")
+
+async def main(use_llm: bool):
+    with open(CORPUS_FILE, "r", encoding="utf-8") as f:
+        corpus = json.load(f)
+    today = date.fromisoformat(corpus["today"])
+    utterances = corpus["utterances"]
+
+    # 1. Fast path (rules only)
+    fast_rows = []
+    for item in utterances:
+        start = time.perf_counter()
+        result = fast_extract(item["text"], today)
+        ms = (time.perf_counter() - start) * 1000
+        fast_rows.append({
+            "text": item["text"], "ms": ms, "confident": result.is_confident,
+            "correct": score(item["expected"], result.data), "data": result.data,
+            "reasons": result.escalate_reasons,
+        })
+
+    report("FAST PATH (all utterances)", fast_rows)
+    confident = [r for r in fast_rows if r["confident"]]
+    if confident:
+        report(f"FAST PATH (kept, {len(confident)}/{len(fast_rows)} not escalated)", confident)
+
+    print("\n❌ Fast path mistakes on kept turns:")
+    for r in confident:
+        if not r["correct"]:
+            print(f"   - '{r['text']}' -> {json.dumps({k: v for k, v in r['data'].items() if v is not None})}")
+    print("\n⬆️  Escalated to LLM:")
+    for r in fast_rows:
+        if not r["confident"]:
+            print(f"   - '{r['text']}' ({', '.join(r['reasons']) or 'low confidence'})")
+
+    if not use_llm:
+        return
+
+    # 2. LLM path (same corpus, same 'today')
+    from core.hospitality_services import llm_extract_booking_data
+    llm_rows = []
+    for item in utterances:
+        start = time.perf_counter()
+        data = await llm_extract_booking_data(item["text"], today)
+        llm_rows.append({"ms": (time.perf_counter() - start) * 1000, "correct": score(item["expected"], data)})
+    report("LLM PATH (all utterances)", llm_rows)
+
+    # 3. Hybrid = what extract_booking_data actually does
+    hybrid = [f if f["confident"] else {**l, "ms": f["ms"] + l["ms"]} for f, l in zip(fast_rows, llm_rows)]
+    report("HYBRID (fast path, escalate when unsure)", hybrid)
+
+if __name__ == "__main__":
+    asyncio.run(main("--llm" in sys.argv))
@@ -0,0 +1,117 @@
+"""
+Prompt size benchmark: the compact Riya prompt vs the previous prompt format.
+
+    python bench_prompt.py
+"""
+import json
+from typing import Dict
+
+from core.hospitality_services import RIYA_SYSTEM_PROMPT, build_riya_messages
+from core.rate_limiter import estimate_tokens
+
+# A booking as it grows over one call
+HISTORY = [
+    "Riya: Hi! Thanks for calling The Guru's Kitchen. This is Riya. Who am I speaking with?",
+    "Caller: Hi, this is Priya",
+    "Riya: Lovely to meet you, Priya! What's the best number to reach you at?",
+    "Caller: 9876543210",
+    "Riya: Got it! How many people will be joining you?",
+    "Caller: four of us",
+    "Riya: Awesome! What date were you thinking?",
+    "Caller: this friday",
+    "Riya: Perfect! What time works best for you?",
+    "Caller: around 8 pm",
+]
+TURNS = [
+    ("ask_name", {}, "Hi, I'd like to book a table"),
+    ("ask_phone", {"name": "Priya"}, "Hi, this is Priya"),
+    ("ask_party_size", {"name": "Priya", "phone": "9876543210"}, "9876543210"),
+    ("ask_date", {"name": "Priya", "phone": "9876543210", "party_size": 4}, "four of us"),
+    ("ask_time", {"name": "Priya", "phone": "9876543210", "party_size": 4, "date": "2025-01-10"}, "this friday"),
+    ("confirm_booking", {"name": "Priya", "phone": "9876543210", "party_size": 4, "date": "2025-01-10", "time": "20:00"}, "around 8 pm"),
+]
+
+def legacy_riya_prompt(intent: str, collected_data: Dict, last_user_text: str = '') -> str:
+    """The previous per-turn prompt (full behaviour table, indented state with history). Never sent."""
+    history_list = collected_data.get('history', [])
+    recent_history = history_list[-6:]
+    history_str = "\n".join(recent_history) if recent_history else "No previous context."
+
+    prompt = f"""
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+📞 CONVERSATION STATE
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+**Recent Conversation:**
+{history_str}
+
+**What the caller just said:**
+"{last_user_text}"
+
+**Current Goal (Intent):**
+{intent}
+
+**Information Collected So Far:**
+{json.dumps(collected_data, indent=2)}
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+🎯 YOUR TASK
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+Generate a natural, spoken response based on the current intent.
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+📋 INTENT-SPECIFIC BEHAVIORS
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+**welcome**
+→ "Hi! Thanks for calling The Guru's Kitchen. This is Riya. Who am I speaking with?"
+
+**ask_name**
+→ "Perfect! And who should I put this reservation under?"
+
+**ask_phone**
+→ "Great! And what's the best number to reach you at?"
+
+**ask_party_size**
+→ "Got it! How many people will be joining you?"
+
+**ask_date**
+→ "Awesome! What date were you thinking?"
+
+**ask_time**
+→ "Perfect! What time works best for you?"
+
+**confirm_booking**
+→ "Amazing! You're all set—table for [party_size] on [date] at [time] under [name]. We can't wait to see you!"
+
+**unavailable**
+→ "Oh, that time's fully booked. Would another time work for you?"
+
+**force_complete**
+→ "Perfect! Let me finalize your reservation with the details we have. You're booked for [party_size] people on [date] at [time] under [name]. We'll see you then!"
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+⚡ CRITICAL RULES
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+1. **ALWAYS acknowledge what they just said** before asking the next question.
+2. **Keep it SHORT**: 1-2 sentences max.
+3. **NO EMOJIS** in your response.
+4. **Don't repeat yourself**. If they already gave you info, don't ask for it again.
+
+Now generate your response:
+"""
+    return prompt
+
+def main():
+    print(f"{'intent':<18}{'compact':>9}{'legacy':>9}{'saved':>8}")
+    compact_total = legacy_total = 0
+    for turn, (intent, fields, last_user_text) in enumerate(TURNS):
+        collected_data = {**fields, "history": HISTORY[:2 * turn]}
+        _, compact = build_riya_messages(intent, collected_data, last_user_text)
+        legacy = estimate_tokens(RIYA_SYSTEM_PROMPT + legacy_riya_prompt(intent, collected_data, last_user_text))
+        compact_total += compact
+        legacy_total += legacy
+        print(f"{intent:<18}{compact:>9}{legacy:>9}{1 - compact / legacy:>8.0%}")
+    print(f"\n📊 Total: {compact_total} vs {legacy_total} tokens ({1 - compact_total / legacy_total:.0%} saved)")
+
+if __name__ == "__main__":
+    main()
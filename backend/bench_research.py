@@ -0,0 +1,62 @@
+"""
+Research-path benchmark: massive context vs retrieval (top-k FAISS chunks).
+
+    python bench_research.py                         # built-in interview questions (needs GROQ keys)
+    python bench_research.py "How did you build X?"  # your own questions
+    RESEARCH_TOP_K=5 python bench_research.py        # more retrieved chunks
+
+For each question both modes run the full researcher -> summariser chain.
+Latency and prompt tokens are summarised at the end; answers are printed side by
+side so quality can be judged by eye. Retrieval needs faiss + sentence-transformers
+and an index in sync with project_chunks.txt (run create_vector_store.py first).
+"""
+import sys
+import time
+import asyncio
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from core.ai_services import get_ai_response_text
+from core.metrics import metrics
+from core.retrieval import chunk_retriever
+
+QUESTIONS = [
+    "How did you build the AI Twin voice bot?",
+    "Why did you choose LangGraph for the content pipeline?",
+    "How do you handle human-in-the-loop approval in your agents?",
+    "What was the hardest bug you hit with streaming audio?",
+    "How would you scale your voice bot to many concurrent callers?",
+]
+MODES = ("massive", "retrieval")
+
+def last_sample(name: str) -> float:
+    samples = metrics.samples.get(name)
+    return samples[-1] if samples else float("nan")
+
+async def main(questions):
+    if not chunk_retriever.load():
+        print("❌ Retrieval index unavailable; nothing to compare against.")
+        return
+    rows = {mode: [] for mode in MODES}
+    for question in questions:
+        print(f"\n❓ {question}")
+        for mode in MODES:
+            start = time.perf_counter()
+            answer = await get_ai_response_text(question, context_mode=mode)
+            total_ms = (time.perf_counter() - start) * 1000
+            researcher_ms = last_sample(f"research.{mode}.researcher_ms")
+            prompt_tokens = last_sample(f"research.{mode}.prompt_tokens")
+            rows[mode].append((total_ms, researcher_ms, prompt_tokens))
+            print(f"   [{mode:9}] {total_ms:6.0f} ms total, researcher {researcher_ms:6.0f} ms, {prompt_tokens:6.0f} prompt tokens")
+            print(f"               '{answer}'")
+
+    print(f"\n📊 Medians over {len(questions)} questions")
+    for mode in MODES:
+        total, researcher, tokens = np.nanmedian(np.array(rows[mode]), axis=0)
+        print(f"   {mode:9}: {total:6.0f} ms total, researcher {researcher:6.0f} ms, {tokens:6.0f} prompt tokens")
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:] or QUESTIONS))
@@ -0,0 +1,71 @@
+"""
+STT benchmark: end-of-utterance -> transcript latency, blob upload vs streaming.
+
+    python bench_stt.py caller1.wav caller2.wav ...   # 16-bit WAVs of a caller speaking (needs GROQ keys)
+
+Blob path:   whole recording sent to Whisper once the client decides the caller stopped.
+Streaming:   recording is fed in real time as 20 ms PCM frames; partials run while
+             "speaking" and finish() is timed from the moment end-of-utterance is signalled.
+Both clocks start at the end-of-utterance signal; the client's silence timeout
+(SILENCE_DURATION vs STREAM_SILENCE_DURATION in index.html) comes on top.
+"""
+import sys
+import time
+import wave
+import asyncio
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from core.hospitality_services import get_text_from_speech
+from core.streaming_stt import StreamingTranscriber, pcm_to_wav
+
+FRAME_MS = 20
+
+def load_mono_pcm(path: str):
+    with wave.open(path, "rb") as w:
+        if w.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16-bit PCM")
+        rate, channels = w.getframerate(), w.getnchannels()
+        samples = np.frombuffer(w.readframes(w.getnframes()), dtype="<i2")
+    return samples.reshape(-1, channels)[:, 0].copy(), rate
+
+async def blob_path(samples, rate):
+    wav = pcm_to_wav(samples, rate)
+    start = time.perf_counter()
+    text = await get_text_from_speech(wav)
+    return (time.perf_counter() - start) * 1000, text
+
+async def streaming_path(samples, rate):
+    transcriber = StreamingTranscriber(get_text_from_speech, sample_rate=rate)
+    step = rate * FRAME_MS // 1000
+    for i in range(0, len(samples), step):
+        transcriber.feed(samples[i:i + step].tobytes())
+        await asyncio.sleep(FRAME_MS / 1000)  # Real-time pacing, like a microphone
+    start = time.perf_counter()
+    text = await transcriber.finish()
+    return (time.perf_counter() - start) * 1000, text
+
+async def main(paths):
+    if not paths:
+        print(__doc__)
+        return
+    rows = []
+    for path in paths:
+        samples, rate = load_mono_pcm(path)
+        blob_ms, blob_text = await blob_path(samples, rate)
+        stream_ms, stream_text = await streaming_path(samples, rate)
+        rows.append((blob_ms, stream_ms))
+        print(f"\n🎙️ {path} ({len(samples) / rate:.1f}s)")
+        print(f"   Blob:      {blob_ms:7.0f} ms  '{blob_text}'")
+        print(f"   Streaming: {stream_ms:7.0f} ms  '{stream_text}'")
+
+    blob, stream = np.array(rows).T
+    print(f"\n📊 End-of-utterance -> transcript (median over {len(rows)} files)")
+    print(f"   Blob:      {np.median(blob):.0f} ms")
+    print(f"   Streaming: {np.median(stream):.0f} ms")
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:]))
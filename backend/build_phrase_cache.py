@@ -0,0 +1,68 @@
+import asyncio
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from core.phrase_cache import PHRASES, PHRASE_PACK_FILE, write_pack
+from core.response_templates import static_template_lines
+from core.audio_assembly import FRAGMENT_PACK_FILE, fragment_vocabulary, prepare_fragment
+from core.hospitality_services import groq_clients
+from core.speech_synthesis import TTS_MODEL, TTS_VOICE
+
+async def render(text: str) -> bytes:
+    """Render with Groq only (never gTTS: a different voice would leak into the pack)."""
+    for i, client in enumerate(groq_clients):
+        try:
+            response = await client.audio.speech.create(
+                model=TTS_MODEL,
+                voice=TTS_VOICE,
+                response_format="wav",
+                input=text
+            )
+            return response.content
+        except Exception as e:
+            print(f"❌ Client {i+1} failed for '{text[:30]}': {e}")
+    return None
+
+async def build_phrase_pack():
+    # Fixed phrases + every slot-free template line (asks, stock acknowledgements)
+    phrases = {**PHRASES, **{f"template_{i}": line for i, line in enumerate(static_template_lines())}}
+    print(f"Rendering {len(phrases)} fixed phrases with {TTS_MODEL} / {TTS_VOICE}...")
+
+    audio_by_text = {}
+    for name, text in phrases.items():
+        audio = await render(text)
+        if not audio:
+            print(f"⚠️ Skipping '{name}' due to audio error.")
+            continue
+        audio_by_text[text] = audio
+        print(f"✅ {name}: {len(audio)} bytes")
+
+    write_pack(PHRASE_PACK_FILE, audio_by_text, TTS_MODEL, TTS_VOICE)
+    total = sum(len(a) for a in audio_by_text.values())
+    print(f"\n📦 Wrote {PHRASE_PACK_FILE}: {len(audio_by_text)} phrases, {total / 1024:.0f} KB")
+
+async def build_fragment_pack():
+    # Numbers, days, months, times and stock phrases for stitching confirmations together
+    fragments = fragment_vocabulary()
+    print(f"\nRendering {len(fragments)} fragments with {TTS_MODEL} / {TTS_VOICE}...")
+
+    audio_by_text = {}
+    for text in fragments:
+        audio = await render(text)
+        audio = prepare_fragment(audio) if audio else None
+        if not audio:
+            print(f"⚠️ Skipping fragment '{text}'.")
+            continue
+        audio_by_text[text] = audio
+
+    write_pack(FRAGMENT_PACK_FILE, audio_by_text, TTS_MODEL, TTS_VOICE)
+    total = sum(len(a) for a in audio_by_text.values())
+    print(f"📦 Wrote {FRAGMENT_PACK_FILE}: {len(audio_by_text)} fragments, {total / 1024:.0f} KB")
+
+async def main():
+    await build_phrase_pack()
+    await build_fragment_pack()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -2,59 +2,22 @@
 
 import os
 import json
+import asyncio
 import numpy as np
-from openai import AsyncOpenAI
-from gtts import gTTS
-import io
 import time
-from collections import deque
-from typing import Optional
+from typing import AsyncIterator, Optional
 import re
 from langdetect import detect, LangDetectException
 
 # --- NEW IMPORT: Connect to the RAM Cache ---
 from core.cache_manager import cache_manager
-
-# Token tracking for TPM limits
-class TokenTracker:
-    def __init__(self, max_tokens_per_minute=1000):  # Conservative limit (1000 < 1200)
-        self.max_tokens_per_minute = max_tokens_per_minute
-        self.requests = deque()  # Store (timestamp, tokens) tuples
-    
-    def estimate_tokens(self, text: str) -> int:
-        """Estimate tokens using the 1 token ≈ 4 characters heuristic"""
-        # Clean up text and count more accurately
-        clean_text = re.sub(r'\s+', ' ', text.strip())  # Normalize whitespace
-        char_count = len(clean_text)
-        estimated_tokens = int(char_count / 4) + 20  # +20 buffer for overhead/punctuation
-        return estimated_tokens
-    
-    def can_make_request(self, text: str) -> tuple[bool, int]:
-        """Check if we can make a TTS request without hitting TPM limits"""
-        current_time = time.time()
-        estimated_tokens = self.estimate_tokens(text)
-        
-        # Remove requests older than 60 seconds
-        while self.requests and current_time - self.requests[0][0] > 60:
-            self.requests.popleft()
-        
-        # Calculate tokens used in the last minute
-        tokens_used = sum(tokens for _, tokens in self.requests)
-        
-        # Check if adding this request would exceed limit
-        if tokens_used + estimated_tokens > self.max_tokens_per_minute:
-            return False, tokens_used
-        
-        return True, tokens_used
-    
-    def record_request(self, text: str):
-        """Record a successful request"""
-        current_time = time.time()
-        estimated_tokens = self.estimate_tokens(text)
-        self.requests.append((current_time, estimated_tokens))
-
-# Global token tracker instance
-token_tracker = TokenTracker()
+from core.speech_synthesis import get_speech_from_text
+from core.metrics import metrics
+from core.semantic_router import semantic_router
+from core.retrieval import chunk_retriever, RESEARCH_CONTEXT_MODE, RESEARCH_TOP_K
+from core.answer_cache import answer_cache
+from core.groq_pool import get_groq_pool
+from core.rate_limiter import estimate_tokens
 
 # --- MODIFIED: Simplified Startup for "Massive Context" ---
 try:
@@ -67,34 +30,40 @@ try:
         persona_data = json.load(f)
     persona_prompt = json.dumps(persona_data, indent=2)
 
-    # --- Initialize clients for TTS cascade ---
-    groq_api_keys = [
-        os.environ.get("GROQ_API_KEY_1"),
-        os.environ.get("GROQ_API_KEY_2"),
-        os.environ.get("GROQ_API_KEY_3"),
-        os.environ.get("GROQ_API_KEY_4"),
-        os.environ.get("GROQ_API_KEY_5"),
-    ]
-    groq_clients = [
-        AsyncOpenAI(api_key=key, base_url="https://api.groq.com/openai/v1")
-        for key in groq_api_keys if key
-    ]
-    if not groq_clients:
-        raise ValueError("No Groq API keys found in .env file.")
-    
-    main_client = groq_clients[0]
+    # --- Shared pool: every LLM/STT/TTS call goes to the healthiest key ---
+    groq_pool = get_groq_pool()
+    groq_clients = groq_pool.clients
     print(f"✅ AI services (massive context) loaded successfully with {len(groq_clients)} Groq clients.")
 except Exception as e:
     print(f"❌ CRITICAL ERROR during AI service initialization: {e}")
-    project_kb = persona_prompt = main_client = groq_clients = None
+    project_kb = persona_prompt = groq_pool = groq_clients = None
 
 # --- Dynamic Prompts ---
 # We build the prompt based on what is actually in memory
 loaded_intents = cache_manager.get_intents_list()
 
+# Embed every trigger once; most queries are then routed without an LLM call
+_router_fit = None  # Task running the one-off fit
+
+async def _fit_semantic_router():
+    try:
+        # MiniLM takes seconds to load and encode: never on the event loop
+        await asyncio.to_thread(semantic_router.fit, cache_manager.trigger_map)
+    except Exception as e:
+        print(f"⚠️ Semantic router unavailable, using LLM routing only: {e}")
+
+def start_semantic_router() -> asyncio.Task:
+    """Call from app startup. Fits at most once; queries before it finishes use the LLM router."""
+    global _router_fit
+    if _router_fit is None:
+        _router_fit = asyncio.create_task(_fit_semantic_router())
+    return _router_fit
+
 # # --- Prompts ---
 
-RESEARCHER_PROMPT_TEMPLATE = f"""
+def build_researcher_prompt(knowledge: str) -> str:
+    """Researcher system prompt around either the whole KB or just the retrieved chunks."""
+    return f"""
 You are the AI Twin of Parthiv S. You are currently in a high-stakes interview.
 You are NOT an AI assistant. You are NOT a language model. You ARE Parthiv.
 
@@ -102,7 +71,7 @@ IDENTITY & KNOWLEDGE BASE:
 {persona_prompt}
 
 PROJECT KNOWLEDGE:
-{project_kb}
+{knowledge}
 
 ---
 
@@ -118,6 +87,12 @@ PROJECT KNOWLEDGE:
 - **STAY IN CHARACTER.** This is a role-play. Do not break the fourth wall.
 """
 
+RESEARCHER_PROMPT_TEMPLATE = build_researcher_prompt(project_kb)
+
+# Retrieval mode: memory-map the FAISS index once at startup (falls back to massive context if unavailable)
+if RESEARCH_CONTEXT_MODE == "retrieval":
+    chunk_retriever.load()
+
 
 # SUMMARIZER_SYSTEM_PROMPT = """
 # You are the voice of Parthiv S. You are speaking to an interviewer.
@@ -269,11 +244,34 @@ FINAL REMINDER: When analyzing the user's question, ask yourself:
 Now classify this question:"""
 
 #---Helper Functions---
-async def get_query_intent(text: str, client) -> str:
+async def get_query_intent(text: str) -> str:
     """Decides if we should use the RAM Cache or the Researcher."""
     print(f"Routing: '{text}'...")
+    if not cache_manager.valid_slugs:
+        return 'research'  # Nothing cached -> nothing to route to
+
+    # 1. Local semantic router (no network; encoding runs in a worker thread)
+    intent, score = None, 0.0
+    if semantic_router.ready:
+        started = time.perf_counter()
+        try:
+            intent, score = await asyncio.to_thread(semantic_router.route, text)
+        except Exception as e:
+            print(f"⚠️ Semantic router error: {e}")
+        metrics.observe("router.local_ms", (time.perf_counter() - started) * 1000)
+    else:
+        start_semantic_router()  # Still fitting (or first query): this one goes to the LLM
+    if intent is not None:
+        metrics.incr("router.local_research" if intent == 'research' else "router.local_hit")
+        print(f"🧭 Routed locally: {intent} (score {score:.2f})")
+        return intent
+
+    # 2. Ambiguous band: let the LLM decide
+    metrics.incr("router.llm_fallback")
+    print(f"🧭 Ambiguous (score {score:.2f}), asking the LLM router...")
+    started = time.perf_counter()
     try:
-        completion = await client.chat.completions.create(
+        completion = await groq_pool.call(lambda client: client.chat.completions.create(
             messages=[
                 {"role": "system", "content": ROUTER_SYSTEM_PROMPT},
                 {"role": "user", "content": text}
@@ -281,8 +279,9 @@ async def get_query_intent(text: str, client) -> str:
             model="moonshotai/kimi-k2-instruct-0905", # Fixed model name to valid Groq ID
             temperature=0.35, # Fixed typo and set to 0 for strict classification
             max_tokens=10
-        )
+        ), kind="router", cost=estimate_tokens(ROUTER_SYSTEM_PROMPT + text) + 10)
         intent = completion.choices[0].message.content.strip().lower()
+        metrics.observe("router.llm_ms", (time.perf_counter() - started) * 1000)
 
         # Verify against our RAM list to prevent hallucinations
         if intent in cache_manager.valid_slugs:
@@ -293,7 +292,7 @@ async def get_query_intent(text: str, client) -> str:
         print(f"Router Error: {e}")
         return 'research'
 
-async def force_translate_to_english(text:str, client) -> str:
+async def force_translate_to_english(text:str) -> str:
     """
     Emergency fallback:Uses a cheap,fast mnodel to force translation.
     """
@@ -312,7 +311,7 @@ async def force_translate_to_english(text:str, client) -> str:
     6. Maintain the original conversational tone.
     """
     try:
-        completion = await client.chat.completions.create(
+        completion = await groq_pool.call(lambda client: client.chat.completions.create(
             messages=[
                 {"role": "system", "content": TRANSLATOR_SYSTEM_PROMPT},
                 {"role": "user", "content": text}
@@ -320,7 +319,7 @@ async def force_translate_to_english(text:str, client) -> str:
             model="llama-3.1-8b-instant",
             temperature=0.1, # Fixed typo
             max_tokens=200,
-        )
+        ), kind="translate", cost=estimate_tokens(TRANSLATOR_SYSTEM_PROMPT + text) + 200)
         translated = completion.choices[0].message.content.strip()
         print(f"Translated to: '{translated[:20]}...'")
         return translated
@@ -329,7 +328,7 @@ async def force_translate_to_english(text:str, client) -> str:
         print(f"Translation failed:{e}")
         return text #Return original as the last resort 
 
-async def validate_and_fix_language(text: str, client) -> str:
+async def validate_and_fix_language(text: str) -> str:
     """
     Checks if text is English.If not, forces a translation
     """
@@ -338,7 +337,7 @@ async def validate_and_fix_language(text: str, client) -> str:
         # Wired logic: Only fix if NOT English
         if lang != 'en':
             print(f"⚠️ Language Drift Detected ({lang})! Fixing ...")
-            return await force_translate_to_english(text, client)
+            return await force_translate_to_english(text)
     
     except LangDetectException:
         # IF text is too short or weird (e.g "hmm...") assume it's okay 
@@ -349,11 +348,11 @@ async def validate_and_fix_language(text: str, client) -> str:
 async def get_text_from_speech(audio_bytes: bytes) -> str:
     print("Transcribing audio with Whisper...")
     try:
-        transcription = await main_client.audio.transcriptions.create(
+        transcription = await groq_pool.call(lambda client: client.audio.transcriptions.create(
             file=("request.wav", audio_bytes, "audio/wav"),
             model="whisper-large-v3",
             language="en"
-        )
+        ), kind="stt", cost=1)
         user_text = transcription.text
         print(f"Transcription complete: '{user_text}'")
         return user_text
@@ -362,26 +361,45 @@ async def get_text_from_speech(audio_bytes: bytes) -> str:
         return "I'm sorry, I had trouble understanding what you said."
 
 # --- LLM Brain with Token-Safe Summarization ---
-async def get_ai_response_text(user_question: str) -> str:
+async def researcher_system_prompt(user_question: str, context_mode: str = None) -> tuple[str, str]:
+    """(mode actually used, system prompt). Retrieval falls back to the massive context if the index isn't usable."""
+    mode = context_mode or RESEARCH_CONTEXT_MODE
+    if mode == "retrieval" and chunk_retriever.load():
+        try:
+            chunks = await asyncio.to_thread(chunk_retriever.search, user_question, RESEARCH_TOP_K)
+            return "retrieval", build_researcher_prompt("\n\n".join(chunks))
+        except Exception as e:
+            print(f"⚠️ Retrieval failed, using full knowledge base: {e}")
+    return "massive", RESEARCHER_PROMPT_TEMPLATE
+
+RESEARCH_FAILURE_TEXT = "I'm having trouble processing that right now. Please try again."
+
+async def get_ai_response_text(user_question: str, context_mode: str = None) -> str:
     print("Step 1: Generating detailed response with Researcher model...")
     try:
         # CALL 1: The Researcher
-        researcher_completion = await main_client.chat.completions.create(
+        mode, system_prompt = await researcher_system_prompt(user_question, context_mode)
+        started = time.perf_counter()
+        researcher_completion = await groq_pool.call(lambda client: client.chat.completions.create(
             messages=[
-                {"role": "system", "content": RESEARCHER_PROMPT_TEMPLATE},
+                {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_question},
             ],
             model="openai/gpt-oss-120b",
             temperature=0.7,
             max_tokens=2048,
-        )
+        ), kind="research", cost=estimate_tokens(system_prompt + user_question) + 2048)
         detailed_text = researcher_completion.choices[0].message.content
-        print("✅ Detailed response generated.")
+        # Prompt size drives the 120B model's time-to-first-token: compare modes on /metrics
+        metrics.observe(f"research.{mode}.researcher_ms", (time.perf_counter() - started) * 1000)
+        usage = getattr(researcher_completion, "usage", None)
+        metrics.observe(f"research.{mode}.prompt_tokens", usage.prompt_tokens if usage else estimate_tokens(system_prompt))
+        print(f"✅ Detailed response generated ({mode} context).")
         print(f"📊 Detailed response length: {len(detailed_text)} chars, ~{len(detailed_text.split())} words")
 
         print("Step 2: Summarizing for voice with token safety...")
         # CALL 2: The Summarizer with aggressive limits
-        summarizer_completion = await main_client.chat.completions.create(
+        summarizer_completion = await groq_pool.call(lambda client: client.chat.completions.create(
             messages=[
                 {"role": "system", "content": SUMMARIZER_SYSTEM_PROMPT},
                 {"role": "user", "content": f"Summarize this response for voice output:\n\n{detailed_text}"}
@@ -389,7 +407,7 @@ async def get_ai_response_text(user_question: str) -> str:
             model="llama-3.3-70b-versatile",  # Better instruction following than llama
             temperature=0.4,
             max_tokens=300,  # Very conservative - ~70 words max
-        )
+        ), kind="summarise", cost=estimate_tokens(SUMMARIZER_SYSTEM_PROMPT + detailed_text) + 300)
         concise_text = summarizer_completion.choices[0].message.content.strip()
         
         # Remove any meta-commentary that might sneak through
@@ -398,13 +416,13 @@ async def get_ai_response_text(user_question: str) -> str:
 
         #---NEW CODE START---
         #Validate language before checking token limits
-        concise_text = await validate_and_fix_language(concise_text, main_client)
+        concise_text = await validate_and_fix_language(concise_text)
         
         print("✅ Concise voice response generated.")
         print(f"📊 Summarized response: {len(concise_text)} chars, ~{len(concise_text.split())} words")
         
         # Estimate tokens for logging
-        estimated_tokens = token_tracker.estimate_tokens(concise_text)
+        estimated_tokens = estimate_tokens(concise_text)
         print(f"🔍 Estimated tokens: {estimated_tokens}")
         print(f"🔍 FINAL OUTPUT: '{concise_text}'")
         
@@ -419,76 +437,52 @@ async def get_ai_response_text(user_question: str) -> str:
 
     except Exception as e:
         print(f"❌ ERROR during main LLM chain: {e}")
-        return "I'm having trouble processing that right now. Please try again."
+        return RESEARCH_FAILURE_TEXT
 
-# --- Token-Safe TTS with Rate Limiting ---
-async def get_speech_from_text(text: str):
-    # Check token limits before making TTS request
-    can_request, tokens_used = token_tracker.can_make_request(text)
-    estimated_tokens = token_tracker.estimate_tokens(text)
-    
-    print(f"🎙️ TTS Token Check:")
-    print(f"   Text: '{text}'")
-    print(f"   Length: {len(text)} chars, ~{len(text.split())} words")
-    print(f"   Estimated tokens: {estimated_tokens}")
-    print(f"   Tokens used in last minute: {tokens_used}")
-    print(f"   Can make request: {can_request}")
-    
-    if not can_request:
-        wait_time = 60 - (time.time() % 60) + 5  # Wait until next minute + buffer
-        print(f"⚠️ TPM limit would be exceeded. Would need to wait ~{wait_time:.0f} seconds.")
-        return None  # Or implement queuing/waiting logic
-    
-    # Try TTS cascade
-    for i, client in enumerate(groq_clients):
-        try:
-            print(f"Generating speech with Groq TTS (Client {i+1})...")
-            response = await client.audio.speech.create(
-                model="canopylabs/orpheus-v1-english",
-                voice="autumn",
-                response_format="wav",
-                input=text,
-            )
-            # Record successful request
-            token_tracker.record_request(text)
-            print(f"✅ TTS successful with Client {i+1}")
-            return (chunk for chunk in response.iter_bytes())
-        except Exception as e:
-            print(f"❌ Groq TTS (Client {i+1}) failed: {e}")
-            continue
+# --- TTS: same path as Riya's (phrase pack, fragments, TTS cache, Groq pool, gTTS) ---
+async def _audio_once(audio: bytes) -> AsyncIterator[bytes]:
+    yield audio
 
-    # Fallback to gTTS
-    try:
-        print("⚠️ All Groq TTS clients failed. Falling back to gTTS.")
-        tts = gTTS(text=text, lang='en', slow=False)
-        fp = io.BytesIO()
-        tts.write_to_fp(fp)
-        fp.seek(0)
-        return iter([fp.read()])
-    except Exception as e:
-        print(f"❌ FINAL FALLBACK FAILED: gTTS error: {e}")
-        return None
+async def _cache_answer_audio(stream: AsyncIterator[bytes], entry_id: int, audio_format: str) -> AsyncIterator[bytes]:
+    """Pass audio through to the caller and keep a copy for the answer cache once it's complete."""
+    chunks = []
+    async for chunk in stream:
+        chunks.append(chunk)
+        yield chunk
+    answer_cache.store_audio(entry_id, audio_format, b"".join(chunks))
 
 # --- SHARED LOGIC (TEXT/AUDIO) ---
-async def process_text_query(text: str):
+async def process_text_query(text: str, audio_format: str = "wav"):
     """
     Processes a text input through the Router -> Cache/LLM -> TTS pipeline.
     """
     if not text: return None
 
     # 1. ROUTER
-    intent = await get_query_intent(text, main_client)
+    intent = await get_query_intent(text)
     
     if intent != 'research':
         print(f"⚡ RAM CACHE HIT: Streaming '{intent}'")
-        cached_audio = cache_manager.get_audio_from_ram(intent)
+        cached_audio = await cache_manager.get_encoded_audio(intent, audio_format)
         if cached_audio:
-            async def audio_generator(): yield cached_audio
-            return audio_generator()
-
-    # 2. RESEARCHER
+            return _audio_once(cached_audio)
+
+    # 2. SEMANTIC ANSWER CACHE (near-duplicates of questions already researched)
+    entry_id, cached = answer_cache.lookup(text)
+    if cached:
+        if audio_format in cached.audio:
+            metrics.incr("answer_cache.saved_tts_calls")
+            return _audio_once(cached.audio[audio_format])
+        stream = await get_speech_from_text(cached.text, audio_format)
+        return _cache_answer_audio(stream, entry_id, audio_format) if stream else None
+
+    # 3. RESEARCHER
     response_text = await get_ai_response_text(text)
-    return await get_speech_from_text(response_text)
+    if response_text == RESEARCH_FAILURE_TEXT:
+        return await get_speech_from_text(response_text, audio_format)
+    entry_id = answer_cache.store(text, response_text)
+    stream = await get_speech_from_text(response_text, audio_format)
+    return _cache_answer_audio(stream, entry_id, audio_format) if stream else None
 
 # # --- Master Pipeline (Wired Up) ---
 # async def process_audio_query(audio_bytes: bytes):
@@ -520,8 +514,8 @@ async def process_text_query(text: str):
 #     audio_iterator = await get_speech_from_text(response_text)
 #     return audio_iterator
 # --- MASTER PIPELINE (AUDIO INPUT) ---
-async def process_audio_query(audio_bytes: bytes):
+async def process_audio_query(audio_bytes: bytes, audio_format: str = "wav"):
     # 1. STT
     text = await get_text_from_speech(audio_bytes)
     # 2. Pass to shared logic
-    return await process_text_query(text)
+    return await process_text_query(text, audio_format)
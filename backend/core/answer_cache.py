@@ -0,0 +1,163 @@
+import os
+import re
+import time
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.embeddings import get_embedder
+from core.metrics import metrics
+
+# ==================== CONFIG ====================
+# Near-duplicate meaning, not just the same topic. Only a semantic embedder can tell: hashed
+# n-grams score "Why FastAPI over Flask?" vs "Why Flask over FastAPI?" at 0.94 and "biggest" vs
+# "greatest weakness" at 0.71, so with hashing only exact repeats are served.
+_DEFAULT_THRESHOLDS = {"minilm": 0.92}
+ANSWER_CACHE_MAX = int(os.environ.get("ANSWER_CACHE_MAX", "256"))
+ANSWER_CACHE_TTL_S = float(os.environ.get("ANSWER_CACHE_TTL_S", str(24 * 3600)))
+# Answers are only valid for the knowledge they were generated from
+KNOWLEDGE_FILES = ("persona.json", "project_chunks.txt")
+RESEARCH_MODEL_CALLS = 2  # Researcher + summariser (language check/translation not counted)
+# "How did you build X" and "Why did you build X" embed almost identically but want different answers
+QUESTION_WORD = re.compile(r"\b(how|why|what|when|where|who|which)\b", re.IGNORECASE)
+
+# Words that don't change what is being asked about; everything else is a key term
+FILLER_WORDS = frozenset(
+    "a an the is are was were be do does did you your yours i me my to of in on at for with and or "
+    "over than vs versus this that it its about can could would should will please tell".split()
+)
+
+def question_word(text: str) -> str:
+    match = QUESTION_WORD.search(text)
+    return match.group(1).lower() if match else ""
+
+def normalise_query(text: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9+#']+", (text or "").lower()))
+
+def key_terms(text: str) -> List[str]:
+    return [w for w in normalise_query(text).split() if w not in FILLER_WORDS]
+
+def terms_agree(a: List[str], b: List[str]) -> bool:
+    """Shared key terms in the same order: "FastAPI over Flask" is not "Flask over FastAPI"."""
+    shared = set(a) & set(b)
+    return list(dict.fromkeys(w for w in a if w in shared)) == list(dict.fromkeys(w for w in b if w in shared))
+
+@dataclass
+class CachedAnswer:
+    query: str
+    text: str
+    created: float
+    audio: Dict[str, bytes] = field(default_factory=dict)  # Per codec, filled once TTS completes
+
+class SemanticAnswerCache:
+    """
+    Research answers keyed by query embedding. A new question whose cosine similarity
+    to a cached one is >= threshold, with the same question word and key terms in the
+    same order, gets the stored concise text (and audio, if any) instead of the
+    researcher/summariser/TTS chain. Without a semantic embedder only exact repeats
+    (ignoring case and punctuation) hit. LRU + max-age eviction; everything is dropped
+    when the knowledge files change.
+    """
+
+    def __init__(self, max_entries: int = ANSWER_CACHE_MAX, ttl_s: float = ANSWER_CACHE_TTL_S, embedder=None):
+        self.embedder = embedder or get_embedder()
+        threshold = os.environ.get("ANSWER_CACHE_THRESHOLD", _DEFAULT_THRESHOLDS.get(self.embedder.name))
+        self.threshold = float(threshold) if threshold is not None else None  # None = exact repeats only
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.entries: "OrderedDict[int, CachedAnswer]" = OrderedDict()  # LRU order, oldest first
+        self.vectors: Dict[int, np.ndarray] = {}
+        self.terms: Dict[int, List[str]] = {}
+        self._next_id = 0
+        self._stat = None
+        self.fingerprint = None
+        self._check_knowledge()
+
+    # ---------- Invalidation ----------
+    def _check_knowledge(self):
+        """Cheap stat() check per lookup; the files are only hashed when it changes."""
+        stat = tuple((os.stat(p).st_mtime_ns, os.stat(p).st_size) if os.path.exists(p) else None for p in KNOWLEDGE_FILES)
+        if stat == self._stat:
+            return
+        self._stat = stat
+        digest = hashlib.sha256()
+        for path in KNOWLEDGE_FILES:
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    digest.update(f.read())
+        fingerprint = digest.hexdigest()[:16]
+        if self.fingerprint and fingerprint != self.fingerprint and self.entries:
+            print(f"🧹 Knowledge base changed: dropping {len(self.entries)} cached research answers.")
+            metrics.incr("answer_cache.invalidations")
+            self.clear()
+        self.fingerprint = fingerprint
+
+    def clear(self):
+        self.entries.clear()
+        self.vectors.clear()
+        self.terms.clear()
+        metrics.gauge("answer_cache.entries", 0)
+
+    def _evict(self):
+        now = time.time()
+        for entry_id in [i for i, e in self.entries.items() if now - e.created > self.ttl_s]:
+            self._drop(entry_id)
+        while len(self.entries) > self.max_entries:
+            self._drop(next(iter(self.entries)))
+            metrics.incr("answer_cache.evictions")
+        metrics.gauge("answer_cache.entries", len(self.entries))
+
+    def _drop(self, entry_id: int):
+        self.entries.pop(entry_id, None)
+        self.vectors.pop(entry_id, None)
+        self.terms.pop(entry_id, None)
+
+    # ---------- Lookup / store ----------
+    def lookup(self, query: str) -> Tuple[Optional[int], Optional[CachedAnswer]]:
+        self._check_knowledge()
+        self._evict()
+        hit_id, best = None, -1.0
+        asks, terms = question_word(query), key_terms(query)
+        candidates = [i for i, e in self.entries.items() if question_word(e.query) == asks and terms_agree(terms, self.terms[i])]
+        if self.threshold is None:
+            key = normalise_query(query)
+            exact = [i for i in candidates if normalise_query(self.entries[i].query) == key]
+            if exact: hit_id, best = exact[-1], 1.0
+        elif candidates:
+            sims = np.stack([self.vectors[i] for i in candidates]) @ self.embedder.encode([query])[0]
+            best_row = int(np.argmax(sims))
+            hit_id, best = candidates[best_row], float(sims[best_row])
+
+        if hit_id is None or best < (self.threshold or 1.0):
+            metrics.incr("answer_cache.misses")
+            metrics.gauge("answer_cache.hit_rate", metrics.ratio("answer_cache.hits", "answer_cache.misses"))
+            return None, None
+        self.entries.move_to_end(hit_id)
+        metrics.incr("answer_cache.hits")
+        metrics.incr("answer_cache.saved_llm_calls", RESEARCH_MODEL_CALLS)
+        metrics.observe("answer_cache.hit_similarity", round(best, 3))
+        metrics.gauge("answer_cache.hit_rate", metrics.ratio("answer_cache.hits", "answer_cache.misses"))
+        entry = self.entries[hit_id]
+        print(f"🧠 Answer cache hit ({best:.2f}): '{query}' ~ '{entry.query}'")
+        return hit_id, entry
+
+    def store(self, query: str, text: str) -> int:
+        self._check_knowledge()
+        entry_id, self._next_id = self._next_id, self._next_id + 1
+        self.entries[entry_id] = CachedAnswer(query=query, text=text, created=time.time())
+        self.terms[entry_id] = key_terms(query)
+        if self.threshold is not None:
+            self.vectors[entry_id] = self.embedder.encode([query])[0]
+        self._evict()
+        return entry_id
+
+    def store_audio(self, entry_id: int, audio_format: str, audio: bytes):
+        entry = self.entries.get(entry_id)
+        if entry is not None and audio:
+            entry.audio[audio_format] = audio
+
+# Singleton instance
+answer_cache = SemanticAnswerCache()
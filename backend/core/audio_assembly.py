@@ -0,0 +1,201 @@
+import io
+import os
+import re
+import time
+import wave
+import calendar
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.metrics import metrics
+from core.phrase_cache import PhraseCache, normalise_phrase
+from core.response_templates import (
+    ASKS, ACK_NAME, ACK_PHONE, ACK_BOOKING, ACK_GENERIC, CONFIRMATIONS, UNAVAILABLE,
+    ordinal, speak_time,
+)
+
+# ==================== CONFIG ====================
+FRAGMENT_PACK_FILE = os.environ.get("FRAGMENT_PACK_FILE", "fragment_audio.bin")
+CROSSFADE_MS = 10        # Overlap at every join so word edges don't click
+EDGE_PAD_MS = 30         # Silence kept around each fragment after trimming
+SILENCE_THRESHOLD = 500  # |sample| below this counts as silence (int16)
+PAUSES_S = {",": 0.12, ";": 0.12, ".": 0.25, "!": 0.25, "?": 0.25}
+# Words no pack can hold (the caller's name) are synthesised on their own and stitched in:
+# at most this many such spans per line, each at most MAX_GAP_WORDS long
+MAX_TTS_GAPS = int(os.environ.get("FRAGMENT_TTS_GAPS", "1"))
+MAX_GAP_WORDS = 4
+
+# ==================== VOCABULARY ====================
+def _static_pieces(template: str) -> List[str]:
+    """'Amazing! You're all set, table for {party_size} on {date}' -> ['Amazing!', "You're all set, table for", 'on']"""
+    pieces = []
+    for part in re.split(r"\{\w+\}", template):
+        for sentence in re.split(r"(?<=[.!?])\s+", part):
+            if normalise_phrase(sentence):
+                pieces.append(sentence.strip())
+    return pieces
+
+def fragment_vocabulary() -> List[str]:
+    """Every fragment a confirmation/ack can be built from (rendered by build_phrase_cache.py)."""
+    templates = list(CONFIRMATIONS.values()) + ACK_NAME + ACK_PHONE + ACK_BOOKING + ACK_GENERIC + [UNAVAILABLE]
+    templates += [line for variants in ASKS.values() for line in variants]
+    templates += ["a table for {x}", "on {x}", "at {x}", "{x} it is"]  # _acknowledgement details
+
+    fragments = [piece for t in templates for piece in _static_pieces(t)]
+    fragments += [str(n) for n in range(1, 21)]                        # Party sizes
+    fragments += [ordinal(n) for n in range(1, 32)]                    # Day of month
+    fragments += list(calendar.day_name) + list(calendar.month_name)[1:]
+    fragments += [speak_time(f"{h:02d}:{m:02d}") for h in range(24) for m in (0, 15, 30, 45)]
+    fragments.append("Guest")  # Real names are synthesised per call (see AudioAssembler.plan)
+    return list(dict.fromkeys(f for f in fragments if f))  # De-dupe, keep order
+
+# ==================== WAV HELPERS ====================
+def _read_wav(audio: bytes) -> Tuple[tuple, np.ndarray]:
+    """-> ((channels, sample_width, rate), int16 samples shaped (frames, channels))"""
+    with wave.open(io.BytesIO(audio), "rb") as w:
+        params = (w.getnchannels(), w.getsampwidth(), w.getframerate())
+        frames = w.readframes(w.getnframes())
+    if params[1] != 2:
+        raise ValueError(f"expected 16-bit PCM, got {params[1] * 8}-bit")
+    return params, np.frombuffer(frames, dtype="<i2").reshape(-1, params[0])
+
+def _write_wav(params: tuple, samples: np.ndarray) -> bytes:
+    channels, width, rate = params
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(width)
+        w.setframerate(rate)
+        w.writeframes(samples.astype("<i2").tobytes())
+    return buf.getvalue()
+
+def prepare_fragment(audio: bytes) -> Optional[bytes]:
+    """Trim the TTS's leading/trailing silence and rewrite a clean header (build time)."""
+    try:
+        params, samples = _read_wav(audio)
+    except (wave.Error, ValueError, EOFError) as e:
+        print(f"⚠️ Unusable fragment audio: {e}")
+        return None
+    voiced = np.flatnonzero(np.abs(samples).max(axis=1) > SILENCE_THRESHOLD)
+    if voiced.size == 0:
+        return None
+    pad = int(params[2] * EDGE_PAD_MS / 1000)
+    start, end = max(0, voiced[0] - pad), min(len(samples), voiced[-1] + pad + 1)
+    return _write_wav(params, samples[start:end])
+
+def _join(pieces: List[Tuple[np.ndarray, float]], rate: int) -> np.ndarray:
+    """Crossfade consecutive fragments; insert silence where the text had punctuation."""
+    fade = int(rate * CROSSFADE_MS / 1000)
+    out = pieces[0][0].astype(np.float32)
+    pause = pieces[0][1]
+    for samples, next_pause in pieces[1:]:
+        samples = samples.astype(np.float32)
+        if pause:
+            gap = np.zeros((int(rate * pause), out.shape[1]), dtype=np.float32)
+            out = np.concatenate([out, gap, samples])
+        else:
+            n = min(fade, len(out), len(samples))
+            ramp = np.linspace(0.0, 1.0, n, dtype=np.float32)[:, None]
+            mixed = out[len(out) - n:] * (1 - ramp) + samples[:n] * ramp
+            out = np.concatenate([out[:len(out) - n], mixed, samples[n:]])
+        pause = next_pause
+    return np.clip(out, -32768, 32767)
+
+# ==================== ASSEMBLER ====================
+class AudioAssembler:
+    """Stitches pre-rendered fragments into one WAV when a line is fully covered by them."""
+
+    def __init__(self, pack: PhraseCache):
+        self.pack = pack
+        self._vocab = None
+        self._max_len = 0
+
+    def _vocabulary(self):
+        if self._vocab is None:
+            if not self.pack._loaded: self.pack.load()
+            self._vocab = {tuple(key.split()) for key in self.pack.entries}
+            self._max_len = max((len(k) for k in self._vocab), default=0)
+        return self._vocab
+
+    @staticmethod
+    def _tokenise(text: str) -> Tuple[List[str], dict]:
+        """Words plus the pause owed after token i (punctuation followed by a space or the end)."""
+        tokens, pauses = [], {}
+        for chunk, punct in re.findall(r"(.*?)([,;.!?]+(?=\s|$)|$)", text):
+            tokens += normalise_phrase(chunk).split()
+            if punct and tokens:
+                pauses[len(tokens) - 1] = max(PAUSES_S.get(p, 0) for p in punct)
+        return tokens, pauses
+
+    def plan(self, text: str, model: str = None, voice: str = None, max_gaps: int = 0) -> Optional[List[Tuple[str, float, bool]]]:
+        """
+        Cover the text with as few fragments as possible.
+        Returns [(fragment_key, pause_after_s, synthesise), ...] or None if it can't be covered.
+        With max_gaps, up to that many short runs of unknown words (names) become
+        `synthesise=True` items whose key is the text to send to TTS; plans with
+        fewer gaps, then fewer synthesised words, always win.
+        """
+        vocab = self._vocabulary()
+        if not vocab or not self.pack.matches_voice(model, voice):
+            return None
+        tokens, pauses = self._tokenise(text)
+        if not tokens:
+            return None
+
+        # best[i][g] = ((synthesised words, pieces), previous cut, previous gap count, is_gap)
+        # for covering tokens[:i] with g gaps
+        best = [[None] * (max_gaps + 1) for _ in range(len(tokens) + 1)]
+        best[0][0] = ((0, 0), None, None, False)
+        for i in range(len(tokens)):
+            for g in range(max_gaps + 1):
+                if best[i][g] is None: continue
+                words, pieces = best[i][g][0]
+                for n in range(1, min(self._max_len, len(tokens) - i) + 1):
+                    cost, cell = (words, pieces + 1), best[i + n][g]
+                    if tuple(tokens[i:i + n]) in vocab and (cell is None or cost < cell[0]):
+                        best[i + n][g] = (cost, i, g, False)
+                if g < max_gaps and not best[i][g][3]:  # Two gaps in a row would just be one longer gap
+                    for n in range(1, min(MAX_GAP_WORDS, len(tokens) - i) + 1):
+                        cost, cell = (words + n, pieces + 1), best[i + n][g + 1]
+                        if cell is None or cost < cell[0]:
+                            best[i + n][g + 1] = (cost, i, g, True)
+        gaps = next((g for g in range(max_gaps + 1) if best[-1][g] is not None), None)
+        if gaps is None:
+            metrics.incr("assembly.uncovered")
+            return None
+
+        plan, end = [], len(tokens)
+        while end:
+            _, start, previous, is_gap = best[end][gaps]
+            words = " ".join(tokens[start:end])
+            plan.append((words.title() if is_gap else words, pauses.get(end - 1, 0.0), is_gap))
+            end, gaps = start, previous
+        return plan[::-1]
+
+    def assemble(self, plan: List[Tuple[str, float, bool]], synthesised: Optional[Dict[str, bytes]] = None) -> Optional[bytes]:
+        """
+        PCM-level join: one WAV header, no re-encoding. `synthesised` holds the TTS audio
+        for the plan's gap items. None if any piece is missing or the formats disagree.
+        """
+        start = time.perf_counter()
+        synthesised = synthesised or {}
+        try:
+            decoded = [_read_wav(synthesised[key] if synth else self.pack.read(key)) for key, _, synth in plan]
+        except (wave.Error, ValueError, EOFError, TypeError, KeyError) as e:
+            print(f"⚠️ Fragment assembly failed: {e}")
+            metrics.incr("assembly.errors")
+            return None
+        params = decoded[0][0]
+        if any(p != params for p, _ in decoded):
+            metrics.incr("assembly.format_mismatch")
+            return None
+
+        audio = _write_wav(params, _join([(samples, pause) for (_, samples), (_, pause, _) in zip(decoded, plan)], params[2]))
+        metrics.incr("assembly.hits")
+        if synthesised: metrics.incr("assembly.with_tts_gaps")
+        metrics.observe("assembly.ms", (time.perf_counter() - start) * 1000)
+        return audio
+
+# Singleton instance
+fragment_assembler = AudioAssembler(PhraseCache(FRAGMENT_PACK_FILE, name="fragments"))
@@ -0,0 +1,62 @@
+import os
+import time
+import shutil
+import asyncio
+from typing import Optional
+
+from core.metrics import metrics
+
+# ==================== CODECS ====================
+# Everything is synthesised as WAV; other formats are encoded server-side by ffmpeg.
+# Opus goes in an Ogg container so browsers can play each clip as a standalone blob.
+CODECS = {
+    "wav": {"media_type": "audio/wav", "args": None},
+    "opus": {"media_type": "audio/ogg", "args": ["-c:a", "libopus", "-b:a", "24k", "-application", "voip", "-f", "ogg"]},
+    "mp3": {"media_type": "audio/mpeg", "args": ["-c:a", "libmp3lame", "-b:a", "48k", "-f", "mp3"]},
+}
+DEFAULT_CODEC = "wav"
+FFMPEG_BIN = os.environ.get("FFMPEG_BIN", "ffmpeg")
+FFMPEG_AVAILABLE = shutil.which(FFMPEG_BIN) is not None
+
+def negotiate_codec(requested: Optional[str]) -> str:
+    """Client's preferred codec if we can produce it, else WAV (always playable)."""
+    for codec in (requested or "").lower().replace(" ", "").split(","):  # "opus,mp3" = preference order
+        if codec in CODECS and (codec == "wav" or FFMPEG_AVAILABLE):
+            return codec
+    return DEFAULT_CODEC
+
+def media_type(codec: str) -> str:
+    return CODECS.get(codec, CODECS[DEFAULT_CODEC])["media_type"]
+
+async def encode_audio(wav: bytes, codec: str) -> Optional[bytes]:
+    """WAV -> codec in an ffmpeg subprocess (never on the event loop). None if encoding failed."""
+    if codec == "wav" or not wav:
+        return wav
+    started = time.perf_counter()
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            FFMPEG_BIN, "-hide_banner", "-loglevel", "error", "-i", "pipe:0", "-ac", "1",
+            *CODECS[codec]["args"], "pipe:1",
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+        )
+    except (OSError, KeyError) as e:
+        print(f"❌ Audio encoding ({codec}) unavailable: {e}")
+        return None
+    try:
+        encoded, err = await proc.communicate(wav)
+    except asyncio.CancelledError:
+        # Barge-in mid-encode: don't leave ffmpeg running (or unreaped) behind the turn
+        if proc.returncode is None: proc.kill()
+        await proc.wait()
+        metrics.incr(f"codec.{codec}.cancelled")
+        raise
+    except OSError as e:
+        print(f"❌ Audio encoding ({codec}) unavailable: {e}")
+        return None
+    if proc.returncode != 0 or not encoded:
+        print(f"❌ ffmpeg {codec} encode failed: {err.decode(errors='ignore').strip()[:200]}")
+        metrics.incr(f"codec.{codec}.errors")
+        return None
+    metrics.observe(f"codec.{codec}.encode_ms", (time.perf_counter() - started) * 1000)
+    metrics.gauge(f"codec.{codec}.compression_ratio", round(len(wav) / len(encoded), 2))
+    return encoded
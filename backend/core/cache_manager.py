@@ -4,6 +4,8 @@ import base64
 from supabase import create_client, Client
 from dotenv import load_dotenv
 
+from core.audio_codec import encode_audio
+
 load_dotenv()
 
 class CacheManager:
@@ -13,6 +15,7 @@ class CacheManager:
         
         # In-memory stores
         self.audio_cache = {}    # { 'intro': b'\x00...' }
+        self.encoded_cache = {}  # { ('intro', 'opus'): b'...' } encoded on first request per codec
         self.trigger_map = {}    # { 'intro': ['who are you', ...] }
         self.valid_slugs = []    # ['intro', 'superpower', ...]
 
@@ -72,6 +75,19 @@ class CacheManager:
     def get_audio_from_ram(self, slug: str) -> bytes:
         return self.audio_cache.get(slug)
 
+    async def get_encoded_audio(self, slug: str, audio_format: str = "wav") -> bytes:
+        """Golden answer in the client's codec. Encoded once, then served from RAM."""
+        audio = self.audio_cache.get(slug)
+        if audio is None or audio_format == "wav":
+            return audio
+        key = (slug, audio_format)
+        if key not in self.encoded_cache:
+            encoded = await encode_audio(audio, audio_format)
+            if not encoded:
+                return audio  # Browsers sniff the container, so WAV still plays
+            self.encoded_cache[key] = encoded
+        return self.encoded_cache[key]
+
     def get_intents_list(self) -> str:
         if not self.valid_slugs: return ""
         return "\n".join([f"- '{slug}'" for slug in self.valid_slugs])
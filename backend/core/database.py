@@ -1,8 +1,14 @@
 import os
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
 from supabase import create_client, Client
 from datetime import datetime
 from dotenv import load_dotenv
 
+from core.metrics import metrics
+
 load_dotenv()
 
 # Singleton DB Client
@@ -10,18 +16,73 @@ url = os.environ.get("SUPABASE_URL")
 key = os.environ.get("SUPABASE_SERVICE_ROLE_KEY") # Use Service Role for backend ops
 db_client: Client = create_client(url, key)
 
+# ==================== NON-BLOCKING EXECUTION ====================
+# The supabase client is synchronous. Every query runs on a small bounded worker
+# pool so a slow round trip never stalls the event loop (and every other live
+# /ws/call socket). The client and its HTTP connection pool are shared by all workers.
+DB_MAX_WORKERS = int(os.environ.get("DB_MAX_WORKERS", "8"))
+DB_TIMEOUT_S = float(os.environ.get("DB_TIMEOUT_S", "4.0"))
+
+_db_executor = ThreadPoolExecutor(max_workers=DB_MAX_WORKERS, thread_name_prefix="supabase")
+_db_slots = None  # (loop, Semaphore): one slot per worker, held until the thread really finishes
+
+def _slots() -> asyncio.Semaphore:
+    global _db_slots
+    loop = asyncio.get_running_loop()
+    if _db_slots is None or _db_slots[0] is not loop:
+        _db_slots = (loop, asyncio.Semaphore(DB_MAX_WORKERS))
+    return _db_slots[1]
+
+def _release_when_done(loop: asyncio.AbstractEventLoop, slots: asyncio.Semaphore):
+    def release(_future):
+        try:
+            loop.call_soon_threadsafe(slots.release)
+        except RuntimeError:
+            pass  # Loop already closed (shutdown)
+    return release
+
+async def _submit(query: Callable):
+    loop = asyncio.get_running_loop()
+    slots = _slots()
+    await slots.acquire()
+    try:
+        future = _db_executor.submit(query)
+    except BaseException:
+        slots.release()
+        raise
+    future.add_done_callback(_release_when_done(loop, slots))
+    return await asyncio.wrap_future(future)
+
+async def run_query(label: str, query: Callable, timeout: float = DB_TIMEOUT_S):
+    """
+    Run a blocking `...execute()` call on the DB worker pool with a per-call timeout.
+    A timeout only abandons the await: the thread can't be interrupted and keeps its
+    worker until the query returns. Slots are therefore released when the thread
+    finishes, not when we stop waiting, and the wait for a free slot counts against
+    the timeout. Under a slow database new queries fail fast with TimeoutError instead
+    of piling up behind abandoned ones in the executor queue.
+    """
+    start = time.perf_counter()
+    try:
+        return await asyncio.wait_for(_submit(query), timeout)
+    except asyncio.TimeoutError:
+        metrics.incr(f"db.{label}.timeouts")
+        raise TimeoutError(f"{label} exceeded {timeout}s")
+    finally:
+        metrics.observe(f"db.{label}.latency_ms", (time.perf_counter() - start) * 1000)
+
 class BookingManager:
     @staticmethod
     async def get_upcoming_booking(phone: str):
         """Check if this user has a future confirmed/pending booking (Memory)"""
         if not phone: return None
         try:
-            response = db_client.table('bookings').select('*')\
-                .eq('phone', phone)\
-                .in_('status', ['confirmed', 'pending'])\
-                .gte('booking_date', datetime.now().date().isoformat())\
-                .execute()
-            
+            response = await run_query("get_booking", lambda: db_client.table('bookings').select('*')
+                .eq('phone', phone)
+                .in_('status', ['confirmed', 'pending'])
+                .gte('booking_date', datetime.now().date().isoformat())
+                .execute())
+
             if response.data:
                 return response.data[0] # Return the first active booking
             return None
@@ -33,7 +94,7 @@ class BookingManager:
     async def create_booking(data: dict):
         """Insert a new booking"""
         try:
-            return db_client.table('bookings').insert(data).execute()
+            return await run_query("create_booking", lambda: db_client.table('bookings').insert(data).execute())
         except Exception as e:
             print(f"❌ DB Error (create_booking): {e}")
             return None
@@ -43,11 +104,11 @@ class BookingManager:
         """Check time_slots table for capacity"""
         try:
             # First, check if slot exists
-            response = db_client.table('time_slots').select('*')\
-                .eq('booking_date', date_str)\
-                .eq('booking_time', time_str)\
-                .execute()
-            
+            response = await run_query("check_availability", lambda: db_client.table('time_slots').select('*')
+                .eq('booking_date', date_str)
+                .eq('booking_time', time_str)
+                .execute())
+
             if not response.data:
                 return False # Slot doesn't exist (e.g., closed)
 
@@ -65,7 +126,7 @@ class SessionManager:
         """Get where the user is in the conversation flow"""
         if not phone: return None
         try:
-            response = db_client.table('conversation_state').select('*').eq('phone', phone).execute()
+            response = await run_query("get_state", lambda: db_client.table('conversation_state').select('*').eq('phone', phone).execute())
             if response.data:
                 return response.data[0]
             return None
@@ -75,40 +136,61 @@ class SessionManager:
 
     @staticmethod
     async def update_state(phone: str, step: str, data: dict = None):
-        """Update the conversation step and collected data"""
-        if not phone: return
-        
+        """
+        Upsert the conversation step and merge collected data in ONE statement.
+        Returns the merged row, so callers never need a separate get_state.
+        (See sql/merge_conversation_state.sql)
+        """
+        if not phone: return None
+
+        try:
+            response = await run_query("merge_state", lambda: db_client.rpc('merge_conversation_state', {
+                "p_phone": phone,
+                "p_step": step,
+                "p_data": data or {}
+            }).execute())
+            return response.data[0] if response.data else None
+
+        except Exception as e:
+            # Function not deployed yet -> keep working with the old read-merge-write path
+            if "merge_conversation_state" in str(e) or "PGRST202" in str(e):
+                print("⚠️ merge_conversation_state RPC missing. Using legacy update path.")
+                return await SessionManager._update_state_legacy(phone, step, data)
+            print(f"❌ DB Error (update_state): {e}")
+            return None
+
+    @staticmethod
+    async def _update_state_legacy(phone: str, step: str, data: dict = None):
+        """Two round trips (read, then update/insert). Racy; fallback only."""
         try:
             existing = await SessionManager.get_state(phone)
-            
+
             payload = {
                 "phone": phone,
                 "current_step": step,
                 "last_interaction": datetime.now().isoformat()
             }
-            
-            if data:
-                # Merge new data with existing JSONB data
-                current_data = existing['collected_data'] if existing else {}
-                current_data.update(data)
-                payload['collected_data'] = current_data
-            elif not existing:
-                 # Initialize empty if creating new and no data passed
-                 payload['collected_data'] = {}
+
+            # Merge new data with existing JSONB data
+            current_data = existing['collected_data'] if existing else {}
+            current_data.update(data or {})
+            payload['collected_data'] = current_data
 
             if existing:
-                db_client.table('conversation_state').update(payload).eq('phone', phone).execute()
+                await run_query("update_state", lambda: db_client.table('conversation_state').update(payload).eq('phone', phone).execute())
             else:
-                db_client.table('conversation_state').insert(payload).execute()
-                
+                await run_query("insert_state", lambda: db_client.table('conversation_state').insert(payload).execute())
+            return payload
+
         except Exception as e:
             print(f"❌ DB Error (update_state): {e}")
+            return None
 
     @staticmethod
     async def clear_session(phone: str):
         """Wipe session after successful booking"""
         if not phone: return
         try:
-            db_client.table('conversation_state').delete().eq('phone', phone).execute()
+            await run_query("clear_session", lambda: db_client.table('conversation_state').delete().eq('phone', phone).execute())
         except Exception as e:
-            print(f"❌ DB Error (clear_session): {e}")
\ No newline at end of file
+            print(f"❌ DB Error (clear_session): {e}")
@@ -0,0 +1,88 @@
+import os
+import re
+import zlib
+from typing import List
+
+import numpy as np
+
+# ==================== CONFIG ====================
+# "hashing": pure NumPy, no model download, ~0.1 ms per query (default)
+# "minilm":  all-MiniLM-L6-v2 via sentence-transformers (optional dependency, same model as the FAISS index)
+EMBEDDER = os.environ.get("EMBEDDER", "hashing")
+HASHING_DIM = int(os.environ.get("HASHING_EMBED_DIM", "1024"))
+MINILM_MODEL = "all-MiniLM-L6-v2"
+
+def _normalise(text: str) -> str:
+    text = (text or "").lower().replace("’", "'")
+    return re.sub(r"\s+", " ", re.sub(r"[^a-z0-9' ]+", " ", text)).strip()
+
+def _l2_normalise(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+class HashingEmbedder:
+    """
+    Bag of word uni/bigrams + character 3-5 grams, hashed into a fixed-size vector.
+    crc32 (not hash()) keeps vectors stable across processes, so they can be stored.
+    """
+    name = "hashing"
+
+    def __init__(self, dim: int = HASHING_DIM):
+        self.dim = dim
+
+    def _features(self, text: str) -> List[str]:
+        words = _normalise(text).split()
+        feats = [f"w:{w}" for w in words] + [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+        for word in words:
+            padded = f" {word} "
+            feats += [f"c:{padded[i:i + n]}" for n in (3, 4, 5) for i in range(len(padded) - n + 1)]
+        return feats
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feat in self._features(text):
+                h = zlib.crc32(feat.encode("utf-8"))
+                # Signed hashing: collisions cancel out instead of piling up
+                out[row, h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+        return _l2_normalise(out)
+
+class MiniLMEmbedder:
+    """Sentence-transformers model, loaded on first use."""
+    name = "minilm"
+
+    def __init__(self, model_name: str = MINILM_MODEL):
+        self.model_name = model_name
+        self._model = None
+
+    @property
+    def dim(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    @property
+    def model(self):
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer  # Optional dependency
+            self._model = SentenceTransformer(self.model_name)
+        return self._model
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        vectors = self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False)
+        return np.asarray(vectors, dtype=np.float32)
+
+_embedders = {}
+
+def get_embedder(kind: str = None):
+    """Shared embedder instance; falls back to hashing if the MiniLM stack isn't installed."""
+    kind = kind or EMBEDDER
+    if kind not in _embedders:
+        if kind == "minilm":
+            try:
+                import sentence_transformers  # noqa: F401
+                _embedders[kind] = MiniLMEmbedder()
+            except ImportError:
+                print("⚠️ sentence-transformers not installed. Falling back to hashing embeddings.")
+                _embedders[kind] = get_embedder("hashing")
+        else:
+            _embedders[kind] = HashingEmbedder()
+    return _embedders[kind]
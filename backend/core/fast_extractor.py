@@ -0,0 +1,328 @@
+import os
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+# ==================== CONFIG ====================
+# Below this, extract_booking_data escalates the turn to the LLM extractor
+FAST_EXTRACT_MIN_CONFIDENCE = float(os.environ.get("FAST_EXTRACT_MIN_CONFIDENCE", "0.8"))
+
+FIELDS = ["phone", "name", "party_size", "date", "time", "special_requests"]
+
+# ==================== VOCABULARY ====================
+NUMBER_WORDS = {
+    "zero": 0, "oh": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+    "thirteen": 13, "fourteen": 14, "fifteen": 15, "sixteen": 16, "seventeen": 17,
+    "eighteen": 18, "nineteen": 19, "twenty": 20, "thirty": 30, "forty": 40, "fifty": 50,
+}
+ORDINAL_WORDS = {
+    "first": 1, "second": 2, "third": 3, "fourth": 4, "fifth": 5, "sixth": 6, "seventh": 7,
+    "eighth": 8, "ninth": 9, "tenth": 10, "eleventh": 11, "twelfth": 12, "thirteenth": 13,
+    "fourteenth": 14, "fifteenth": 15, "sixteenth": 16, "seventeenth": 17, "eighteenth": 18,
+    "nineteenth": 19, "twentieth": 20, "thirtieth": 30,
+}
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+MONTHS = {
+    "january": 1, "jan": 1, "february": 2, "feb": 2, "march": 3, "mar": 3, "april": 4, "apr": 4,
+    "may": 5, "june": 6, "jun": 6, "july": 7, "jul": 7, "august": 8, "aug": 8,
+    "september": 9, "sept": 9, "sep": 9, "october": 10, "oct": 10, "november": 11, "nov": 11,
+    "december": 12, "dec": 12,
+}
+DIGIT_WORDS = {"zero": "0", "oh": "0", "o": "0", "one": "1", "two": "2", "three": "3", "four": "4",
+               "five": "5", "six": "6", "seven": "7", "eight": "8", "nine": "9"}
+
+# Things only the LLM can turn into a sensible free-text field
+SPECIAL_REQUEST_HINTS = re.compile(
+    r"\b(vegan|vegetarian|gluten|allerg\w*|nut[s]?|dairy|halal|kosher|birthday|anniversary|"
+    r"window|outdoor|outside|patio|booth|quiet|wheelchair|high ?chair|stroller|celebrat\w*|cake|surprise)\b", re.I)
+# Callers changing their mind: the rule engine cannot tell which value wins
+CORRECTION_HINTS = re.compile(r"\b(actually|instead|change|not|no longer|make it|rather|scratch that|wait)\b", re.I)
+
+NAME_STOPWORDS = {
+    "looking", "calling", "trying", "here", "good", "fine", "great", "okay", "ok", "sure", "not", "just",
+    "hoping", "wondering", "interested", "ready", "free", "available", "sorry", "back", "so", "very",
+    "going", "planning", "a", "an", "the", "for", "to", "me", "my", "your", "it", "that", "this", "all",
+    "booking", "reserving", "riya", "correct", "right", "yes", "no", "yeah", "alright", "thanks",
+    "tonight", "today", "tomorrow", "noon", "midnight", "also", "still", "really",
+    "and", "from", "with", "at", "on", "in", "by", "i", "we", "speaking", "thank", "hi", "hello", "hey",
+    "please", "here's", "is", "was", "table", "reservation", "party", "need", "want", "would", "like",
+    "can", "could", "will", "of", "but", "um", "uh",
+}
+# Bare replies made only of these (or stopwords) carry nothing to extract
+CHITCHAT_WORDS = {
+    "that's", "thats", "sounds", "perfect", "cool", "awesome", "lovely", "nice", "wonderful", "exactly",
+    "yep", "yup", "nope", "bye", "goodbye", "cheers", "hmm", "mm", "ah", "oh", "well", "done", "got", "sir",
+    "ma'am", "absolutely", "definitely", "course", "i'm", "i'd", "you", "much", "true",
+}
+PRONOUN_FORMS = {"I", "I'm", "I'd", "I'll", "I've"}
+NAME_TRIGGER = re.compile(
+    r"\b(my name is|my name's|name is|name's|this is|call me|i am|i'm|im|it's|its|under the name|under|"
+    r"(?:reservation|booking|table) (?:is )?(?:for|under))\s+"
+    r"([A-Za-z][A-Za-z'\-]+)(?:\s+([A-Za-z][a-z'\-]+))?", re.I)
+EXPLICIT_NAME_TRIGGERS = {"my name is", "my name's", "name is", "name's", "call me", "under the name"}
+
+# ==================== RESULT ====================
+@dataclass
+class FastExtraction:
+    data: Dict = field(default_factory=lambda: {k: None for k in FIELDS})
+    confidence: Dict = field(default_factory=dict)   # { field: 0..1 }
+    escalate_reasons: List[str] = field(default_factory=list)
+
+    @property
+    def score(self) -> float:
+        """Overall confidence: the weakest extracted field (1.0 for 'nothing to extract')."""
+        return min(self.confidence.values()) if self.confidence else 1.0
+
+    @property
+    def is_confident(self) -> bool:
+        return not self.escalate_reasons and self.score >= FAST_EXTRACT_MIN_CONFIDENCE
+
+    def set(self, key: str, value, confidence: float):
+        # Two different values for the same field -> conflict, let the LLM decide
+        if self.data.get(key) is not None and self.data[key] != value:
+            self.escalate_reasons.append(f"conflicting {key}")
+            return
+        self.data[key] = value
+        self.confidence[key] = min(confidence, self.confidence.get(key, 1.0))
+
+# ==================== HELPERS ====================
+_NUM_WORD_PATTERN = "|".join(sorted(NUMBER_WORDS, key=len, reverse=True))
+NUM = rf"(\d{{1,2}}|(?:(?:twenty|thirty|forty|fifty)[\s\-](?:one|two|three|four|five|six|seven|eight|nine))|{_NUM_WORD_PATTERN})"
+
+def parse_number(token: str) -> Optional[int]:
+    """'4' / 'four' / 'twenty-two' -> int"""
+    token = token.lower().strip()
+    if token.isdigit(): return int(token)
+    parts = re.split(r"[\s\-]+", token)
+    if all(p in NUMBER_WORDS for p in parts):
+        return sum(NUMBER_WORDS[p] for p in parts)
+    return None
+
+def _blank(text: str, span: Tuple[int, int]) -> str:
+    """Mask a consumed span so later rules (and the leftover check) don't see it again."""
+    return text[:span[0]] + " " * (span[1] - span[0]) + text[span[1]:]
+
+def _to_24h(hour: int, minute: int, meridiem: Optional[str]) -> Optional[str]:
+    if meridiem:
+        meridiem = meridiem.replace(".", "").lower()
+        if hour < 1 or hour > 12: return None
+        if meridiem.startswith("p") and hour != 12: hour += 12
+        if meridiem.startswith("a") and hour == 12: hour = 0
+    if hour > 23 or minute > 59: return None
+    return f"{hour:02d}:{minute:02d}"
+
+# ==================== FIELD RULES ====================
+def _extract_phone(text: str, result: FastExtraction) -> str:
+    for match in re.finditer(r"\+?\d[\d\s\-\(\)\.]{6,}\d", text):
+        digits = re.sub(r"\D", "", match.group())
+        if 10 <= len(digits) <= 15:
+            result.set("phone", digits, 0.98)
+            text = _blank(text, match.span())
+    # Spelled out: "five five five one two three four five six seven"
+    word_seq = r"\b(?:(?:zero|oh|o|one|two|three|four|five|six|seven|eight|nine)[\s,\-]+){9,14}(?:zero|oh|o|one|two|three|four|five|six|seven|eight|nine)\b"
+    for match in re.finditer(word_seq, text, re.I):
+        digits = "".join(DIGIT_WORDS[w.lower()] for w in re.findall(r"[a-z]+", match.group(), re.I))
+        if 10 <= len(digits) <= 15:
+            result.set("phone", digits, 0.9)
+            text = _blank(text, match.span())
+    return text
+
+def _extract_time(text: str, result: FastExtraction) -> str:
+    lowered = text.lower()
+    evening = bool(re.search(r"\b(tonight|evening|dinner)\b", lowered))
+    rules = [
+        # 7 PM / 7:30 p.m. / seven thirty pm
+        (rf"\b(?:at\s+)?{NUM}(?:[:\s](\d{{2}}|thirty|fifteen|forty[\s\-]five))?\s*(a\.?m\.?|p\.?m\.?)(?![a-z])", 0.97),
+        # 19:00 / 7:30
+        (r"\b(?:at\s+)?(\d{1,2}):(\d{2})\b()", 0.9),
+        # seven o'clock / at 7 / at seven thirty
+        (rf"\b(?:at|around|by)\s+{NUM}(?:[:\s](thirty|fifteen|forty[\s\-]five|\d{{2}}))?(?:\s*o'?clock)?()(?!\s*(?:people|persons|guests|of us))\b", 0.85),
+        (rf"\b{NUM}\s*o'?clock()()", 0.85),
+    ]
+    for pattern, confidence in rules:
+        for match in re.finditer(pattern, lowered):
+            hour = parse_number(match.group(1))
+            minute_token = (match.group(2) or "0").replace("-", " ")
+            minute = int(minute_token) if minute_token.isdigit() else {"thirty": 30, "fifteen": 15, "forty five": 45}.get(minute_token, 0)
+            meridiem = match.group(3) or None
+            if hour is None: continue
+            conf = confidence
+            if not meridiem and 1 <= hour <= 11:
+                # Restaurant convention: a bare "at 7" / "7:30" means the evening
+                meridiem = "am" if hour == 11 and not evening else "pm"
+                conf = min(conf, 0.85)
+            value = _to_24h(hour, minute, meridiem)
+            if not value: continue
+            result.set("time", value, conf)
+            text = _blank(text, match.span())
+            lowered = text.lower()
+
+    for pattern, value in [(r"\b(noon|midday|lunch ?time)\b", "12:00"), (r"\bmidnight\b", "00:00")]:
+        match = re.search(pattern, lowered)
+        if match:
+            result.set("time", value, 0.95)
+            text = _blank(text, match.span())
+            lowered = text.lower()
+
+    match = re.search(rf"\bhalf past {NUM}\b", lowered)
+    if match and parse_number(match.group(1)):
+        hour = parse_number(match.group(1))
+        value = _to_24h(hour, 30, "pm" if hour < 12 else None)
+        if value:  # "half past fifty" is no time: leave the field (and the number) alone
+            result.set("time", value, 0.85)
+            text = _blank(text, match.span())
+    return text
+
+def _next_weekday(today: date, weekday: int, strictly_after: bool) -> date:
+    days = (weekday - today.weekday()) % 7
+    if days == 0 and strictly_after: days = 7
+    return today + timedelta(days=days)
+
+def _extract_date(text: str, result: FastExtraction, today: date) -> str:
+    lowered = text.lower()
+
+    def take(match, value: date, confidence: float):
+        nonlocal text, lowered
+        result.set("date", value.isoformat(), confidence)
+        text = _blank(text, match.span())
+        lowered = text.lower()
+
+    for match in re.finditer(r"\b(\d{4})-(\d{2})-(\d{2})\b", lowered):
+        try: take(match, date(int(match.group(1)), int(match.group(2)), int(match.group(3))), 0.99)
+        except ValueError: pass
+
+    for pattern, offset in [(r"\bday after tomorrow\b", 2), (r"\btomorrow\b", 1), (r"\b(today|tonight)\b", 0)]:
+        match = re.search(pattern, lowered)
+        if match: take(match, today + timedelta(days=offset), 0.97)
+
+    match = re.search(rf"\bin {NUM} days?\b", lowered)
+    if match and parse_number(match.group(1)) is not None:
+        take(match, today + timedelta(days=parse_number(match.group(1))), 0.9)
+
+    weekday_pattern = r"\b(this|next|coming|on)?\s*(" + "|".join(WEEKDAYS) + r")\b"
+    for match in re.finditer(weekday_pattern, lowered):
+        qualifier = match.group(1)
+        value = _next_weekday(today, WEEKDAYS.index(match.group(2)), strictly_after=qualifier in ("next", "coming"))
+        take(match, value, 0.85 if qualifier == "next" else 0.93)
+
+    month_pattern = "|".join(sorted(MONTHS, key=len, reverse=True))
+    ordinal_pattern = "|".join(sorted(ORDINAL_WORDS, key=len, reverse=True))
+    day_pattern = rf"(\d{{1,2}}(?:st|nd|rd|th)?|{ordinal_pattern})"
+    for pattern, month_first in [
+        (rf"\b({month_pattern})\.?\s+(?:the\s+)?{day_pattern}\b", True),
+        (rf"\b(?:the\s+)?{day_pattern}\s+(?:of\s+)?({month_pattern})\b", False),
+    ]:
+        for match in re.finditer(pattern, lowered):
+            month_token, day_token = (match.group(1), match.group(2)) if month_first else (match.group(2), match.group(1))
+            day_num = ORDINAL_WORDS.get(day_token) or int(re.sub(r"\D", "", day_token) or 0)
+            try:
+                value = date(today.year, MONTHS[month_token], day_num)
+                if value < today: value = value.replace(year=today.year + 1)
+                take(match, value, 0.95)
+            except ValueError:
+                pass
+
+    # "on the 15th" -> this month, or next month if already past
+    match = re.search(r"\b(?:on\s+)?the\s+(\d{1,2})(?:st|nd|rd|th)\b", lowered)
+    if match:
+        day_num = int(match.group(1))
+        try:
+            value = today.replace(day=day_num)
+            if value < today:
+                value = (today.replace(day=1) + timedelta(days=32)).replace(day=day_num)
+            take(match, value, 0.88)
+        except ValueError:
+            pass
+    return text
+
+def _extract_party_size(text: str, result: FastExtraction) -> str:
+    lowered = text.lower()
+    rules = [
+        (rf"\b(?:table|reservation|booking|party|group|seats?)\s+(?:for|of)\s+(?:a\s+)?{NUM}\b", 0.96),
+        (rf"\b{NUM}\s+(?:people|persons|person|guests|adults|pax|of us)\b", 0.96),
+        (rf"\b(?:we are|we're|we'll be|there are|there will be|there'll be)\s+{NUM}\b", 0.92),
+        (rf"\bfor\s+{NUM}\b(?!\s*(?:am|pm|a\.m|p\.m|o'?clock|:))", 0.88),
+    ]
+    for pattern, confidence in rules:
+        for match in re.finditer(pattern, lowered):
+            size = parse_number(match.group(1))
+            if size is None or not 1 <= size <= 50: continue
+            result.set("party_size", size, confidence)
+            text = _blank(text, match.span())
+            lowered = text.lower()
+
+    for pattern, size in [(r"\bjust (?:me|myself)\b", 1), (r"\b(?:a couple|the two of us|me and my (?:wife|husband|partner|girlfriend|boyfriend|friend))\b", 2)]:
+        match = re.search(pattern, lowered)
+        if not match: continue
+        # "just me and one friend" / "just me plus two": the phrase alone no longer gives the count
+        companions = re.match(rf"\s*(?:,\s*)?(?:and|with|plus|\+)\b|.*\b{NUM}\b", lowered[match.end():])
+        if size == 1 and companions:
+            result.escalate_reasons.append("unclear party size")
+            continue
+        result.set("party_size", size, 0.9)
+        text = _blank(text, match.span())
+        lowered = text.lower()
+    return text
+
+def _extract_name(text: str, result: FastExtraction) -> str:
+    for match in NAME_TRIGGER.finditer(text):
+        trigger, first, last = match.group(1).lower(), match.group(2), match.group(3)
+        if first.lower() in NAME_STOPWORDS or first.lower() in NUMBER_WORDS: continue
+        if first.lower() in WEEKDAYS or first.lower() in MONTHS: continue
+        explicit = trigger in EXPLICIT_NAME_TRIGGERS
+        # "I'm John" is a name; "I'm starving" is not -> require a capital unless explicit
+        if not explicit and not first[0].isupper(): continue
+        # Spoken transcripts are often all lower-case: after "my name is" a second word is the surname
+        surname = last if last and (last[0].isupper() or explicit) and last.lower() not in NAME_STOPWORDS \
+            and last.lower() not in NUMBER_WORDS else None
+        name = first[0].upper() + first[1:] + (f" {surname[0].upper()}{surname[1:]}" if surname else "")
+        result.set("name", name, 0.95 if explicit else 0.88)
+        text = _blank(text, match.span())
+    return text
+
+# ==================== ENGINE ====================
+def fast_extract(message: str, today: Optional[date] = None) -> FastExtraction:
+    """
+    Deterministic extraction of phone / party size / date / time / name.
+    Returns values in the same shape as the LLM extractor plus per-field
+    confidence and the reasons (if any) the turn should be escalated.
+    """
+    today = today or datetime.now().date()
+    result = FastExtraction()
+    text = message or ""
+
+    if SPECIAL_REQUEST_HINTS.search(text):
+        result.escalate_reasons.append("special request")
+    if CORRECTION_HINTS.search(text):
+        result.escalate_reasons.append("correction")
+
+    text = _extract_phone(text, result)
+    text = _extract_time(text, result)
+    text = _extract_date(text, result, today)
+    text = _extract_party_size(text, result)
+    text = _extract_name(text, result)
+
+    # Anything number-like we could not explain means we probably misread the turn
+    leftover_numbers = re.findall(rf"\d+|\b(?:{_NUM_WORD_PATTERN})\b", text, re.I)
+    leftover_numbers = [n for n in leftover_numbers if n.lower() not in ("one", "oh")]
+    if leftover_numbers:
+        result.escalate_reasons.append(f"unexplained numbers {leftover_numbers}")
+
+    # Nothing found: only trust that for short chit-chat with no possible name in it
+    if not result.confidence:
+        words = re.findall(r"[A-Za-z']+", text)
+        if len(words) <= 3:
+            # Bare replies ("anil", "anil sharma") are names whatever the case typed input arrives in
+            unknown = [w for w in words if w.lower() not in NAME_STOPWORDS and w.lower() not in CHITCHAT_WORDS]
+        else:
+            # Sentence-initial capitals don't count in longer turns
+            unknown = [
+                w for w in words[1:]
+                if w[0].isupper() and w not in PRONOUN_FORMS and w.lower() not in NAME_STOPWORDS and w.lower() not in WEEKDAYS
+            ]
+        if len(words) > 6 or unknown:
+            result.escalate_reasons.append("no fields found")
+
+    return result
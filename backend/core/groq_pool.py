@@ -0,0 +1,261 @@
+import os
+import re
+import time
+import asyncio
+from collections import defaultdict, deque
+from typing import Any, Awaitable, Callable, List, Optional
+
+import openai
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+from core.metrics import metrics
+from core.rate_limiter import rate_limiter, Lane
+from core.turn_context import current_turn
+
+# ==================== CONFIG ====================
+GROQ_BASE_URL = "https://api.groq.com/openai/v1"
+GROQ_KEY_COUNT = 5                                                       # GROQ_API_KEY_1..5
+GROQ_HEDGE = os.environ.get("GROQ_HEDGE", "1") == "1"
+GROQ_HEDGE_PERCENTILE = float(os.environ.get("GROQ_HEDGE_PERCENTILE", "90"))  # Hedge calls slower than p90
+GROQ_HEDGE_MIN_MS = float(os.environ.get("GROQ_HEDGE_MIN_MS", "300"))
+GROQ_HEDGE_MIN_SAMPLES = 20   # Until then latencies are too noisy to hedge on
+CIRCUIT_FAILURES = 3          # Consecutive 5xx/connection errors before a key is taken out
+CIRCUIT_OPEN_S = 30.0         # First cool-down; doubles on every re-trip (max 5 min)
+EWMA_ALPHA = 0.2
+PRIOR_LATENCY_MS = 500.0      # Unused keys look average, so they get tried
+MODEL_CLASS = {"tts": "tts", "stt": "stt"}  # Rate-limit bucket per call kind; everything else is "llm"
+
+def parse_reset(value: Optional[str]) -> Optional[float]:
+    """Groq reset headers: '7.66s', '2m59.56s', '120ms', or plain seconds (retry-after)."""
+    if not value: return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    total = 0.0
+    for amount, unit in re.findall(r"([\d.]+)(ms|h|m|s)", value):
+        total += float(amount) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unit]
+    return total
+
+class KeyState:
+    """Health of one API key: latency, remaining quota (from response headers), circuit breaker."""
+
+    def __init__(self, index: int, api_key: str):
+        self.index = index
+        self.name = f"key{index + 1}"
+        self.ewma_ms = PRIOR_LATENCY_MS
+        self.inflight = 0
+        self.remaining = {"requests": None, "tokens": None}
+        self.limit = {"requests": None, "tokens": None}
+        self.exhausted_until = 0.0   # 429 / zero remaining quota: skip until reset
+        self.failures = 0
+        self.open_until = 0.0        # Circuit breaker
+        self.open_s = CIRCUIT_OPEN_S
+        self.client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=GROQ_BASE_URL,
+            max_retries=0,  # Retries go to another key, not the same one
+            http_client=DefaultAsyncHttpxClient(event_hooks={"response": [self._read_headers]}),
+        )
+
+    async def _read_headers(self, response):
+        headers = response.headers
+        for kind in ("requests", "tokens"):
+            remaining, limit = headers.get(f"x-ratelimit-remaining-{kind}"), headers.get(f"x-ratelimit-limit-{kind}")
+            if remaining is not None: self.remaining[kind] = int(float(remaining))
+            if limit is not None: self.limit[kind] = int(float(limit))
+            if self.remaining[kind] == 0:
+                reset = parse_reset(headers.get(f"x-ratelimit-reset-{kind}")) or 1.0
+                self.exhausted_until = max(self.exhausted_until, time.monotonic() + reset)
+        if response.status_code == 429:
+            retry = parse_reset(headers.get("retry-after")) or parse_reset(headers.get("x-ratelimit-reset-tokens")) or 5.0
+            self.exhausted_until = max(self.exhausted_until, time.monotonic() + retry)
+
+    @property
+    def headroom(self) -> float:
+        """Fraction of the tighter quota left (1.0 until the first headers arrive)."""
+        fractions = [self.remaining[k] / self.limit[k] for k in self.remaining if self.remaining[k] is not None and self.limit[k]]
+        return min(fractions, default=1.0)
+
+    def available(self, now: float) -> bool:
+        return now >= self.open_until and now >= self.exhausted_until
+
+    def score(self) -> float:
+        # Lower is better: fast, idle keys with quota left
+        return self.ewma_ms * (1 + self.inflight) / max(self.headroom, 0.05)
+
+    def record_success(self, elapsed_ms: float):
+        self.ewma_ms += EWMA_ALPHA * (elapsed_ms - self.ewma_ms)
+        self.failures = 0
+        self.open_s = CIRCUIT_OPEN_S
+
+    def record_failure(self, now: float) -> bool:
+        """True if this failure tripped the circuit breaker."""
+        self.failures += 1
+        if self.failures < CIRCUIT_FAILURES:
+            return False
+        self.open_until = now + self.open_s
+        self.open_s = min(self.open_s * 2, 300.0)
+        self.failures = CIRCUIT_FAILURES - 1  # Half-open: one more failure re-trips it
+        return True
+
+def _is_key_problem(error: Exception) -> bool:
+    """429/5xx/network errors say something about the key or the route; 4xx are the request's fault."""
+    if isinstance(error, (openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+async def _discard(result: Any):
+    """Release a losing hedge's stream/connection."""
+    for name in ("aclose", "close"):
+        closer = getattr(result, name, None)
+        if closer:
+            try:
+                outcome = closer()
+                if asyncio.iscoroutine(outcome): await outcome
+            except Exception:
+                pass
+            return
+
+class GroqPool:
+    """
+    All Groq keys behind one call() that picks the healthiest key per request:
+    remaining quota (x-ratelimit-* headers), EWMA latency and in-flight load.
+    Keys returning 429 sit out until their quota resets; keys failing with 5xx
+    are circuit-broken. Calls slower than the observed p90 for their kind are
+    hedged on a second key; the first answer wins and the other is cancelled.
+    """
+
+    def __init__(self, api_keys: List[str]):
+        self.keys = [KeyState(i, key) for i, key in enumerate(api_keys)]
+        if not self.keys:
+            raise ValueError("No Groq API keys found!")
+        self.latencies = defaultdict(lambda: deque(maxlen=256))  # kind -> recent latencies (ms)
+
+    @property
+    def clients(self) -> List[AsyncOpenAI]:
+        return [k.client for k in self.keys]
+
+    def pick(self, exclude=(), model: str = "llm", cost: float = 0) -> Optional[KeyState]:
+        now = time.monotonic()
+        candidates = [k for k in self.keys if k not in exclude and k.available(now)]
+        if not candidates:
+            # Everything is cooling down: least-bad key rather than failing outright
+            candidates = [k for k in self.keys if k not in exclude]
+            if not candidates: return None
+            return min(candidates, key=lambda k: max(k.open_until, k.exhausted_until))
+        # Time we'd queue for local budget on a key counts like latency
+        return min(candidates, key=lambda k: k.score() + 1000 * rate_limiter.wait_time(k.name, model, cost))
+
+    def hedge_delay(self, kind: str) -> Optional[float]:
+        samples = self.latencies[kind]
+        if not GROQ_HEDGE or len(self.keys) < 2 or len(samples) < GROQ_HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        p = ordered[min(len(ordered) - 1, int(GROQ_HEDGE_PERCENTILE / 100 * len(ordered)))]
+        delay = max(p, GROQ_HEDGE_MIN_MS) / 1000
+        turn = current_turn.get()
+        if turn:
+            # Tight turn budget: hedge early enough for the backup to still make the deadline
+            delay = min(delay, max(turn.remaining() / 2, GROQ_HEDGE_MIN_MS / 1000))
+        return delay
+
+    async def _attempt(self, key: KeyState, op: Callable[[AsyncOpenAI], Awaitable[Any]], kind: str, budget: tuple):
+        model, cost, lane, deadline = budget
+        if cost:
+            await rate_limiter.acquire(key.name, model, cost, lane, deadline)
+        key.inflight += 1
+        started = time.perf_counter()
+        try:
+            result = await op(key.client)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if _is_key_problem(e):
+                metrics.incr(f"groq_pool.{key.name}.errors")
+                if not isinstance(e, openai.RateLimitError) and key.record_failure(time.monotonic()):
+                    metrics.incr("groq_pool.circuit_opened")
+                    print(f"⚠️ Groq {key.name} circuit open for {key.open_until - time.monotonic():.0f}s: {e}")
+            raise
+        finally:
+            key.inflight -= 1
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        key.record_success(elapsed_ms)
+        self.latencies[kind].append(elapsed_ms)
+        metrics.observe(f"groq_pool.{kind}_ms", elapsed_ms)
+        metrics.gauge(f"groq_pool.{key.name}.ewma_ms", round(key.ewma_ms, 1))
+        metrics.gauge(f"groq_pool.{key.name}.headroom", round(key.headroom, 3))
+        return result
+
+    async def call(self, op: Callable[[AsyncOpenAI], Awaitable[Any]], kind: str = "chat", hedge: bool = True, attempts: int = 2,
+                   cost: Optional[float] = None, lane: Lane = Lane.DIALOGUE, deadline: Optional[float] = None):
+        """
+        Run op(client) on the best key. op must be safe to run twice (hedging):
+        every Groq call we make is a read. Key-level failures fail over to the
+        next best key, up to `attempts` keys; request errors (4xx) are raised as-is.
+        `cost` (estimated tokens; STT counts requests) is reserved on the key's
+        rate-limit bucket first, waiting in `lane` until `deadline` at most
+        (RateLimitTimeout after that). Inside a turn the deadline defaults to the turn's.
+        """
+        model = MODEL_CLASS.get(kind, "llm")
+        if deadline is None and current_turn.get():
+            deadline = current_turn.get().deadline  # Never queue for budget past the turn's deadline
+        budget = (model, 1 if cost is None and model == "stt" else cost or 0, lane, deadline)
+        tried, last_error = [], None
+        for _ in range(min(attempts, len(self.keys))):
+            key = self.pick(exclude=tried, model=model, cost=budget[1])
+            if key is None: break
+            tried.append(key)
+            try:
+                return await self._hedged(key, op, kind, tried, budget) if hedge else await self._attempt(key, op, kind, budget)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if not _is_key_problem(e):
+                    raise
+                last_error = e
+                metrics.incr("groq_pool.failovers")
+        raise last_error or RuntimeError("No Groq key available")
+
+    async def _hedged(self, key: KeyState, op, kind: str, tried: list, budget: tuple):
+        delay = self.hedge_delay(kind)
+        if delay is None:
+            return await self._attempt(key, op, kind, budget)
+        tasks = [asyncio.create_task(self._attempt(key, op, kind, budget))]
+        winner = None
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            model, cost = budget[:2]
+            backup_key = None if done else self.pick(exclude=tried, model=model, cost=cost)
+            # A hedge is only worth it if it doesn't have to queue for budget itself
+            if backup_key is not None and rate_limiter.wait_time(backup_key.name, model, cost) == 0:
+                tried.append(backup_key)
+                metrics.incr("groq_pool.hedges")
+                tasks.append(asyncio.create_task(self._attempt(backup_key, op, kind, budget)))
+            pending, error = set(tasks), None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        winner = task
+                        if task is not tasks[0]: metrics.incr("groq_pool.hedge_wins")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            losers = [task for task in tasks if task is not winner]
+            for task in losers: task.cancel()
+            # Losers' errors are collected, not raised; our own cancellation still propagates
+            for outcome in await asyncio.gather(*losers, return_exceptions=True):
+                if not isinstance(outcome, BaseException):
+                    await _discard(outcome)  # Loser that finished before the cancel landed
+
+_pool: Optional[GroqPool] = None
+
+def get_groq_pool() -> GroqPool:
+    """Process-wide pool over GROQ_API_KEY_1..5 (shared health/quota state for every module)."""
+    global _pool
+    if _pool is None:
+        keys = [os.environ.get(f"GROQ_API_KEY_{i}") for i in range(1, GROQ_KEY_COUNT + 1)]
+        _pool = GroqPool([k for k in keys if k])
+    return _pool
@@ -1,18 +1,26 @@
-
 import os
 import json
 import re
 import asyncio
-from openai import AsyncOpenAI
-from gtts import gTTS
-import io
+import contextvars
 import time
-from collections import deque
-from typing import Optional, Dict, AsyncGenerator
+from typing import Optional, Dict, AsyncGenerator, Callable
 from datetime import datetime, date
 from dotenv import load_dotenv
+from langdetect import detect_langs, DetectorFactory, LangDetectException
 
 from core.database import BookingManager, SessionManager
+from core.session_store import session_store
+from core.fast_extractor import fast_extract
+from core.metrics import metrics
+from core.phrase_cache import PHRASES
+from core.speech_synthesis import get_speech_from_text, read_audio
+from core.vad import trim_wav
+from core.response_templates import render_template_response
+from core.groq_pool import get_groq_pool
+from core.rate_limiter import Lane, estimate_tokens
+from core.turn_context import TurnContext, current_turn, use_turn, within_budget
+from core.model_cascade import run_cascade, pool_kind, MODEL_TIERS
 
 load_dotenv()
 
@@ -71,6 +79,11 @@ Remember: You're not filling out a form. You're helping a guest feel excited abo
 BOOKING_FLOW = ["name", "phone", "party_size", "date", "time"]
 MAX_RETRIES_PER_FIELD = 3
 
+# Generate the (predicted) reply in parallel with LLM extraction. Costs tokens on misses.
+SPECULATIVE_RESPONSES = os.environ.get("RIYA_SPECULATIVE_RESPONSES", "0") == "1"
+# Routine asks/confirmations are rendered from templates; the LLM only handles off-script turns
+TEMPLATE_RESPONSES = os.environ.get("RIYA_TEMPLATE_RESPONSES", "1") == "1"
+
 # ==================== LOGGER ====================
 def log_debug(stage: str, message: str, data: any = None):
     print(f"\n[{datetime.now().strftime('%H:%M:%S')}] 🛠️  {stage.upper()}")
@@ -100,56 +113,108 @@ def is_valid_phone(phone_str: str) -> bool:
     
     return True
 
-# ==================== RATE LIMITER ====================
-class TokenTracker:
-    def __init__(self, max_tokens_per_minute=1000):
-        self.max_tokens_per_minute = max_tokens_per_minute
-        self.requests = deque()
-    
-    def estimate_tokens(self, text: str) -> int:
-        clean_text = re.sub(r'\s+', ' ', text.strip())
-        return int(len(clean_text) / 4) + 20
-    
-    def can_make_request(self, text: str) -> tuple[bool, int]:
-        current_time = time.time()
-        estimated_tokens = self.estimate_tokens(text)
-        while self.requests and current_time - self.requests[0][0] > 60:
-            self.requests.popleft()
-        tokens_used = sum(tokens for _, tokens in self.requests)
-        if tokens_used + estimated_tokens > self.max_tokens_per_minute:
-            return False, tokens_used
-        return True, tokens_used
-    
-    def record_request(self, text: str):
-        current_time = time.time()
-        estimated_tokens = self.estimate_tokens(text)
-        self.requests.append((current_time, estimated_tokens))
+# ==================== RATE LIMITING ====================
+# Budgets live in core/rate_limiter.py (per key, per model class); this maps turns to priority lanes
+INTENT_LANES = {
+    "confirm_booking": Lane.CONFIRMATION,
+    "force_complete": Lane.CONFIRMATION,
+    "unavailable": Lane.CONFIRMATION,
+}
+
+def lane_for_intent(intent: str) -> Lane:
+    return INTENT_LANES.get(intent, Lane.DIALOGUE)
+
+# ==================== OUTPUT VALIDATION (MODEL CASCADE) ====================
+# Routine turns go to a small model first (core/model_cascade.py); these checks decide
+# whether its output is good enough or the turn escalates to the large model.
+DetectorFactory.seed = 0  # langdetect is random otherwise
+EXTRACT_FIELDS = ("phone", "name", "party_size", "date", "time", "special_requests")
+REPLY_MAX_CHARS = 300
+PROMPT_LEAK = re.compile(r"\b(intent|collected|json|as an ai|conversation state)\b", re.IGNORECASE)
+
+def is_english(text: str) -> bool:
+    letters = [c for c in text if c.isalpha()]
+    if letters and sum(not c.isascii() for c in letters) / len(letters) > 0.2:
+        return False  # Devanagari etc.
+    if len(text.split()) < 6:
+        return True   # langdetect is unreliable on a few words
+    try:
+        top = detect_langs(text)[0]
+    except LangDetectException:
+        return True
+    return top.lang == "en" or top.prob < 0.9
+
+def extraction_problem(data) -> Optional[str]:
+    """None if the extractor's JSON is usable, else why not."""
+    if not isinstance(data, dict): return "not a JSON object"
+    missing = [f for f in EXTRACT_FIELDS if f not in data]
+    if missing: return f"missing fields {missing}"
+    size = data.get("party_size")
+    if size is not None and (isinstance(size, bool) or not str(size).isdigit() or not 0 < int(size) <= 50):
+        return f"bad party_size {size!r}"
+    if data.get("date") is not None:
+        try:
+            datetime.strptime(str(data["date"]), "%Y-%m-%d")
+        except ValueError:
+            return f"bad date {data['date']!r}"
+    if data.get("time") is not None and not re.fullmatch(r"([01]\d|2[0-3]):[0-5]\d", str(data["time"])):
+        return f"bad time {data['time']!r}"
+    if data.get("phone") and not is_valid_phone(str(data["phone"])):
+        return f"bad phone {data['phone']!r}"
+    return None
+
+def reply_problem(text: str, intent: str, collected_data: Dict) -> Optional[str]:
+    """None if Riya's reply can be spoken as-is, else why not."""
+    if not text: return "empty"
+    if len(text) > REPLY_MAX_CHARS: return "too long"
+    if not is_english(text): return "not English"
+    if PROMPT_LEAK.search(text): return "prompt leak"
+    if intent.startswith("ask_") and "?" not in text: return "asks nothing"
+    if "confirm" in intent or intent == "force_complete":
+        details = [str(collected_data[f]) for f in ("name", "party_size") if collected_data.get(f)]
+        missing = [d for d in details if d.lower() not in text.lower()]
+        if missing: return f"missing details {missing}"
+    return None
 
 # ==================== INITIALIZATION ====================
 try:
     log_debug("INIT", "Loading Riya (Hospitality AI Services)...")
     
-    groq_api_keys = [os.environ.get(f"GROQ_API_KEY_{i}") for i in range(1, 6)]
-    valid_keys = [k for k in groq_api_keys if k]
-    if not valid_keys: raise ValueError("No Groq API keys found!")
-
-    groq_clients = [
-        AsyncOpenAI(api_key=key, base_url="https://api.groq.com/openai/v1")
-        for key in valid_keys
-    ]
-    main_client = groq_clients[0]
-    token_tracker = TokenTracker()
+    # Every chat/STT/TTS call is spread over all keys by health and remaining quota
+    groq_pool = get_groq_pool()
+    groq_clients = groq_pool.clients
     log_debug("INIT", f"✅ Riya is online. Connected to {len(groq_clients)} Groq Clients.")
     
 except Exception as e:
     log_debug("INIT_ERROR", str(e))
-    main_client = groq_clients = token_tracker = None
+    groq_pool = groq_clients = None
 
 # ==================== AI EXTRACTION ====================
 async def extract_booking_data(message: str) -> Dict:
-    """Uses Llama-3 to extract structured JSON from user message."""
+    """
+    Rule-based fast path first; only escalates to the LLM extractor when the
+    rules are unsure (low confidence, conflicting values, special requests).
+    """
+    start = time.perf_counter()
+    fast = fast_extract(message)
+
+    if fast.is_confident:
+        metrics.incr("extractor.path.fast")
+        metrics.observe("extractor.fast_ms", (time.perf_counter() - start) * 1000)
+        log_debug("EXTRACTOR_FAST", f"Rule path (confidence {fast.score:.2f})", fast.data)
+        return fast.data
+
+    log_debug("EXTRACTOR_ESCALATE", f"Confidence {fast.score:.2f} | {fast.escalate_reasons or 'low confidence'}")
+    metrics.incr("extractor.path.llm")
+    # LLM down or over its turn budget -> best-effort rules
+    data = await within_budget("extract", llm_extract_booking_data(message)) or fast.data
+    metrics.observe("extractor.llm_ms", (time.perf_counter() - start) * 1000)
+    return data
+
+async def llm_extract_booking_data(message: str, today: Optional[date] = None) -> Dict:
+    """Extracts structured JSON from the user message (small model first, see core/model_cascade.py)."""
     log_debug("EXTRACTOR", "Starting Extraction...", message)
-    today = datetime.now().strftime("%Y-%m-%d")
+    today = (today or datetime.now().date()).strftime("%Y-%m-%d")
     
     system_prompt = f"""
 You are a Data Extractor API for a restaurant booking system. Today's date is {today}.
@@ -185,9 +250,11 @@ Output: {{"phone": "919876543210", "name": null, "party_size": null, "date": nul
 
 Now extract from the user's message.
 """
-    try:
-        completion = await main_client.chat.completions.create(
-            model="openai/gpt-oss-120b",
+    prompt_tokens = estimate_tokens(system_prompt + message)
+
+    async def attempt(model: str, final: bool) -> Dict:
+        completion = await groq_pool.call(lambda client: client.chat.completions.create(
+            model=model,
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": message}
@@ -195,9 +262,14 @@ Now extract from the user's message.
             temperature=0.1,
             max_tokens=250,
             response_format={"type": "json_object"}
-        )
-        content = completion.choices[0].message.content
-        data = json.loads(content)
+        ), kind=pool_kind("extract", model), cost=prompt_tokens + 250)
+        return json.loads(completion.choices[0].message.content)  # Bad JSON escalates
+
+    try:
+        # Small model first; bad JSON, missing fields or malformed values escalate
+        data = await run_cascade("extract", "default", attempt, extraction_problem, prompt_tokens)
+        if not isinstance(data, dict):
+            return {}
         
         # 🔥 CRITICAL: Validate phone before accepting
         if data.get('phone') and not is_valid_phone(data['phone']):
@@ -211,66 +283,9 @@ Now extract from the user's message.
         return {}
 
 # ==================== AI RESPONSE GENERATION ====================
-async def generate_riya_response(intent: str, collected_data: Dict, last_user_text: str = '') -> str:
-    """Generates natural spoken response using Riya's persona."""
-    log_debug("GENERATOR", f"Generating response for intent: {intent}", collected_data)
-    
-    history_list = collected_data.get('history', [])
-    recent_history = history_list[-6:]
-    history_str = "\n".join(recent_history) if recent_history else "No previous context."
-
-    prompt = f"""
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-📞 CONVERSATION STATE
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-**Recent Conversation:**
-{history_str}
-
-**What the caller just said:**
-"{last_user_text}"
-
-**Current Goal (Intent):**
-{intent}
-
-**Information Collected So Far:**
-{json.dumps(collected_data, indent=2)}
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-🎯 YOUR TASK
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-Generate a natural, spoken response based on the current intent.
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-📋 INTENT-SPECIFIC BEHAVIORS
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-**welcome**
-→ "Hi! Thanks for calling The Guru's Kitchen. This is Riya. Who am I speaking with?"
-
-**ask_name**
-→ "Perfect! And who should I put this reservation under?"
-
-**ask_phone**
-→ "Great! And what's the best number to reach you at?"
-
-**ask_party_size**
-→ "Got it! How many people will be joining you?"
-
-**ask_date**
-→ "Awesome! What date were you thinking?"
-
-**ask_time**
-→ "Perfect! What time works best for you?"
-
-**confirm_booking**
-→ "Amazing! You're all set—table for [party_size] on [date] at [time] under [name]. We can't wait to see you!"
-
-**unavailable**
-→ "Oh, that time's fully booked. Would another time work for you?"
-
-**force_complete**
-→ "Perfect! Let me finalize your reservation with the details we have. You're booked for [party_size] people on [date] at [time] under [name]. We'll see you then!"
-
+# The system message is byte-identical on every turn and comes first, so the provider's
+# prefix cache can reuse it; everything per-turn goes into a short user message after it.
+RIYA_RULES = """
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 ⚡ CRITICAL RULES
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -278,44 +293,318 @@ Generate a natural, spoken response based on the current intent.
 2. **Keep it SHORT**: 1-2 sentences max.
 3. **NO EMOJIS** in your response.
 4. **Don't repeat yourself**. If they already gave you info, don't ask for it again.
-
-Now generate your response:
+5. Each turn gives you the goal, an example line for it, the booking so far and the recent conversation. Reply with Riya's spoken words only.
 """
-    
-    try:
-        completion = await main_client.chat.completions.create(
-            model="moonshotai/kimi-k2-instruct-0905",
-            messages=[
-                {"role": "system", "content": RIYA_SYSTEM_PROMPT},
-                {"role": "user", "content": prompt}
-            ],
+RIYA_STATIC_PREFIX = RIYA_SYSTEM_PROMPT + RIYA_RULES
+
+# Only the current intent's line is sent
+INTENT_BEHAVIOURS = {
+    "welcome": "Hi! Thanks for calling The Guru's Kitchen. This is Riya. Who am I speaking with?",
+    "ask_name": "Perfect! And who should I put this reservation under?",
+    "ask_phone": "Great! And what's the best number to reach you at?",
+    "ask_party_size": "Got it! How many people will be joining you?",
+    "ask_date": "Awesome! What date were you thinking?",
+    "ask_time": "Perfect! What time works best for you?",
+    "confirm_booking": "Amazing! You're all set—table for [party_size] on [date] at [time] under [name]. We can't wait to see you!",
+    "unavailable": "Oh, that time's fully booked. Would another time work for you?",
+    "force_complete": "Perfect! Let me finalize your reservation with the details we have. You're booked for [party_size] people on [date] at [time] under [name]. We'll see you then!",
+}
+
+PROMPT_STATE_FIELDS = ("name", "phone", "party_size", "date", "time", "special_requests")  # No history/retry counters
+PROMPT_HISTORY_LINES = 6
+PROMPT_TOKEN_BUDGET = int(os.environ.get("RIYA_PROMPT_TOKEN_BUDGET", "800"))  # System + user message
+STATIC_PREFIX_TOKENS = estimate_tokens(RIYA_STATIC_PREFIX)
+
+def build_riya_prompt(intent: str, collected_data: Dict, last_user_text: str = '') -> str:
+    """
+    Per-turn user message: the intent's behaviour line, the filled booking fields as
+    compact JSON and as much recent conversation (newest first) as the token budget allows.
+    """
+    state = {f: collected_data[f] for f in PROMPT_STATE_FIELDS if collected_data.get(f) not in (None, "")}
+    head = f"Goal: {intent}"
+    if intent in INTENT_BEHAVIOURS:
+        head += f"\nExample: {INTENT_BEHAVIOURS[intent]}"
+    head += f"\nBooking so far: {json.dumps(state, separators=(',', ':'), ensure_ascii=False, default=str)}"
+    tail = f'Caller just said: "{last_user_text}"\nNow generate your response:'
+
+    history = collected_data.get('history', [])[-PROMPT_HISTORY_LINES:]
+    if history and history[-1] == f"Caller: {last_user_text}":
+        history = history[:-1]  # Quoted in the tail already
+    room = PROMPT_TOKEN_BUDGET - STATIC_PREFIX_TOKENS - estimate_tokens(head + tail)
+    kept = []
+    for line in reversed(history):
+        room -= len(line) // 4 + 1
+        if room < 0: break
+        kept.append(line)
+    if len(kept) < len(history):
+        metrics.incr("generator.prompt_history_trimmed")
+
+    parts = [head]
+    if kept:
+        parts.append("Recent conversation:\n" + "\n".join(reversed(kept)))
+    parts.append(tail)
+    return "\n".join(parts)
+
+def build_riya_messages(intent: str, collected_data: Dict, last_user_text: str = '') -> tuple[list, int]:
+    """Chat messages for one Riya turn, plus their estimated prompt tokens."""
+    prompt = build_riya_prompt(intent, collected_data, last_user_text)
+    messages = [
+        {"role": "system", "content": RIYA_STATIC_PREFIX},
+        {"role": "user", "content": prompt}
+    ]
+    return messages, STATIC_PREFIX_TOKENS + estimate_tokens(prompt)
+
+async def generate_riya_response(
+    intent: str,
+    collected_data: Dict,
+    last_user_text: str = '',
+    on_clause: Optional[Callable[[str], None]] = None,
+    extracted: Optional[Dict] = None,
+    lane: Optional[Lane] = None
+) -> str:
+    """
+    Generates natural spoken response using Riya's persona.
+    With `on_clause`, tokens are streamed and every finished clause is handed
+    over immediately (for TTS) while the rest is still being generated.
+    `extracted` (fields the caller gave this turn) lets on-script turns skip the LLM.
+    `lane` orders this call against others when the rate limit is contended.
+    The model comes from the cascade route for `intent` (core/model_cascade.py):
+    a fast model whose reply is checked by reply_problem(), then the large one.
+    """
+    log_debug("GENERATOR", f"Generating response for intent: {intent}", collected_data)
+
+    if TEMPLATE_RESPONSES:
+        templated = render_template_response(intent, collected_data, extracted, last_user_text)
+        if templated:
+            metrics.incr("generator.template")
+            log_debug("GENERATOR_TEMPLATE", f"Rendered: {templated}")
+            if on_clause:
+                segmenter = ClauseSegmenter()
+                for clause in segmenter.feed(templated) + segmenter.flush():
+                    on_clause(clause)
+            return templated
+    metrics.incr("generator.llm")
+    messages, prompt_tokens = build_riya_messages(intent, collected_data, last_user_text)
+    _record_prompt_tokens(prompt_tokens)
+
+    lane = lane if lane is not None else lane_for_intent(intent)
+    cost = prompt_tokens + 150
+    said = []
+    started, tier = time.perf_counter(), {}
+
+    def speak(clause: str):
+        if not said:
+            # Fast tier is checked before it's spoken, so escalations pay its whole latency first
+            metrics.observe(f"generator.first_clause_ms.{tier.get('name', 'large')}", (time.perf_counter() - started) * 1000)
+        said.append(clause)
+        on_clause(clause)
+
+    async def attempt(model: str, final: bool) -> str:
+        tier["name"] = MODEL_TIERS.get(model, "large")
+        if on_clause and final:
+            # Nothing left to escalate to: stream it straight to TTS
+            return await _stream_riya_completion(messages, speak, cost, lane, model)
+        # Fast tier is buffered (a short reply takes it ~200 ms) so it can be checked before it's spoken
+        completion = await groq_pool.call(lambda client: client.chat.completions.create(
+            model=model,
+            messages=messages,
             temperature=0.7,
             max_tokens=150
-        )
-        response = completion.choices[0].message.content.strip()
+        ), kind=pool_kind("generate", model), cost=cost, lane=lane)
+        return (completion.choices[0].message.content or "").replace('"', '').replace('*', '').strip()
+
+    try:
+        response = await within_budget("generate", run_cascade(
+            "generate", intent, attempt,
+            lambda text: reply_problem(text, intent, collected_data),
+            prompt_tokens,
+        ))
+        if response and on_clause and not said:
+            segmenter = ClauseSegmenter()
+            for clause in segmenter.feed(response) + segmenter.flush():
+                speak(clause)
+
+        if response is None:
+            # Out of turn budget: keep what was already spoken, else an on-script line
+            response = " ".join(said) or render_template_response(intent, collected_data, extracted, last_user_text) or _stock_response(intent)
+            log_debug("GENERATOR_DEGRADED", f"Over budget, using: {response}")
+            if on_clause and not said: on_clause(response)
+            return response
         response = response.replace('"', '').replace('*', '').strip()
         
         if not response:
-            if "confirm" in intent: return "Thank you! Your booking is confirmed."
-            if "welcome" in intent: return "Hi! Thanks for calling The Guru's Kitchen. This is Riya."
-            return "I'm sorry, I didn't catch that."
+            response = _stock_response(intent)
+            if on_clause: on_clause(response)
+            return response
         
         log_debug("GENERATOR_SUCCESS", f"Generated: {response}")
         return response
         
     except Exception as e:
         log_debug("GENERATOR_ERROR", str(e))
-        return "I'm sorry, I'm having trouble thinking right now."
+        response = PHRASES["generator_error"]
+        if on_clause: on_clause(response)
+        return response
+
+def _record_prompt_tokens(prompt_tokens: int):
+    """Prompt size per turn (bench_prompt.py compares it against the previous prompt format)."""
+    metrics.observe("generator.prompt_tokens", prompt_tokens)
+    metrics.incr("generator.prompt_tokens_total", prompt_tokens)
+
+def _stock_response(intent: str) -> str:
+    if "confirm" in intent: return PHRASES["booking_confirmed"]
+    if "welcome" in intent: return PHRASES["short_greeting"]
+    return PHRASES["didnt_catch"]
+
+async def _stream_riya_completion(messages: list, on_clause: Callable[[str], None], cost: int, lane: Lane, model: str) -> str:
+    """Streams the reply, cutting clauses out of the token stream as soon as they complete."""
+    # Returns once the stream is open, so a hedge only races the time to first byte
+    stream = await groq_pool.call(lambda client: client.chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=0.7,
+        max_tokens=150,
+        stream=True
+    ), kind=pool_kind("generate_stream", model), cost=cost, lane=lane)
+    segmenter = ClauseSegmenter()
+    parts = []
+    try:
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if not delta: continue
+            delta = delta.replace('"', '').replace('*', '')
+            parts.append(delta)
+            for clause in segmenter.feed(delta):
+                on_clause(clause)
+    except asyncio.CancelledError:
+        # Barge-in: hang up on the completion instead of paying for tokens nobody will hear
+        metrics.incr("turn.cancelled_llm_streams")
+        await stream.close()
+        raise
+    for clause in segmenter.flush():
+        on_clause(clause)
+    return "".join(parts).strip()
+
+# ==================== STREAMING SPEECH PIPELINE ====================
+class ClauseSegmenter:
+    """Cuts an LLM token stream into speakable clauses."""
+    SENTENCE_END = re.compile(r'[.!?]+[)\]\'"]*\s+')
+    CLAUSE_END = re.compile(r'[,;:\u2014]\s+')
+
+    def __init__(self, min_sentence_chars: int = 2, min_clause_chars: int = 40):
+        self.buffer = ""
+        self.min_sentence_chars = min_sentence_chars
+        self.min_clause_chars = min_clause_chars  # Only split on commas in long sentences
+
+    def feed(self, delta: str) -> list:
+        self.buffer += delta
+        clauses = []
+        while True:
+            cut = self._find_cut()
+            if cut is None: break
+            clause, self.buffer = self.buffer[:cut].strip(), self.buffer[cut:]
+            if clause: clauses.append(clause)
+        return clauses
+
+    def flush(self) -> list:
+        clause, self.buffer = self.buffer.strip(), ""
+        return [clause] if clause else []
+
+    def _find_cut(self):
+        for match in self.SENTENCE_END.finditer(self.buffer):
+            if match.start() >= self.min_sentence_chars: return match.end()
+        for match in self.CLAUSE_END.finditer(self.buffer):
+            if match.start() >= self.min_clause_chars: return match.end()
+        return None
+
+class SpeechPipeline:
+    """
+    Clause-level TTS. Every clause is sent to TTS the moment it is said, so
+    synthesis of later clauses overlaps with sending audio for earlier ones;
+    `audio()` yields one complete WAV per clause, strictly in order.
+    """
+
+    def __init__(self, audio_format: str = "wav"):
+        self.started = time.perf_counter()
+        self.audio_format = audio_format  # Negotiated codec (see core/audio_codec.py)
+        self.lane = Lane.DIALOGUE         # Raised to CONFIRMATION once the turn's intent is known
+        self.turn = TurnContext()         # Deadline budget, from end of utterance to the last clause
+        self.spoken = []
+        self.cancelled = False
+        self._tasks = []   # One TTS task per clause, in order
+        self._sent = 0     # Clauses already handed to the caller
+        self._pending = asyncio.Queue()
+
+    def say(self, clause: str):
+        clause = clause.strip()
+        if not clause or self.cancelled: return
+        self.spoken.append(clause)
+        if self._tasks:
+            # Only time-to-first-audio is budgeted: later clauses synthesise while earlier ones
+            # play, and must not fall back to another voice mid-sentence because the turn ran long
+            context = contextvars.copy_context()
+            context.run(current_turn.set, None)
+            task = asyncio.create_task(self._synthesise(clause), context=context)
+        else:
+            task = asyncio.create_task(self._synthesise(clause))
+        self._tasks.append(task)
+        self._pending.put_nowait(task)
+
+    def close(self):
+        self._pending.put_nowait(None)
+
+    async def _synthesise(self, clause: str) -> bytes:
+        stream = await get_speech_from_text(clause, self.audio_format, self.lane)
+        return await read_audio(stream) if stream else b""
+
+    def cancel(self):
+        """Barge-in: drop every clause the caller hasn't heard yet."""
+        if self.cancelled: return
+        self.cancelled = True
+        for clause, task in zip(self.spoken[self._sent:], self._tasks[self._sent:]):
+            if task.done() and not task.cancelled():
+                metrics.incr("turn.discarded_audio_clauses")  # Synthesised but never sent
+            else:
+                task.cancel()
+                metrics.incr("turn.cancelled_tts_tasks")
+                metrics.incr("turn.cancelled_tts_chars", len(clause))
+        self.close()
+
+    async def audio(self) -> AsyncGenerator[bytes, None]:
+        first = True
+        sent_bytes = 0
+        while not self.cancelled:
+            task = await self._pending.get()
+            if task is None or self.cancelled: break
+            chunk = await task
+            self._sent += 1
+            if not chunk: continue
+            if first:
+                first_ms = (time.perf_counter() - self.started) * 1000
+                metrics.observe("turn.first_audio_ms", first_ms)
+                metrics.observe(f"turn.{self.audio_format}.first_audio_ms", first_ms)
+                first = False
+            sent_bytes += len(chunk)
+            yield chunk
+        if sent_bytes:
+            metrics.observe(f"turn.{self.audio_format}.bytes_per_turn", sent_bytes)
 
 # ==================== AUDIO PROCESSING ====================
-async def get_text_from_speech(audio_bytes: bytes) -> str:
+async def get_text_from_speech(audio_bytes: bytes, lane: Lane = Lane.DIALOGUE) -> str:
+    # Leading/trailing silence only costs upload and Whisper time (and invites hallucinated "Thank you.")
+    audio_bytes = trim_wav(audio_bytes)
+    if not audio_bytes:
+        log_debug("STT_SKIP", "No speech detected")
+        return ""
     log_debug("STT", f"Transcribing {len(audio_bytes)} bytes...")
     try:
-        transcription = await main_client.audio.transcriptions.create(
+        transcription = await within_budget("stt", groq_pool.call(lambda client: client.audio.transcriptions.create(
             file=("request.wav", audio_bytes, "audio/wav"),
             model="whisper-large-v3",
             language="en"
-        )
+        ), kind="stt", cost=1, lane=lane))
+        if transcription is None:
+            return ""  # Over budget: "couldn't hear you" beats a silent line
         text = transcription.text.strip()
         log_debug("STT_SUCCESS", f"Transcribed: '{text}'")
         return text
@@ -323,45 +612,106 @@ async def get_text_from_speech(audio_bytes: bytes) -> str:
         log_debug("STT_ERROR", str(e))
         return ""
 
-async def get_speech_from_text(text: str):
-    log_debug("TTS", f"Requesting Audio for: '{text}'")
-    
-    for i, client in enumerate(groq_clients):
-        try:
-            can_request, tokens = token_tracker.can_make_request(text)
-            if not can_request: continue
-
-            response = await client.audio.speech.create(
-                model="canopylabs/orpheus-v1-english",
-                voice="autumn",
-                response_format="wav",
-                input=text
-            )
-            token_tracker.record_request(text)
-            log_debug("TTS_SUCCESS", f"✅ TTS Success (Client {i+1})")
-            return (chunk for chunk in response.iter_bytes())
-        except Exception as e:
-            log_debug("TTS_FAIL", f"Client {i+1}: {e}")
-            continue
-    
-    log_debug("TTS_FALLBACK", "⚠️ FALLBACK TO GTTS.")
-    try:
-        tts = gTTS(text=text, lang='en', slow=False)
-        fp = io.BytesIO()
-        tts.write_to_fp(fp)
-        fp.seek(0)
-        return iter([fp.read()])
-    except: return None
+# ==================== SPECULATIVE RESPONSES ====================
+def _field_filled(field: str, collected_data: Dict) -> bool:
+    if field == 'phone':
+        return is_valid_phone(collected_data.get('phone'))
+    return bool(collected_data.get(field))
+
+def predict_next_intent(collected_data: Dict) -> Optional[str]:
+    """
+    Guess the ask_* intent that follows once the caller answers the question
+    Riya just asked (the first missing field in BOOKING_FLOW).
+    """
+    missing = [f for f in BOOKING_FLOW if not _field_filled(f, collected_data)]
+    if len(missing) < 2:
+        return None  # Next step is availability check/confirmation -> not worth guessing
+    return f"ask_{missing[1]}"
+
+class Speculation:
+    """A reply generated before extraction finished; committed only if the guess was right."""
+
+    def __init__(self, intent: str, prompt_tokens: int, task: asyncio.Task):
+        self.intent = intent
+        self.prompt_tokens = prompt_tokens
+        self.task = task
+        self.resolved = False
+
+    def take(self, intent: str) -> Optional[asyncio.Task]:
+        if self.resolved or intent != self.intent: return None
+        self.resolved = True
+        metrics.incr("speculation.hits")
+        metrics.gauge("speculation.hit_rate", metrics.ratio("speculation.hits", "speculation.misses"))
+        log_debug("SPECULATION_HIT", f"Predicted '{intent}' correctly")
+        return self.task
+
+    def discard(self):
+        if self.resolved: return
+        self.resolved = True
+        wasted = self.prompt_tokens
+        if self.task.done() and not self.task.cancelled() and self.task.exception() is None:
+            wasted += estimate_tokens(self.task.result())
+        else:
+            self.task.cancel()
+        metrics.incr("speculation.misses")
+        metrics.incr("speculation.wasted_tokens", wasted)
+        metrics.gauge("speculation.hit_rate", metrics.ratio("speculation.hits", "speculation.misses"))
+        log_debug("SPECULATION_MISS", f"Discarded '{self.intent}' (~{wasted} tokens wasted)")
+
+async def _start_speculation(user_text: str, tracking_key: Optional[str]) -> Optional[Speculation]:
+    # Rule-path turns extract in microseconds: nothing to hide, don't burn tokens
+    if fast_extract(user_text).is_confident: return None
+
+    session = await session_store.get_state(tracking_key) if tracking_key else None
+    if not session or not session.get('collected_data'): return None  # Welcome turn
+
+    snapshot = session['collected_data']  # Private copy from the session store
+    intent = predict_next_intent(snapshot)
+    if not intent: return None
+
+    snapshot['history'] = snapshot.get('history', []) + [f"Caller: {user_text}"]
+    _, prompt_tokens = build_riya_messages(intent, snapshot, user_text)
+    metrics.incr("speculation.launched")
+    log_debug("SPECULATION_START", f"Generating '{intent}' in parallel with extraction")
+    return Speculation(intent, prompt_tokens, asyncio.create_task(generate_riya_response(intent, snapshot, user_text, lane=Lane.BACKGROUND)))
+
+async def _speak_speculation(task: asyncio.Task, speech: Optional[SpeechPipeline]) -> str:
+    response = await task
+    if speech:
+        segmenter = ClauseSegmenter()
+        for clause in segmenter.feed(response) + segmenter.flush():
+            speech.say(clause)
+    return response
 
 # ==================== 🔥 FIXED CORE PIPELINE ====================
 async def process_booking_conversation(
     user_text: str, 
     session_id: Optional[str] = None,  # 🔥 NEW: Separate session tracking
-    real_phone: Optional[str] = None    # 🔥 NEW: Actual phone (when verified)
+    real_phone: Optional[str] = None,   # 🔥 NEW: Actual phone (when verified)
+    speech: Optional["SpeechPipeline"] = None  # Streams generated clauses straight to TTS
 ) -> tuple[str, Optional[str]]:
     """
     Returns: (response_text, verified_phone_number)
     """
+    speculation = await _start_speculation(user_text, real_phone or session_id) if SPECULATIVE_RESPONSES else None
+    try:
+        response, verified_phone = await _process_booking_turn(user_text, session_id, real_phone, speech, speculation)
+    finally:
+        if speculation: speculation.discard()  # No-op when committed
+
+    # The temp session is only retired once the turn that verified the phone completed:
+    # a barge-in cancels the turn, and the caller must still find their data under session_id
+    if verified_phone and not real_phone and session_id and session_id != verified_phone:
+        await session_store.clear_session(session_id)
+    return response, verified_phone
+
+async def _process_booking_turn(
+    user_text: str,
+    session_id: Optional[str],
+    real_phone: Optional[str],
+    speech: Optional[SpeechPipeline],
+    speculation: Optional[Speculation]
+) -> tuple[str, Optional[str]]:
     log_debug("PIPELINE_START", f"User: '{user_text}' | Session: {session_id} | Phone: {real_phone}")
     
     # 1. Parse Input
@@ -379,21 +729,19 @@ async def process_booking_conversation(
     
     # 3. 🔥 CRITICAL FIX: Load session from CURRENT tracking key FIRST
     current_key = real_phone or session_id
-    session = await SessionManager.get_state(current_key) if current_key else None
+    session = await session_store.get_state(current_key) if current_key else None
     
     # 4. 🔥 MIGRATE SESSION DATA when phone is verified
     if phone_just_verified and session_id and session_id != real_phone:
         # Load old session from temp session_id
-        old_session = await SessionManager.get_state(session_id)
+        old_session = await session_store.get_state(session_id)
         
         if old_session and old_session.get('collected_data'):
             log_debug("SESSION_MIGRATION", f"Migrating data from {session_id} → {real_phone}")
             # Copy old session data to new phone-based session
             collected_data = old_session['collected_data'].copy()
-            # Save under new phone number
-            await SessionManager.update_state(real_phone, old_session.get('current_step', 'active'), collected_data)
-            # Clear old temp session
-            await SessionManager.clear_session(session_id)
+            # Save under new phone number (temp session is cleared when the turn completes)
+            await session_store.update_state(real_phone, old_session.get('current_step', 'active'), collected_data)
             log_debug("SESSION_MIGRATED", "Data successfully migrated", collected_data)
         elif session and session.get('collected_data'):
             # Phone session already exists
@@ -442,7 +790,7 @@ async def process_booking_conversation(
     is_greeting = any(kw in user_text.lower() for kw in greeting_keywords)
     if not session and is_greeting:
         response = await _generate_and_save_response(
-            "welcome", collected_data, user_text, tracking_key
+            "welcome", collected_data, user_text, tracking_key, speech, speculation, extracted_data
         )
         return response, real_phone
 
@@ -460,7 +808,7 @@ async def process_booking_conversation(
                 if field_retries >= MAX_RETRIES_PER_FIELD:
                     # Cannot proceed without valid phone
                     log_debug("PHONE_REQUIRED", "Cannot complete booking without valid phone")
-                    response = "I'm sorry, I need a valid phone number to complete your reservation. What's the best number to reach you?"
+                    response = PHRASES["phone_required"]
                     return response, real_phone
                 
                 missing_field = field
@@ -496,7 +844,7 @@ async def process_booking_conversation(
     # 10. Response Logic
     if missing_field:
         response = await _generate_and_save_response(
-            f"ask_{missing_field}", collected_data, user_text, tracking_key
+            f"ask_{missing_field}", collected_data, user_text, tracking_key, speech, speculation, extracted_data
         )
         return response, real_phone
     else:
@@ -505,7 +853,7 @@ async def process_booking_conversation(
         
         if not final_phone or not is_valid_phone(final_phone):
             log_debug("BOOKING_BLOCKED", "Invalid phone number")
-            response = "I need a valid phone number to complete your reservation. What's your contact number?"
+            response = PHRASES["phone_invalid"]
             return response, real_phone
         
         if not collected_data.get('special_requests'): 
@@ -533,36 +881,42 @@ async def process_booking_conversation(
             
             if success:
                 if tracking_key: 
-                    await SessionManager.clear_session(tracking_key)
+                    await session_store.clear_session(tracking_key)
                 log_debug("BOOKING_SUCCESS", "Reservation confirmed!", final_data)
                 
                 auto_filled = any(retry_counts.get(f, 0) >= MAX_RETRIES_PER_FIELD for f in BOOKING_FLOW)
                 intent = "force_complete" if auto_filled else "confirm_booking"
                 
-                response = await generate_riya_response(intent, collected_data, user_text)
+                if speech: speech.lane = lane_for_intent(intent)
+                response = await generate_riya_response(intent, collected_data, user_text, speech.say if speech else None, extracted_data)
                 return response, final_phone
             else:
-                return "I'm having trouble connecting to the system.", real_phone
+                return PHRASES["system_error"], real_phone
         else:
             collected_data.pop('time', None)
             retry_counts['time'] = 0
             collected_data['retry_count'] = retry_counts
             response = await _generate_and_save_response(
-                "unavailable", collected_data, user_text, tracking_key
+                "unavailable", collected_data, user_text, tracking_key, speech, speculation, extracted_data
             )
             return response, real_phone
 
-async def _generate_and_save_response(intent, data, user_text, tracking_key):
+async def _generate_and_save_response(intent, data, user_text, tracking_key, speech=None, speculation=None, extracted=None):
     """Helper to generate response and save it to history/DB"""
-    response = await generate_riya_response(intent, data, user_text)
+    if speech: speech.lane = lane_for_intent(intent)
+    speculative = speculation.take(intent) if speculation else None
+    if speculative:
+        response = await _speak_speculation(speculative, speech)
+    else:
+        response = await generate_riya_response(intent, data, user_text, speech.say if speech else None, extracted)
     
     history = data.get('history', [])
     history.append(f"Riya: {response}")
     data['history'] = history
     
     if tracking_key: 
-        await SessionManager.update_state(tracking_key, intent, data)
-        log_debug("SESSION_SAVED", f"Saved to DB for {tracking_key}", data)
+        await session_store.update_state(tracking_key, intent, data)
+        log_debug("SESSION_SAVED", f"Saved session for {tracking_key}", data)
     
     return response
 
@@ -583,31 +937,77 @@ async def process_booking_text(text: str, session_id: str = None, real_phone: st
     response, phone = await process_booking_conversation(text, session_id, real_phone)
     return response
 
-async def process_booking_audio(audio_bytes: bytes, session_id: str = None, real_phone: str = None):
-    user_text = await get_text_from_speech(audio_bytes)
-    if not user_text: 
-        s = await get_speech_from_text("I couldn't hear you.")
-        return s, real_phone
+async def process_booking_audio(audio_bytes: bytes, session_id: str = None, real_phone: str = None, audio_format: str = "wav"):
+    with use_turn():  # Every stage gets a share of TURN_BUDGET_MS
+        user_text = await get_text_from_speech(audio_bytes)
+        if not user_text: 
+            s = await get_speech_from_text(PHRASES["cant_hear"], audio_format)
+            return s, real_phone
 
-    response_text, detected_phone = await process_booking_conversation(user_text, session_id, real_phone)
-    audio_stream = await get_speech_from_text(response_text)
-    return audio_stream, detected_phone
+        response_text, detected_phone = await process_booking_conversation(user_text, session_id, real_phone)
+        audio_stream = await get_speech_from_text(response_text, audio_format)
+        return audio_stream, detected_phone
 
-async def process_text_to_audio(text: str, session_id: str = None, real_phone: str = None):
+async def process_text_to_audio(text: str, session_id: str = None, real_phone: str = None, audio_format: str = "wav"):
     log_debug("PROCESS_START", f"Request: '{text}'")
     
-    response_text, detected_phone = await process_booking_conversation(text, session_id, real_phone)
-    log_debug("PROCESS_MID", f"Riya says: '{response_text}'")
-    
-    audio_stream = await get_speech_from_text(response_text)
-    return audio_stream, detected_phone
+    with use_turn():
+        response_text, detected_phone = await process_booking_conversation(text, session_id, real_phone)
+        log_debug("PROCESS_MID", f"Riya says: '{response_text}'")
+        
+        audio_stream = await get_speech_from_text(response_text, audio_format)
+        return audio_stream, detected_phone
 
-async def start_new_call(session_id: str = None):
+# ==================== STREAMING TURNS (WebSocket) ====================
+async def _run_spoken_turn(user_text: str, session_id: str, real_phone: str, speech: SpeechPipeline):
+    # Runs in its own task, so the turn context (and the TTS tasks say() spawns) stay scoped to this turn
+    with use_turn(speech.turn):
+        try:
+            if not user_text:
+                speech.say(PHRASES["cant_hear"])
+                return "", real_phone
+            response_text, detected_phone = await process_booking_conversation(user_text, session_id, real_phone, speech)
+            # Hard-coded replies (validation errors etc.) never went through the LLM stream
+            if not speech.spoken:
+                speech.say(response_text)
+            return response_text, detected_phone
+        except asyncio.CancelledError:
+            speech.cancel()  # Pending TTS for this turn is now stale
+            raise
+        finally:
+            speech.close()
+
+def start_spoken_turn(user_text: str, session_id: str = None, real_phone: str = None, speech: SpeechPipeline = None, audio_format: str = "wav"):
+    """
+    Pipelined variant of process_text_to_audio.
+    Returns (audio_chunks, turn): audio for the first clause is available while
+    the LLM is still generating; `turn` resolves to (response_text, verified_phone).
+    """
+    speech = speech or SpeechPipeline(audio_format)
+    turn = asyncio.create_task(_run_spoken_turn(user_text, session_id, real_phone, speech))
+    return speech.audio(), turn
+
+async def start_spoken_audio_turn(audio_bytes: bytes, session_id: str = None, real_phone: str = None, audio_format: str = "wav"):
+    """Pipelined variant of process_booking_audio (STT -> streamed reply)."""
+    speech = SpeechPipeline(audio_format)  # Created before STT so first-audio latency covers the whole turn
+    with use_turn(speech.turn, report=False):
+        user_text = await get_text_from_speech(audio_bytes)
+    return start_spoken_turn(user_text, session_id, real_phone, speech)
+
+async def start_spoken_stream_turn(transcriber, session_id: str = None, real_phone: str = None, audio_format: str = "wav"):
+    """Streaming-STT variant: most of the transcript was produced while the caller spoke."""
+    speech = SpeechPipeline(audio_format)
+    with use_turn(speech.turn, report=False):
+        # Over budget: the latest partial transcript is better than waiting
+        user_text = await within_budget("stt", transcriber.finish(), fallback=lambda: transcriber.text.strip())
+    log_debug("STT_STREAM", f"Final transcript: '{user_text}'")
+    return start_spoken_turn(user_text, session_id, real_phone, speech)
+
+async def start_new_call(session_id: str = None, audio_format: str = "wav"):
     """Initiates the call from Riya's side"""
     log_debug("CALL_START", f"New call initiated for session: {session_id}")
     
     if session_id:
-        await SessionManager.clear_session(session_id)
+        await session_store.clear_session(session_id)
     
-    greeting_text = "Hi! Thanks for calling The Guru's Kitchen. This is Riya. Who am I speaking with?"
-    return await get_speech_from_text(greeting_text)
\ No newline at end of file
+    return await get_speech_from_text(PHRASES["greeting"], audio_format)
\ No newline at end of file
@@ -0,0 +1,71 @@
+import time
+import asyncio
+from collections import defaultdict, deque
+
+# ==================== IN-PROCESS METRICS ====================
+class Metrics:
+    """Tiny counter/gauge/timing registry, exported as JSON on /metrics."""
+
+    def __init__(self, window: int = 1024):
+        self.window = window
+        self.counters = defaultdict(float)
+        self.gauges = {}
+        self.samples = defaultdict(lambda: deque(maxlen=self.window))
+        self.sample_counts = defaultdict(int)
+
+    def incr(self, name: str, value: float = 1):
+        self.counters[name] += value
+
+    def gauge(self, name: str, value: float):
+        self.gauges[name] = value
+
+    def observe(self, name: str, value: float):
+        """Record one sample (latency in ms, bytes, tokens...) for percentile reporting."""
+        self.samples[name].append(value)
+        self.sample_counts[name] += 1
+
+    def percentile(self, name: str, pct: float) -> float:
+        values = sorted(self.samples.get(name, ()))
+        if not values: return 0.0
+        index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+        return values[index]
+
+    def ratio(self, hits: str, misses: str) -> float:
+        total = self.counters.get(hits, 0) + self.counters.get(misses, 0)
+        return round(self.counters.get(hits, 0) / total, 4) if total else 0.0
+
+    def snapshot(self) -> dict:
+        timings = {}
+        for name, values in self.samples.items():
+            if not values: continue
+            timings[name] = {
+                "count": self.sample_counts[name],
+                "mean": round(sum(values) / len(values), 2),
+                "p50": round(self.percentile(name, 50), 2),
+                "p90": round(self.percentile(name, 90), 2),
+                "p99": round(self.percentile(name, 99), 2),
+                "max": round(max(values), 2),
+            }
+        return {
+            "counters": dict(self.counters),
+            "gauges": dict(self.gauges),
+            "timings": timings,
+        }
+
+# Singleton instance
+metrics = Metrics()
+
+# ==================== EVENT LOOP STALL MONITOR ====================
+async def watch_event_loop_lag(interval: float = 0.1):
+    """
+    Sleeps for `interval` forever and records how late each wake-up was.
+    Anything blocking the loop (sync DB calls, CPU work) shows up as stall time.
+    """
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        stall_ms = max(0.0, (time.perf_counter() - start - interval) * 1000)
+        metrics.observe("event_loop.stall_ms", stall_ms)
+        if stall_ms > 50:
+            metrics.incr("event_loop.stalls_over_50ms")
+            metrics.incr("event_loop.stall_ms_total", stall_ms)
@@ -0,0 +1,112 @@
+import os
+import json
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from core.metrics import metrics
+from core.rate_limiter import estimate_tokens
+
+# ==================== MODELS ====================
+FAST_MODEL = "llama-3.1-8b-instant"
+REPLY_MODEL = "moonshotai/kimi-k2-instruct-0905"
+EXTRACT_MODEL = "openai/gpt-oss-120b"
+
+# USD per 1M (input, output) tokens, for the cost metric only
+MODEL_PRICES = {
+    FAST_MODEL: (0.05, 0.08),
+    REPLY_MODEL: (1.00, 3.00),
+    EXTRACT_MODEL: (0.15, 0.75),
+}
+# Short names for metrics and for the pool's per-kind latency (hedge) stats
+MODEL_TIERS = {FAST_MODEL: "fast", REPLY_MODEL: "large", EXTRACT_MODEL: "large"}
+
+# ==================== ROUTING ====================
+# Models tried in order per task and intent; each non-final model's output must pass
+# validation or the turn escalates to the next. "default" covers unlisted intents.
+MODEL_ROUTES: Dict[str, Dict[str, List[str]]] = {
+    "generate": {
+        "default": [FAST_MODEL, REPLY_MODEL],
+        # Confirmations read back every booking detail: no room for a small model's slip
+        "confirm_booking": [REPLY_MODEL],
+        "force_complete": [REPLY_MODEL],
+    },
+    "extract": {
+        "default": [FAST_MODEL, EXTRACT_MODEL],
+    },
+}
+
+def _load_route_overrides():
+    """MODEL_ROUTES_JSON='{"generate": {"ask_time": ["llama-3.1-8b-instant"]}}' overrides single entries."""
+    raw = os.environ.get("MODEL_ROUTES_JSON")
+    if not raw: return
+    try:
+        for task, routes in json.loads(raw).items():
+            MODEL_ROUTES.setdefault(task, {}).update({intent: list(models) for intent, models in routes.items()})
+    except (ValueError, AttributeError, TypeError) as e:
+        print(f"⚠️ Ignoring invalid MODEL_ROUTES_JSON: {e}")
+
+_load_route_overrides()
+
+def models_for(task: str, intent: str) -> List[str]:
+    routes = MODEL_ROUTES[task]
+    return routes.get(intent) or routes["default"]
+
+def pool_kind(task: str, model: str) -> str:
+    """Pool call kind: latency stats (and so hedge delays) must not mix small and large models."""
+    tier = MODEL_TIERS.get(model, "large")
+    return task if tier == "large" else f"{task}_{tier}"
+
+def call_cost_usd(model: str, prompt_tokens: int, output: str) -> float:
+    price_in, price_out = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * price_in + estimate_tokens(output) * price_out) / 1_000_000
+
+# ==================== CASCADE ====================
+async def run_cascade(
+    task: str,
+    intent: str,
+    attempt: Callable[[str, bool], Awaitable[Any]],
+    validate: Callable[[Any], Optional[str]],
+    prompt_tokens: int,
+) -> Any:
+    """
+    Run attempt(model, is_final) down the route for (task, intent) until one passes
+    validate() (None = valid, else the reason). Errors on a non-final model escalate
+    too. The final model's answer is returned as-is and its errors are raised.
+    Records latency, cost and escalation rate per task and intent, and on escalation
+    the time lost to rejected tiers before the next one could start.
+    """
+    models = models_for(task, intent)
+    prefix = f"cascade.{task}.{intent}"
+    started = time.perf_counter()
+    cost = 0.0
+    metrics.incr(f"{prefix}.calls")
+    try:
+        for i, model in enumerate(models):
+            final = i == len(models) - 1
+            tier = MODEL_TIERS.get(model, model)
+            model_started = time.perf_counter()
+            if i: metrics.observe(f"{prefix}.escalation_penalty_ms", (model_started - started) * 1000)
+            try:
+                result = await attempt(model, final)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                metrics.observe(f"{prefix}.{tier}.ms", (time.perf_counter() - model_started) * 1000)
+                if final: raise
+                problem = f"{type(e).__name__}: {e}"
+            else:
+                metrics.observe(f"{prefix}.{tier}.ms", (time.perf_counter() - model_started) * 1000)
+                cost += call_cost_usd(model, prompt_tokens, result if isinstance(result, str) else json.dumps(result, default=str))
+                problem = validate(result)
+                if problem is None or final:
+                    if problem: metrics.incr(f"{prefix}.final_invalid")
+                    metrics.incr(f"{prefix}.served.{tier}")
+                    return result
+            print(f"⤴️ {task}/{intent}: {model} rejected ({problem}); escalating.")
+            metrics.incr(f"{prefix}.escalations")
+    finally:
+        metrics.observe(f"{prefix}.ms", (time.perf_counter() - started) * 1000)
+        metrics.incr(f"{prefix}.cost_usd", cost)
+        metrics.incr(f"cascade.{task}.cost_usd", cost)
+        metrics.gauge(f"{prefix}.escalation_rate", round(metrics.counters[f"{prefix}.escalations"] / metrics.counters[f"{prefix}.calls"], 4))
@@ -0,0 +1,115 @@
+import os
+import re
+import json
+import mmap
+import struct
+from collections import Counter
+from typing import Dict, Optional
+
+from core.metrics import metrics
+
+# ==================== RIYA'S FIXED PHRASES ====================
+# Everything Riya says verbatim. Rendered once by build_phrase_cache.py.
+PHRASES = {
+    "greeting": "Hi! Thanks for calling The Guru's Kitchen. This is Riya. Who am I speaking with?",
+    "short_greeting": "Hi! Thanks for calling The Guru's Kitchen. This is Riya.",
+    "cant_hear": "I couldn't hear you.",
+    "didnt_catch": "I'm sorry, I didn't catch that.",
+    "generator_error": "I'm sorry, I'm having trouble thinking right now.",
+    "booking_confirmed": "Thank you! Your booking is confirmed.",
+    "phone_required": "I'm sorry, I need a valid phone number to complete your reservation. What's the best number to reach you?",
+    "phone_invalid": "I need a valid phone number to complete your reservation. What's your contact number?",
+    "system_error": "I'm having trouble connecting to the system.",
+}
+
+PHRASE_PACK_FILE = os.environ.get("PHRASE_PACK_FILE", "phrase_audio.bin")
+PACK_MAGIC = b"RIYA"
+
+def normalise_phrase(text: str) -> str:
+    """Case, quotes, punctuation and spacing don't change what gets spoken."""
+    text = (text or "").lower().replace("’", "'").replace("‘", "'")
+    text = re.sub(r"[^a-z0-9' ]+", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+# ==================== PACK FORMAT ====================
+# [b"RIYA"][u32 header length][JSON header][audio blob][audio blob]...
+# header = {"model", "voice", "format", "entries": {normalised_text: [offset, length]}}
+# Offsets are relative to the start of the blob area.
+def write_pack(path: str, audio_by_text: Dict[str, bytes], model: str, voice: str, audio_format: str = "wav"):
+    """Write a phrase pack atomically (tmp file + rename)."""
+    entries, blobs, offset = {}, [], 0
+    for text, audio in audio_by_text.items():
+        entries[normalise_phrase(text)] = [offset, len(audio)]
+        blobs.append(audio)
+        offset += len(audio)
+    header = json.dumps({"model": model, "voice": voice, "format": audio_format, "entries": entries}).encode("utf-8")
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(PACK_MAGIC + struct.pack("<I", len(header)) + header)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, path)
+
+class PhraseCache:
+    """Memory-mapped, lazily loaded audio for fixed phrases. Zero network calls on a hit."""
+
+    def __init__(self, path: str = PHRASE_PACK_FILE, name: str = "phrase_cache"):
+        self.path = path
+        self.name = name  # Metric prefix
+        self.entries = {}
+        self.model = self.voice = None
+        self._mm = None
+        self._blob_start = 0
+        self._loaded = False
+        self.misses = Counter()  # Which uncached texts come up most -> candidates for PHRASES
+
+    def load(self):
+        self._loaded = True
+        if not os.path.exists(self.path):
+            print(f"⚠️ Pack '{self.path}' not found. Run build_phrase_cache.py to enable instant phrases.")
+            return
+        try:
+            with open(self.path, "rb") as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if self._mm[:4] != PACK_MAGIC:
+                raise ValueError("bad magic")
+            (header_len,) = struct.unpack("<I", self._mm[4:8])
+            header = json.loads(self._mm[8:8 + header_len].decode("utf-8"))
+            self._blob_start = 8 + header_len
+            self.entries = header["entries"]
+            self.model, self.voice = header.get("model"), header.get("voice")
+            print(f"🚀 {self.name} loaded: {len(self.entries)} entries ({self.model} / {self.voice}).")
+        except Exception as e:
+            print(f"❌ Pack '{self.path}' unreadable: {e}")
+            self.entries = {}
+
+    def matches_voice(self, model: str = None, voice: str = None) -> bool:
+        # A pack rendered with another voice would make Riya switch voices mid-call
+        return (model, voice) in ((None, None), (self.model, self.voice))
+
+    def read(self, key: str) -> Optional[bytes]:
+        """Raw lookup by already-normalised key (no metrics)."""
+        if not self._loaded: self.load()
+        entry = self.entries.get(key)
+        if not entry: return None
+        offset, length = entry
+        start = self._blob_start + offset
+        return self._mm[start:start + length]
+
+    def get(self, text: str, model: str = None, voice: str = None) -> Optional[bytes]:
+        if not self._loaded: self.load()
+        key = normalise_phrase(text)
+        if key in self.entries and self.matches_voice(model, voice):
+            metrics.incr(f"{self.name}.hits")
+            return self.read(key)
+        metrics.incr(f"{self.name}.misses")
+        if len(self.misses) < 1000 or key in self.misses:
+            self.misses[key] += 1
+        return None
+
+    def top_misses(self, n: int = 20) -> list:
+        return self.misses.most_common(n)
+
+# Singleton instance
+phrase_cache = PhraseCache()
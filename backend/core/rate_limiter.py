@@ -0,0 +1,146 @@
+import os
+import re
+import time
+import heapq
+import asyncio
+import itertools
+from enum import IntEnum
+from typing import Dict, Optional, Tuple
+
+from core.metrics import metrics
+
+# ==================== CONFIG ====================
+# Budget per API key and model class, per minute (conservative vs Groq's free-tier limits)
+RATE_LIMITS = {
+    "llm": int(os.environ.get("RATE_LIMIT_LLM_TPM", "6000")),  # Tokens
+    "tts": int(os.environ.get("RATE_LIMIT_TTS_TPM", "1000")),  # Tokens of input text (1000 < 1200)
+    "stt": int(os.environ.get("RATE_LIMIT_STT_RPM", "20")),    # Requests
+}
+
+class Lane(IntEnum):
+    """Priority lanes: lower value is served first when a bucket is contended."""
+    CONFIRMATION = 0  # Booking confirmations, anything the caller must hear
+    DIALOGUE = 1      # Normal asks and answers
+    BACKGROUND = 2    # Chit-chat, speculation, pre-rendering
+
+# Longest a request may queue for budget before the caller degrades (gTTS, stock phrase...)
+LANE_MAX_WAIT_S = {
+    Lane.CONFIRMATION: float(os.environ.get("RATE_LIMIT_WAIT_CONFIRMATION_S", "10")),
+    Lane.DIALOGUE: float(os.environ.get("RATE_LIMIT_WAIT_DIALOGUE_S", "4")),
+    Lane.BACKGROUND: float(os.environ.get("RATE_LIMIT_WAIT_BACKGROUND_S", "1")),
+}
+
+def estimate_tokens(text: str) -> int:
+    """1 token ≈ 4 characters, +20 for overhead/punctuation."""
+    clean_text = re.sub(r'\s+', ' ', (text or "").strip())
+    return int(len(clean_text) / 4) + 20
+
+class RateLimitTimeout(Exception):
+    """No budget became available before the request's deadline."""
+
+class TokenBucket:
+    """Refills continuously at capacity/minute; every operation is O(1)."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, cost: float, now: Optional[float] = None) -> float:
+        """Seconds until `cost` fits (requests larger than the bucket wait for a full one)."""
+        self._refill(now or time.monotonic())
+        missing = min(cost, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def take(self, cost: float):
+        self._refill(time.monotonic())
+        self.level -= min(cost, self.capacity)
+
+    @property
+    def utilisation(self) -> float:
+        self._refill(time.monotonic())
+        return 1 - self.level / self.capacity
+
+class RateLimiter:
+    """
+    Token buckets per (API key, model class) with priority queueing.
+    acquire() waits (up to a deadline) instead of refusing, and a waiting
+    confirmation always goes before waiting chit-chat on the same bucket.
+    """
+
+    def __init__(self, limits: Dict[str, int] = RATE_LIMITS):
+        self.limits = limits
+        self.buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self.waiters: Dict[Tuple[str, str], list] = {}      # Heap of (lane, seq) per bucket
+        self.changed: Dict[Tuple[str, str], asyncio.Event] = {}
+        self._seq = itertools.count()
+
+    def bucket(self, key: str, model: str) -> TokenBucket:
+        slot = (key, model)
+        if slot not in self.buckets:
+            self.buckets[slot] = TokenBucket(self.limits[model])
+            self.waiters[slot] = []
+        return self.buckets[slot]
+
+    def wait_time(self, key: str, model: str, cost: float) -> float:
+        """Expected queueing delay on this key (used to steer requests to idle keys)."""
+        return self.bucket(key, model).wait_time(cost)
+
+    def _publish(self, key: str, model: str):
+        metrics.gauge(f"rate_limit.{key}.{model}.utilisation", round(self.bucket(key, model).utilisation, 3))
+
+    async def acquire(self, key: str, model: str, cost: float, lane: Lane = Lane.DIALOGUE, deadline: Optional[float] = None):
+        """Reserve `cost` on this key's bucket. Raises RateLimitTimeout at `deadline` (time.monotonic())."""
+        slot = (key, model)
+        bucket = self.bucket(key, model)
+        heap = self.waiters[slot]
+        if deadline is None:
+            deadline = time.monotonic() + LANE_MAX_WAIT_S[lane]
+
+        if not heap and bucket.wait_time(cost) == 0:
+            bucket.take(cost)  # Fast path: nobody queued, budget available
+            self._publish(key, model)
+            return
+
+        ticket = (int(lane), next(self._seq))
+        heapq.heappush(heap, ticket)
+        metrics.incr(f"rate_limit.{lane.name.lower()}.queued")
+        started = time.monotonic()
+        try:
+            while True:
+                now = time.monotonic()
+                wait = bucket.wait_time(cost, now) if heap[0] == ticket else None
+                if wait == 0:
+                    heapq.heappop(heap)
+                    bucket.take(cost)
+                    metrics.observe("rate_limit.wait_ms", (now - started) * 1000)
+                    self._publish(key, model)
+                    return
+                if now >= deadline:
+                    metrics.incr(f"rate_limit.{lane.name.lower()}.timeouts")
+                    raise RateLimitTimeout(f"{model} budget on {key} exhausted")
+                # Head of the queue sleeps until refilled; others until the head changes
+                event = self.changed.setdefault(slot, asyncio.Event())
+                timeout = min(wait if wait is not None else deadline - now, deadline - now)
+                try:
+                    await asyncio.wait_for(event.wait(), timeout=max(timeout, 0.001))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if ticket in heap:
+                heap.remove(ticket)
+                heapq.heapify(heap)
+            # Wake the others: the head of the queue may have changed
+            event = self.changed.pop(slot, None)
+            if event: event.set()
+
+    def snapshot(self) -> dict:
+        return {f"{key}.{model}": round(b.utilisation, 3) for (key, model), b in self.buckets.items()}
+
+# Singleton instance
+rate_limiter = RateLimiter()
@@ -0,0 +1,137 @@
+import re
+import random
+from datetime import date
+from typing import Dict, List, Optional
+
+from core.phrase_cache import PHRASES
+
+# ==================== TEMPLATE LIBRARY ====================
+# Canonical lines from the intent table in generate_riya_response, plus a few
+# variants so repeat callers don't hear a script. Asks have no slots, so they
+# can be pre-rendered (see static_template_lines / build_phrase_cache.py).
+ASKS = {
+    "ask_name": [
+        "And who should I put this reservation under?",
+        "What name should I put the reservation under?",
+    ],
+    "ask_phone": [
+        "And what's the best number to reach you at?",
+        "What's a good phone number for the reservation?",
+    ],
+    "ask_party_size": [
+        "How many people will be joining you?",
+        "How many guests should I plan for?",
+    ],
+    "ask_date": [
+        "What date were you thinking?",
+        "Which day would you like to come in?",
+    ],
+    "ask_time": [
+        "What time works best for you?",
+        "What time would you like the table?",
+    ],
+}
+
+# Acknowledge what the caller just gave us (ACKNOWLEDGE -> THEN ASK)
+ACK_NAME = ["Nice to meet you, {name}!", "Thanks, {name}!"]
+ACK_PHONE = ["Got it, {phone}.", "Perfect, {phone}."]
+ACK_BOOKING = ["Perfect, {details}!", "Lovely, {details}!", "Great, {details}!"]
+ACK_GENERIC = ["Got it!", "Sure thing!", "Perfect!"]
+
+CONFIRMATIONS = {
+    "confirm_booking": "Amazing! You're all set, table for {party_size} on {date} at {time} under {name}. We can't wait to see you!",
+    "force_complete": "Perfect! Let me finalize your reservation with the details we have. You're booked for {party_size} people on {date} at {time} under {name}. We'll see you then!",
+}
+UNAVAILABLE = "Oh, that time's fully booked. Would another time work for you?"
+
+# ==================== SLOT FORMATTING (spoken form) ====================
+def ordinal(n: int) -> str:
+    suffix = "th" if 11 <= n % 100 <= 13 else {1: "st", 2: "nd", 3: "rd"}.get(n % 10, "th")
+    return f"{n}{suffix}"
+
+def speak_date(value: str) -> str:
+    """'2025-01-09' -> 'Thursday, January 9th'"""
+    try:
+        d = date.fromisoformat(str(value))
+    except ValueError:
+        return str(value)
+    return f"{d.strftime('%A')}, {d.strftime('%B')} {ordinal(d.day)}"
+
+def speak_time(value: str) -> str:
+    """'19:00' -> '7 PM', '19:30' -> '7:30 PM', '12:00' -> 'noon'"""
+    match = re.match(r"^(\d{1,2}):(\d{2})", str(value))
+    if not match: return str(value)
+    hour, minute = int(match.group(1)), int(match.group(2))
+    if (hour, minute) == (12, 0): return "noon"
+    meridiem = "PM" if hour >= 12 else "AM"
+    hour = hour % 12 or 12
+    return f"{hour} {meridiem}" if minute == 0 else f"{hour}:{minute:02d} {meridiem}"
+
+def speak_phone(value: str) -> str:
+    """Group digits so TTS reads a number, not 'seven billion...' (see persona rule 5)."""
+    digits = re.sub(r"\D", "", str(value))
+    if len(digits) == 10:
+        return f"{digits[:3]}-{digits[3:6]}-{digits[6:]}"
+    if len(digits) > 10:
+        return f"{digits[:-10]} {digits[-10:-7]}-{digits[-7:-4]}-{digits[-4:]}"
+    return digits
+
+def slot_values(data: Dict) -> Dict:
+    return {
+        "name": data.get("name") or "Guest",
+        "phone": speak_phone(data.get("phone") or ""),
+        "party_size": data.get("party_size"),
+        "date": speak_date(data.get("date")) if data.get("date") else "",
+        "time": speak_time(data.get("time")) if data.get("time") else "",
+    }
+
+# ==================== ENGINE ====================
+def _acknowledgement(extracted: Dict, slots: Dict) -> str:
+    details = []
+    if extracted.get("party_size"): details.append(f"a table for {slots['party_size']}")
+    if extracted.get("date"): details.append(f"on {slots['date']}" if details else slots["date"])
+    if extracted.get("time"): details.append(f"at {slots['time']}" if details else f"{slots['time']} it is")
+    if details:
+        return random.choice(ACK_BOOKING).format(details=" ".join(details))
+    if extracted.get("name"):
+        return random.choice(ACK_NAME).format(**slots)
+    if extracted.get("phone"):
+        return random.choice(ACK_PHONE).format(**slots)
+    return random.choice(ACK_GENERIC)
+
+def render_template_response(intent: str, collected_data: Dict, extracted: Optional[Dict], last_user_text: str = "") -> Optional[str]:
+    """
+    Render Riya's reply without the LLM for on-script turns.
+    Returns None when the turn needs the LLM (question, special request,
+    nothing was answered, or an intent without a template).
+    """
+    extracted = {k: v for k, v in (extracted or {}).items() if v not in (None, "")}
+
+    # Off-script: caller asked something or wants something we can't template
+    if "?" in (last_user_text or "") or extracted.get("special_requests"):
+        return None
+
+    slots = slot_values(collected_data)
+
+    if intent == "welcome":
+        # A plain "hello" gets the stock greeting; anything richer deserves a real acknowledgement
+        return None if extracted else PHRASES["greeting"]
+
+    if intent in CONFIRMATIONS:
+        if not all(collected_data.get(k) for k in ("party_size", "date", "time")): return None
+        return CONFIRMATIONS[intent].format(**slots)
+
+    if intent == "unavailable":
+        return UNAVAILABLE
+
+    if intent in ASKS:
+        # Nothing answered -> the caller said something we didn't anticipate
+        if not extracted: return None
+        return f"{_acknowledgement(extracted, slots)} {random.choice(ASKS[intent])}"
+
+    return None
+
+def static_template_lines() -> List[str]:
+    """Every slot-free line the engine can emit (worth pre-rendering)."""
+    lines = [line for variants in ASKS.values() for line in variants]
+    return lines + ACK_GENERIC + [UNAVAILABLE]
@@ -0,0 +1,113 @@
+import os
+import time
+import struct
+from typing import Dict, List
+
+import numpy as np
+
+from core.embeddings import get_embedder
+from core.metrics import metrics
+
+# ==================== CONFIG ====================
+# "massive":   whole persona + project_chunks.txt in every researcher prompt (original behaviour)
+# "retrieval": persona + the RESEARCH_TOP_K most relevant chunks from faiss_index.bin
+RESEARCH_CONTEXT_MODE = os.environ.get("RESEARCH_CONTEXT_MODE", "massive")
+RESEARCH_TOP_K = int(os.environ.get("RESEARCH_TOP_K", "3"))
+FAISS_INDEX_FILE = os.environ.get("FAISS_INDEX_FILE", "faiss_index.bin")
+CHUNK_STORE_FILE = os.environ.get("CHUNK_STORE_FILE", "chunk_store.bin")
+
+# ==================== CHUNK STORE ====================
+# Binary id -> text map written next to the index by create_vector_store.py.
+# Layout: magic, uint32 count, then per chunk (int64 id, uint32 length, utf-8 bytes), in document order.
+CHUNK_STORE_MAGIC = b"CHK1"
+
+def atomic_write(path: str, data: bytes):
+    """Readers see the old file or the new one, never a half-written one."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def write_chunk_store(path: str, chunks: Dict[int, str]):
+    parts = [CHUNK_STORE_MAGIC, struct.pack("<I", len(chunks))]
+    for chunk_id, text in chunks.items():
+        data = text.encode("utf-8")
+        parts.append(struct.pack("<qI", chunk_id, len(data)) + data)
+    atomic_write(path, b"".join(parts))
+
+def read_chunk_store(path: str) -> Dict[int, str]:
+    with open(path, "rb") as f:
+        blob = f.read()
+    if blob[:4] != CHUNK_STORE_MAGIC:
+        raise ValueError(f"{path} is not a chunk store")
+    (count,), offset, chunks = struct.unpack_from("<I", blob, 4), 8, {}
+    for _ in range(count):
+        chunk_id, length = struct.unpack_from("<qI", blob, offset)
+        offset += 12
+        chunks[chunk_id] = blob[offset:offset + length].decode("utf-8")
+        offset += length
+    return chunks
+
+class ChunkRetriever:
+    """
+    Top-k search over the index built by create_vector_store.py.
+    The index is memory-mapped (pages shared across workers, no load-time copy).
+    Needs faiss + sentence-transformers; without them ready stays False and the
+    researcher keeps using the massive context.
+    """
+
+    def __init__(self, index_path: str = FAISS_INDEX_FILE, store_path: str = CHUNK_STORE_FILE):
+        self.index_path = index_path
+        self.store_path = store_path
+        self.index = None
+        self.chunks: Dict[int, str] = {}  # Index id -> chunk text
+        self.embedder = None
+        self._attempted = False  # Don't retry (and re-log) a failed load on every question
+
+    @property
+    def ready(self) -> bool:
+        return self.index is not None
+
+    def load(self) -> bool:
+        if self.ready or self._attempted:
+            return self.ready
+        self._attempted = True
+        try:
+            import faiss  # Optional dependency (only needed for retrieval mode)
+        except ImportError:
+            print("⚠️ faiss not installed. Retrieval mode disabled.")
+            return False
+        try:
+            try:
+                index = faiss.read_index(self.index_path, faiss.IO_FLAG_MMAP)
+            except RuntimeError:
+                index = faiss.read_index(self.index_path)  # Index type without mmap support
+            chunks = read_chunk_store(self.store_path)
+        except Exception as e:
+            print(f"❌ Could not load vector store: {e}")
+            return False
+
+        if len(chunks) != index.ntotal:
+            print(f"⚠️ {self.store_path} has {len(chunks)} chunks but the index has {index.ntotal}. Re-run create_vector_store.py. Retrieval disabled.")
+            return False
+        embedder = get_embedder("minilm")  # Must be the model the index was built with
+        if embedder.name != "minilm" or embedder.dim != index.d:
+            print("⚠️ Query embedder doesn't match the index. Retrieval disabled.")
+            return False
+
+        self.index, self.chunks, self.embedder = index, chunks, embedder
+        print(f"✅ Vector store loaded: {index.ntotal} chunks (dim {index.d}).")
+        return True
+
+    def search(self, query: str, k: int = RESEARCH_TOP_K) -> List[str]:
+        """Most relevant chunks first. Blocking (model inference): call via asyncio.to_thread."""
+        started = time.perf_counter()
+        vector = np.ascontiguousarray(self.embedder.encode([query]), dtype=np.float32)
+        _, ids = self.index.search(vector, min(k, self.index.ntotal))
+        metrics.observe("retrieval.search_ms", (time.perf_counter() - started) * 1000)
+        return [self.chunks[int(i)] for i in ids[0] if int(i) in self.chunks]
+
+# Singleton instance
+chunk_retriever = ChunkRetriever()
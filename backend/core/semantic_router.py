@@ -0,0 +1,79 @@
+import os
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.embeddings import get_embedder
+from core.metrics import metrics
+
+# ==================== CONFIG ====================
+# (accept, reject, margin) per embedder. Hashed n-grams only see shared words, not meaning:
+# "Which tech stack do you hate?" scores 0.63 against "tech stack", so hashing only accepts
+# near-verbatim triggers and leaves paraphrases to the LLM router.
+_DEFAULT_THRESHOLDS = {"hashing": (0.85, 0.30, 0.15), "minilm": (0.75, 0.45, 0.05)}
+
+# "How did you...", "Why did you..." ask for a process/story -> never served from cache without the LLM's say-so
+PROCESS_QUESTION = re.compile(r"^\s*(how|why|explain|describe|walk me through)\b", re.IGNORECASE)
+
+class SemanticRouter:
+    """
+    In-process intent classifier over cache_manager.trigger_map.
+    Triggers are embedded once into a matrix; a query is one matrix-vector product.
+    route() returns (slug, score) for a confident match, ('research', score) for a
+    clear miss, or (None, score) in the ambiguous band (caller asks the LLM).
+    """
+
+    def __init__(self, embedder=None):
+        self.embedder = embedder or get_embedder()
+        accept, reject, margin = _DEFAULT_THRESHOLDS.get(self.embedder.name, _DEFAULT_THRESHOLDS["hashing"])
+        self.accept = float(os.environ.get("ROUTER_ACCEPT_THRESHOLD", accept))
+        self.reject = float(os.environ.get("ROUTER_REJECT_THRESHOLD", reject))
+        self.margin = float(os.environ.get("ROUTER_MIN_MARGIN", margin))  # Best slug must beat the runner-up by this much
+        self.matrix: Optional[np.ndarray] = None  # (n_triggers, dim), rows L2-normalised
+        self.labels = np.zeros(0, dtype=np.int32)  # Row -> index into self.slugs
+        self.slugs: List[str] = []
+
+    @property
+    def ready(self) -> bool:
+        return self.matrix is not None and len(self.slugs) > 0
+
+    def fit(self, trigger_map: Dict[str, List[str]]):
+        rows, labels, slugs = [], [], []
+        for slug, triggers in trigger_map.items():
+            # The slug itself ("tech stack") is a useful trigger too
+            phrases = [t for t in (triggers or []) if t and t.strip()] + [slug.replace("_", " ")]
+            slugs.append(slug)
+            rows += phrases
+            labels += [len(slugs) - 1] * len(phrases)
+        if not rows:
+            return
+        started = time.perf_counter()
+        self.matrix = self.embedder.encode(rows)
+        self.labels = np.asarray(labels, dtype=np.int32)
+        self.slugs = slugs
+        print(f"🧭 Semantic router ready: {len(rows)} triggers / {len(slugs)} intents ({self.embedder.name}, {(time.perf_counter() - started) * 1000:.0f} ms)")
+
+    def scores(self, text: str) -> np.ndarray:
+        """Best trigger similarity per slug."""
+        sims = self.matrix @ self.embedder.encode([text])[0]
+        per_slug = np.full(len(self.slugs), -1.0, dtype=np.float32)
+        np.maximum.at(per_slug, self.labels, sims)
+        return per_slug
+
+    def route(self, text: str) -> Tuple[Optional[str], float]:
+        per_slug = self.scores(text)
+        order = np.argsort(per_slug)[::-1]
+        best = float(per_slug[order[0]])
+        runner_up = float(per_slug[order[1]]) if len(order) > 1 else -1.0
+        metrics.observe("router.best_score", round(best, 3))
+
+        if best < self.reject:
+            return "research", best
+        if best >= self.accept and best - runner_up >= self.margin and not PROCESS_QUESTION.match(text):
+            return self.slugs[order[0]], best
+        return None, best
+
+# Singleton: fitted once in a worker thread (see ai_services.start_semantic_router)
+semantic_router = SemanticRouter()
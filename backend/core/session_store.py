@@ -0,0 +1,168 @@
+import os
+import copy
+import time
+import asyncio
+from datetime import datetime
+from typing import Optional, Dict
+
+from core.database import SessionManager
+from core.metrics import metrics
+
+# ==================== CONFIG ====================
+# "turn"    -> every update_state is written through before the turn returns
+# "batched" -> writes are coalesced and flushed at most SESSION_FLUSH_DELAY_S later
+SESSION_DURABILITY = os.environ.get("SESSION_DURABILITY", "batched").lower()
+SESSION_FLUSH_DELAY_S = float(os.environ.get("SESSION_FLUSH_DELAY_S", "2.0"))
+SESSION_RETRY_MAX_S = float(os.environ.get("SESSION_RETRY_MAX_S", "60"))  # Backoff cap for failed flushes
+SESSION_TTL_S = float(os.environ.get("SESSION_TTL_S", "900"))  # Abandoned calls
+SESSION_SWEEP_INTERVAL_S = 60
+
+class SessionStore:
+    """
+    Write-behind cache in front of `conversation_state`.
+    Hot sessions live in RAM keyed by session_id/phone; reads never touch the DB
+    after the first load, writes are coalesced and flushed in the background.
+    """
+
+    def __init__(self, durability: str = SESSION_DURABILITY, flush_delay: float = SESSION_FLUSH_DELAY_S, ttl: float = SESSION_TTL_S):
+        self.durability = durability
+        self.flush_delay = flush_delay
+        self.ttl = ttl
+        self._sessions: Dict[str, dict] = {}  # { key: {"row", "dirty", "touched", "timer", "lock", "failures"} }
+        self._flush_tasks = set()
+
+    # ---------- Internal ----------
+    async def _load(self, key: str) -> dict:
+        entry = self._sessions.get(key)
+        if entry:
+            metrics.incr("session_cache.hits")
+        else:
+            metrics.incr("session_cache.misses")
+            row = await SessionManager.get_state(key)
+            # Another coroutine may have populated the entry while we were awaiting
+            entry = self._sessions.setdefault(key, {
+                "row": row, "dirty": False, "timer": None, "lock": asyncio.Lock()
+            })
+            metrics.gauge("session_cache.size", len(self._sessions))
+        entry["touched"] = time.monotonic()
+        return entry
+
+    def _schedule_flush(self, key: str, entry: dict, delay: Optional[float] = None):
+        if entry["timer"]: return  # Already queued -> coalesce into that flush
+        loop = asyncio.get_running_loop()
+        entry["timer"] = loop.call_later(self.flush_delay if delay is None else delay, self._spawn_flush, key)
+
+    def _spawn_flush(self, key: str):
+        task = asyncio.create_task(self.flush(key))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    # ---------- Public API (mirrors SessionManager) ----------
+    async def get_state(self, key: str) -> Optional[dict]:
+        """Served from RAM; callers get a private copy they may mutate freely."""
+        if not key: return None
+        entry = await self._load(key)
+        return copy.deepcopy(entry["row"])
+
+    async def update_state(self, key: str, step: str, data: dict = None):
+        """Merge into the cached row and queue (or perform) the DB write. Returns the merged state."""
+        if not key: return None
+        entry = self._sessions.get(key)
+
+        if entry is None:
+            # Cold key: the upsert both writes and hands back the merged row, no read needed
+            metrics.incr("session_cache.misses")
+            row = await SessionManager.update_state(key, step, data)
+            if row:
+                self._sessions[key] = {
+                    "row": row, "dirty": False, "timer": None, "lock": asyncio.Lock(), "touched": time.monotonic()
+                }
+                metrics.gauge("session_cache.size", len(self._sessions))
+                return copy.deepcopy(row)
+            entry = await self._load(key)
+        else:
+            metrics.incr("session_cache.hits")
+            entry["touched"] = time.monotonic()
+
+        row = copy.deepcopy(entry["row"]) if entry["row"] else {"phone": key, "collected_data": {}}
+        row["current_step"] = step
+        row["last_interaction"] = datetime.now().isoformat()
+        if data:
+            merged = row.get("collected_data") or {}
+            merged.update(copy.deepcopy(data))
+            row["collected_data"] = merged
+
+        entry["row"] = row
+        entry["dirty"] = True
+
+        if self.durability == "turn":
+            await self.flush(key)
+        else:
+            self._schedule_flush(key, entry)
+        return copy.deepcopy(row)
+
+    async def clear_session(self, key: str):
+        """Drop the session locally and in the DB (after booking / on new call)."""
+        if not key: return
+        entry = self._sessions.pop(key, None)
+        # Remember the session is gone so the next read does not hit the DB
+        self._sessions[key] = {
+            "row": None, "dirty": False, "timer": None, "lock": asyncio.Lock(), "touched": time.monotonic()
+        }
+        if entry is None:
+            await SessionManager.clear_session(key)
+            return
+        # An in-flight flush of the old row must land before the delete, or it would resurrect it
+        async with entry["lock"]:
+            if entry["timer"]:
+                entry["timer"].cancel()
+                entry["timer"] = None
+            entry["row"], entry["dirty"] = None, False  # Flushes already waiting on the lock become no-ops
+            await SessionManager.clear_session(key)
+
+    async def flush(self, key: str):
+        """Write a dirty session through to `conversation_state`."""
+        entry = self._sessions.get(key)
+        if not entry: return
+        async with entry["lock"]:
+            if entry["timer"]:
+                entry["timer"].cancel()
+                entry["timer"] = None
+            if not entry["dirty"] or not entry["row"]: return
+
+            row = entry["row"]
+            entry["dirty"] = False
+            start = time.perf_counter()
+            saved = await SessionManager.update_state(key, row.get("current_step", "active"), row.get("collected_data") or {})
+            metrics.observe("session_cache.flush_ms", (time.perf_counter() - start) * 1000)
+            if saved is None:
+                metrics.incr("session_cache.flush_failures")
+                if entry["row"] is row:
+                    entry["dirty"] = True
+                entry["failures"] = entry.get("failures", 0) + 1
+                if self._sessions.get(key) is entry and entry["dirty"]:
+                    # Retry with backoff even if nothing else touches the session
+                    delay = min(self.flush_delay * 2 ** entry["failures"], SESSION_RETRY_MAX_S)
+                    self._schedule_flush(key, entry, delay)
+            else:
+                entry["failures"] = 0
+                metrics.incr("session_cache.flushes")
+
+    async def flush_all(self):
+        await asyncio.gather(*(self.flush(key) for key in list(self._sessions)))
+
+    async def evict_idle(self):
+        """Background sweeper: flush and forget sessions idle longer than the TTL."""
+        while True:
+            await asyncio.sleep(SESSION_SWEEP_INTERVAL_S)
+            cutoff = time.monotonic() - self.ttl
+            for key, entry in list(self._sessions.items()):
+                if entry.get("touched", 0) >= cutoff: continue
+                await self.flush(key)
+                if self._sessions.get(key) is entry and not entry["dirty"]:
+                    del self._sessions[key]
+                    metrics.incr("session_cache.evictions")
+            metrics.gauge("session_cache.size", len(self._sessions))
+
+# Singleton instance
+session_store = SessionStore()
@@ -0,0 +1,181 @@
+import os
+import io
+import time
+import asyncio
+from typing import AsyncIterator, Dict, Optional
+
+from openai import AsyncOpenAI
+from gtts import gTTS
+
+from core.metrics import metrics
+from core.phrase_cache import phrase_cache
+from core.tts_cache import tts_cache
+from core.audio_assembly import fragment_assembler, prepare_fragment, MAX_TTS_GAPS
+from core.audio_codec import encode_audio
+from core.groq_pool import get_groq_pool
+from core.rate_limiter import Lane, estimate_tokens
+from core.turn_context import within_budget
+
+# ==================== CONFIG ====================
+TTS_MODEL = "canopylabs/orpheus-v1-english"
+TTS_VOICE = "autumn"
+TTS_CHUNK_BYTES = int(os.environ.get("TTS_CHUNK_BYTES", "4096"))  # Streamed TTS read size
+
+_OVER_BUDGET = object()  # The turn's TTS budget ran out: not a provider failure, don't fall back to gTTS
+
+# ==================== STREAM HELPERS ====================
+async def _audio_once(audio: bytes) -> AsyncIterator[bytes]:
+    yield audio
+
+class _Primed:
+    """First chunk already read, then the rest; closing it closes the provider stream too."""
+
+    def __init__(self, first: bytes, rest):
+        self.first, self.rest = first, rest
+
+    def __aiter__(self):
+        return self._chunks()
+
+    async def _chunks(self) -> AsyncIterator[bytes]:
+        try:
+            yield self.first
+            async for chunk in self.rest:
+                yield chunk
+        finally:
+            await self.rest.aclose()
+
+    async def aclose(self):
+        # Works even if iteration never started (a discarded hedge loser)
+        await self.rest.aclose()
+
+async def read_audio(stream: AsyncIterator[bytes]) -> bytes:
+    """Drain a TTS stream into one clip (the browser plays one WAV per WebSocket message)."""
+    return b"".join([chunk async for chunk in stream])
+
+# ==================== PROVIDERS ====================
+async def _stream_groq_tts(client: AsyncOpenAI, text: str) -> AsyncIterator[bytes]:
+    """Yields the provider's audio as it arrives; the complete clip is teed into the TTS cache."""
+    parts = []
+    async with client.audio.speech.with_streaming_response.create(
+        model=TTS_MODEL,
+        voice=TTS_VOICE,
+        response_format="wav",
+        input=text
+    ) as response:
+        async for chunk in response.iter_bytes(chunk_size=TTS_CHUNK_BYTES):
+            parts.append(chunk)
+            yield chunk
+    await tts_cache.put(text, TTS_VOICE, TTS_MODEL, b"".join(parts))  # Only complete clips are cached
+
+async def _open_groq_tts(client: AsyncOpenAI, text: str) -> AsyncIterator[bytes]:
+    # Connection/HTTP errors surface on the first chunk -> the pool can still fail over to another key
+    stream = _stream_groq_tts(client, text)
+    first = await stream.__anext__()
+    return _Primed(first, stream)
+
+async def _groq_tts(text: str, lane: Lane):
+    """Audio stream, or _OVER_BUDGET if the turn's TTS budget ran out first. Provider errors raise."""
+    # Waits for TPM budget (up to the lane's deadline) instead of dropping the line
+    pool = get_groq_pool()
+    return await within_budget("tts", pool.call(
+        lambda client: _open_groq_tts(client, text),
+        kind="tts", attempts=len(pool.clients), cost=estimate_tokens(text), lane=lane
+    ), fallback=lambda: _OVER_BUDGET)
+
+def _gtts_audio(text: str) -> bytes:
+    # Blocking network call + encode: always run in a worker thread
+    tts = gTTS(text=text, lang='en', slow=False)
+    fp = io.BytesIO()
+    tts.write_to_fp(fp)
+    return fp.getvalue()
+
+# ==================== SYNTHESIS ====================
+async def _get_encoded_speech(text: str, audio_format: str, lane: Lane) -> Optional[AsyncIterator[bytes]]:
+    """Compressed clip: cached per format, else synthesise WAV and encode it off the event loop."""
+    cached = await tts_cache.get(text, TTS_VOICE, TTS_MODEL, audio_format)
+    if cached:
+        return _audio_once(cached)
+    stream = await get_speech_from_text(text, lane=lane)
+    if not stream: return None
+    wav = await read_audio(stream)
+    encoded = await encode_audio(wav, audio_format)
+    if not encoded:
+        return _audio_once(wav)  # Browsers sniff the container, so WAV still plays
+    if wav[:4] == b"RIFF":  # gTTS fallback (MP3, other voice) must not be cached as Riya
+        await tts_cache.put(text, TTS_VOICE, TTS_MODEL, encoded, audio_format)
+    return _audio_once(encoded)
+
+async def _synthesise_gaps(plan: list, lane: Lane) -> Optional[Dict[str, bytes]]:
+    """Trimmed Groq audio for the plan's uncovered words (names); None if any can't be had in Riya's voice,
+    _OVER_BUDGET if the turn ran out of time."""
+    synthesised = {}
+    for words, _, synth in plan:
+        if not synth or words in synthesised: continue
+        audio = await tts_cache.get(words, TTS_VOICE, TTS_MODEL)  # Returning callers: name already rendered
+        if not audio:
+            try:
+                stream = await _groq_tts(words, lane)
+                if stream is _OVER_BUDGET: return _OVER_BUDGET
+                audio = await read_audio(stream) if stream else None
+            except Exception as e:
+                print(f"⚠️ TTS for '{words}' failed: {e}")
+                return None
+        audio = prepare_fragment(audio) if audio else None
+        if not audio: return None  # gTTS would switch voices mid-sentence: use whole-line TTS instead
+        synthesised[words] = audio
+    return synthesised
+
+def _over_budget(text: str) -> None:
+    # A late clause in another voice is worse than a skipped one: the turn moves on
+    metrics.incr("tts.served.over_budget")
+    print(f"⏱️ TTS budget spent; skipping audio for '{text}'.")
+    return None
+
+async def get_speech_from_text(text: str, audio_format: str = "wav", lane: Lane = Lane.DIALOGUE) -> Optional[AsyncIterator[bytes]]:
+    """Async byte stream of Riya saying `text` (None if every TTS path failed)."""
+    if audio_format != "wav":
+        return await _get_encoded_speech(text, audio_format, lane)
+
+    # Fixed phrases come pre-rendered from the phrase pack: no network, no TPM budget
+    cached = phrase_cache.get(text, TTS_MODEL, TTS_VOICE)
+    if cached:
+        metrics.incr("tts.served.phrase_pack")
+        return _audio_once(cached)
+
+    # Generated lines repeat a lot across callers; a whole-line hit needs no gap synthesis either
+    cached = await tts_cache.get(text, TTS_VOICE, TTS_MODEL)
+    if cached:
+        metrics.incr("tts.served.cache")
+        return _audio_once(cached)
+
+    # Confirmations/acks made of known fragments (numbers, days, times, stock phrases);
+    # the caller's name is synthesised on its own and stitched in
+    plan = fragment_assembler.plan(text, TTS_MODEL, TTS_VOICE, max_gaps=MAX_TTS_GAPS)
+    if plan:
+        synthesised = await _synthesise_gaps(plan, lane)
+        if synthesised is _OVER_BUDGET: return _over_budget(text)
+        audio = await asyncio.to_thread(fragment_assembler.assemble, plan, synthesised) if synthesised is not None else None
+        if audio:
+            metrics.incr("tts.served.assembled")
+            return _audio_once(audio)
+
+    print(f"🎙️ TTS: '{text}' ({len(text)} chars, ~{estimate_tokens(text)} tokens)")
+    try:
+        started = time.perf_counter()
+        audio = await _groq_tts(text, lane)
+        if audio is _OVER_BUDGET: return _over_budget(text)
+        if audio:
+            metrics.observe("tts.first_chunk_ms", (time.perf_counter() - started) * 1000)
+            metrics.incr("tts.served.groq")
+            return audio
+    except Exception as e:
+        print(f"❌ Groq TTS failed on every key: {e}")
+
+    # Only a real provider failure with time left is worth a blocking round trip in another voice
+    print("⚠️ Falling back to gTTS.")
+    try:
+        metrics.incr("tts.served.gtts")
+        return _audio_once(await asyncio.to_thread(_gtts_audio, text))  # gTTS output is never cached
+    except Exception as e:
+        print(f"❌ FINAL FALLBACK FAILED: gTTS error: {e}")
+        return None
@@ -0,0 +1,150 @@
+import io
+import os
+import time
+import wave
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+import numpy as np
+
+from core.metrics import metrics
+from core.rate_limiter import Lane
+
+# ==================== CONFIG ====================
+STREAM_SAMPLE_RATE = 16000                                                  # PCM16 mono from the browser
+STT_BUFFER_S = float(os.environ.get("STT_BUFFER_S", "30"))                  # Ring buffer capacity
+STT_PARTIAL_INTERVAL_S = float(os.environ.get("STT_PARTIAL_INTERVAL_S", "1.0"))  # New audio needed before re-transcribing
+STT_WINDOW_S = float(os.environ.get("STT_WINDOW_S", "10"))                  # Longest span sent to Whisper at once
+# Partials share the 20 RPM STT bucket with every caller's final transcript: bounded per utterance
+STT_MAX_PARTIALS = int(os.environ.get("STT_MAX_PARTIALS", "6"))
+SILENCE_RMS = 300  # int16 RMS below this counts as "nothing new was said"
+
+def pcm_to_wav(samples: np.ndarray, sample_rate: int) -> bytes:
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(samples.astype("<i2").tobytes())
+    return buf.getvalue()
+
+class RingBuffer:
+    """Fixed-size int16 buffer addressed by absolute sample index (oldest audio is overwritten)."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=np.int16)
+        self.written = 0  # Total samples ever appended
+
+    @property
+    def oldest(self) -> int:
+        return max(0, self.written - self.capacity)
+
+    def append(self, samples: np.ndarray):
+        if len(samples) >= self.capacity:
+            self.written += len(samples) - self.capacity
+            samples = samples[-self.capacity:]
+        start = self.written % self.capacity
+        first = min(len(samples), self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        self._data[:len(samples) - first] = samples[first:]
+        self.written += len(samples)
+
+    def read(self, start: int, end: int) -> np.ndarray:
+        """Samples [start, end) by absolute index, clamped to what's still buffered."""
+        start, end = max(start, self.oldest), min(end, self.written)
+        if end <= start:
+            return np.zeros(0, dtype=np.int16)
+        idx = np.arange(start, end) % self.capacity
+        return self._data[idx]
+
+class StreamingTranscriber:
+    """
+    Transcribes an utterance while it's still being spoken.
+    feed() PCM16 frames; a partial transcript of the uncommitted window is refreshed
+    every STT_PARTIAL_INTERVAL_S of new audio (at most STT_MAX_PARTIALS times, in the
+    BACKGROUND lane so finals queue ahead of them). finish() at end-of-utterance only has
+    to cover what arrived after the last partial (often just silence -> reuse it as-is).
+    """
+
+    def __init__(self, transcribe: Callable[[bytes, Lane], Awaitable[str]], sample_rate: int = STREAM_SAMPLE_RATE):
+        self.transcribe = transcribe  # (wav bytes, lane) -> text (get_text_from_speech)
+        self.sample_rate = sample_rate
+        self.buffer = RingBuffer(int(STT_BUFFER_S * sample_rate))
+        self.committed_text = ""      # Transcript of audio before committed_at (final)
+        self.committed_at = 0
+        self.partial_text = ""        # Transcript of [committed_at, partial_at)
+        self.partial_at = 0
+        self.partials = 0             # Partial requests started for this utterance
+        self._inflight: Optional[asyncio.Task] = None
+
+    # ---------- Ingestion ----------
+    def feed(self, frame: bytes):
+        if len(frame) % 2: frame = frame[:-1]
+        self.buffer.append(np.frombuffer(frame, dtype="<i2"))
+        new_audio = self.buffer.written - self.partial_at
+        if self._inflight is None and self.partials < STT_MAX_PARTIALS and new_audio >= STT_PARTIAL_INTERVAL_S * self.sample_rate:
+            self.partials += 1
+            self._inflight = asyncio.create_task(self._partial(self.buffer.written))
+
+    @property
+    def text(self) -> str:
+        return " ".join(t for t in (self.committed_text, self.partial_text) if t)
+
+    # ---------- Rolling window ----------
+    def _quietest_cut(self, start: int, end: int) -> int:
+        """Where to slide the window: the quietest 100 ms in its last 2 s (least likely mid-word)."""
+        step = self.sample_rate // 10
+        tail_start = max(start, end - 2 * self.sample_rate)
+        tail = self.buffer.read(tail_start, end).astype(np.float32)
+        if len(tail) < step:
+            return end
+        energy = np.convolve(tail ** 2, np.ones(step), mode="valid")
+        return tail_start + int(np.argmin(energy)) + step // 2
+
+    async def _transcribe_span(self, start: int, end: int, lane: Lane) -> str:
+        started = time.perf_counter()
+        text = await self.transcribe(pcm_to_wav(self.buffer.read(start, end), self.sample_rate), lane)
+        metrics.observe("stt.request_ms", (time.perf_counter() - started) * 1000)
+        return text or ""
+
+    async def _partial(self, end: int):
+        try:
+            start = max(self.committed_at, self.buffer.oldest)
+            window = int(STT_WINDOW_S * self.sample_rate)
+            if end - start > window:
+                # Window is full: freeze everything up to a quiet point and start a new window there
+                cut = self._quietest_cut(start, start + window)
+                self.committed_text = " ".join(t for t in (self.committed_text, await self._transcribe_span(start, cut, Lane.BACKGROUND)) if t)
+                self.committed_at = start = cut
+            self.partial_text = await self._transcribe_span(start, end, Lane.BACKGROUND)
+            self.partial_at = end
+            metrics.incr("stt.partials")
+        except Exception as e:
+            print(f"⚠️ Partial transcription failed: {e}")
+        finally:
+            self._inflight = None
+
+    def _is_silent(self, start: int, end: int) -> bool:
+        tail = self.buffer.read(start, end).astype(np.float32)
+        return len(tail) == 0 or float(np.sqrt(np.mean(tail ** 2))) < SILENCE_RMS
+
+    # ---------- End of utterance ----------
+    async def finish(self) -> str:
+        """Final transcript, as soon as possible after end-of-utterance."""
+        started = time.perf_counter()
+        if self._inflight:
+            await self._inflight
+        end = self.buffer.written
+        if end == self.partial_at or self._is_silent(self.partial_at, end):
+            metrics.incr("stt.partial_reused")  # Nothing new was said since the last partial
+        else:
+            start = max(self.committed_at, self.buffer.oldest)
+            self.partial_text = await self._transcribe_span(start, end, Lane.DIALOGUE)
+            self.partial_at = end
+        metrics.observe("stt.finalise_ms", (time.perf_counter() - started) * 1000)
+        return self.text.strip()
+
+    def cancel(self):
+        if self._inflight:
+            self._inflight.cancel()
@@ -0,0 +1,125 @@
+import os
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Optional
+
+from core.metrics import metrics
+from core.phrase_cache import normalise_phrase
+
+# ==================== CONFIG ====================
+TTS_CACHE_MAX_BYTES = int(os.environ.get("TTS_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+# Optional disk tier: survives restarts and is shared by every worker on the host
+TTS_CACHE_DIR = os.environ.get("TTS_CACHE_DIR", "")
+TTS_CACHE_DISK_MAX_BYTES = int(os.environ.get("TTS_CACHE_DISK_MAX_BYTES", str(512 * 1024 * 1024)))
+
+def tts_cache_key(text: str, voice: str, model: str, audio_format: str = "wav") -> str:
+    """Content address: same words + same voice/model/format -> same audio."""
+    raw = f"{model}|{voice}|{audio_format}|{normalise_phrase(text)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class TTSCache:
+    """Byte-bounded in-memory LRU of synthesised audio, backed by an optional disk tier."""
+
+    def __init__(self, max_bytes: int = TTS_CACHE_MAX_BYTES, disk_dir: str = TTS_CACHE_DIR, disk_max_bytes: int = TTS_CACHE_DISK_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._lru = OrderedDict()  # { key: audio_bytes }, oldest first
+        self._bytes = 0
+        self._disk_writes = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    # ---------- Memory tier ----------
+    def _remember(self, key: str, audio: bytes):
+        if len(audio) > self.max_bytes // 4: return  # One giant answer shouldn't flush the cache
+        if key in self._lru:
+            self._bytes -= len(self._lru.pop(key))
+        self._lru[key] = audio
+        self._bytes += len(audio)
+        while self._bytes > self.max_bytes and self._lru:
+            _, evicted = self._lru.popitem(last=False)
+            self._bytes -= len(evicted)
+            metrics.incr("tts_cache.evictions")
+        metrics.gauge("tts_cache.memory_bytes", self._bytes)
+
+    # ---------- Disk tier ----------
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.audio")
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+            os.utime(path)  # mtime doubles as the disk LRU clock
+            return audio
+        except OSError:
+            return None
+
+    def _write_disk(self, key: str, audio: bytes):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # tmp + rename: other workers never observe a half-written file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(audio)
+        os.replace(tmp_path, path)
+        self._disk_writes += 1
+        if self._disk_writes % 50 == 0:
+            self._prune_disk()
+
+    def _prune_disk(self):
+        files = []
+        for root, _, names in os.walk(self.disk_dir):
+            for name in names:
+                if not name.endswith(".audio"): continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                    files.append((stat.st_mtime, stat.st_size, path))
+                except OSError:
+                    continue
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.disk_max_bytes: break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    # ---------- Public API ----------
+    async def get(self, text: str, voice: str, model: str, audio_format: str = "wav") -> Optional[bytes]:
+        key = tts_cache_key(text, voice, model, audio_format)
+        audio = self._lru.get(key)
+        if audio is not None:
+            self._lru.move_to_end(key)
+            metrics.incr("tts_cache.memory_hits")
+        elif self.disk_dir:
+            audio = await asyncio.to_thread(self._read_disk, key)
+            if audio is not None:
+                metrics.incr("tts_cache.disk_hits")
+                self._remember(key, audio)
+
+        if audio is None:
+            metrics.incr("tts_cache.misses")
+        else:
+            metrics.incr("tts_cache.hits")
+            metrics.incr("tts_cache.bytes_saved", len(audio))
+        metrics.gauge("tts_cache.hit_ratio", metrics.ratio("tts_cache.hits", "tts_cache.misses"))
+        return audio
+
+    async def put(self, text: str, voice: str, model: str, audio: bytes, audio_format: str = "wav"):
+        if not audio: return
+        key = tts_cache_key(text, voice, model, audio_format)
+        self._remember(key, audio)
+        if self.disk_dir:
+            try:
+                await asyncio.to_thread(self._write_disk, key, audio)
+            except OSError as e:
+                print(f"⚠️ TTS disk cache write failed: {e}")
+
+# Singleton instance
+tts_cache = TTSCache()
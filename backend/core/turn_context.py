@@ -0,0 +1,83 @@
+import os
+import time
+import asyncio
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from core.metrics import metrics
+
+# ==================== CONFIG ====================
+TURN_BUDGET_MS = float(os.environ.get("TURN_BUDGET_MS", "6000"))  # Caller stops speaking -> Riya starts answering
+# Relative share of the turn budget per stage. Stages that don't run (fast extraction,
+# templated replies) hand their share to the ones that do.
+STAGE_SHARES = {"stt": 0.25, "extract": 0.15, "generate": 0.35, "tts": 0.25}
+MIN_STAGE_S = float(os.environ.get("MIN_STAGE_S", "0.5"))  # Even an overdrawn turn gets a short last try
+
+class TurnContext:
+    """Deadline for one conversational turn, shared by every stage and Groq call in it."""
+
+    def __init__(self, budget_ms: float = TURN_BUDGET_MS):
+        self.budget_s = budget_ms / 1000
+        self.started = time.monotonic()
+        self.deadline = self.started + self.budget_s
+        self.stages_done = set()
+        self.spent: Dict[str, float] = {}   # Stage -> seconds
+        self.degraded = []                  # Stages that hit their budget and fell back
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - time.monotonic())
+
+    def stage_budget(self, stage: str) -> float:
+        """This stage's share of what's left, among the stages still to run."""
+        pending = sum(share for name, share in STAGE_SHARES.items() if name not in self.stages_done) or 1.0
+        share = min(1.0, STAGE_SHARES.get(stage, 0.0) / pending)
+        return max(MIN_STAGE_S, self.remaining() * share)
+
+    def report(self):
+        used = (time.monotonic() - self.started) / self.budget_s * 100
+        metrics.observe("turn.budget_used_pct", round(used, 1))
+        if self.degraded:
+            metrics.incr("turn.degraded")
+
+current_turn: contextvars.ContextVar[Optional[TurnContext]] = contextvars.ContextVar("current_turn", default=None)
+
+@contextmanager
+def use_turn(turn: Optional[TurnContext] = None, report: bool = True):
+    """Make `turn` the current turn for this task (and tasks it creates) for the block."""
+    turn = turn or TurnContext()
+    token = current_turn.set(turn)
+    try:
+        yield turn
+    finally:
+        current_turn.reset(token)
+        if report: turn.report()
+
+def turn_deadline() -> Optional[float]:
+    turn = current_turn.get()
+    return turn.deadline if turn else None
+
+async def within_budget(stage: str, awaitable: Awaitable, fallback: Callable[[], Any] = lambda: None):
+    """
+    Await a pipeline stage within its share of the turn budget.
+    On timeout the stage is cancelled and fallback() is returned instead of hanging.
+    Outside a turn the awaitable simply runs to completion.
+    """
+    turn = current_turn.get()
+    if turn is None:
+        return await awaitable
+    budget = turn.stage_budget(stage)
+    started = time.monotonic()
+    try:
+        return await asyncio.wait_for(awaitable, timeout=budget)
+    except asyncio.TimeoutError:
+        metrics.incr(f"turn.stage.{stage}.timeouts")
+        turn.degraded.append(stage)
+        print(f"⏱️ {stage} exceeded its {budget * 1000:.0f} ms budget; degrading.")
+        return fallback()
+    finally:
+        elapsed = time.monotonic() - started
+        turn.spent[stage] = turn.spent.get(stage, 0.0) + elapsed
+        turn.stages_done.add(stage)
+        metrics.observe(f"turn.stage.{stage}.ms", elapsed * 1000)
+        metrics.observe(f"turn.stage.{stage}.budget_pct", round(elapsed / budget * 100, 1))
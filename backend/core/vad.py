@@ -0,0 +1,156 @@
+import io
+import os
+import wave
+from collections import deque
+from typing import List
+
+import numpy as np
+
+from core.metrics import metrics
+
+# ==================== CONFIG ====================
+VAD_FRAME_MS = 20
+VAD_MARGIN_DB = float(os.environ.get("VAD_MARGIN_DB", "12"))           # Speech = this far above the noise floor
+VAD_MIN_SPEECH_MS = int(os.environ.get("VAD_MIN_SPEECH_MS", "120"))    # Shorter blips (clicks, coughs) aren't speech
+VAD_MIN_HANGOVER_MS = int(os.environ.get("VAD_MIN_HANGOVER_MS", "400"))
+VAD_MAX_HANGOVER_MS = int(os.environ.get("VAD_MAX_HANGOVER_MS", "1200"))
+VAD_PAD_MS = 150            # Audio kept either side of speech when trimming
+NOISE_ZCR = 0.35            # Hiss/fan noise: many zero crossings at low energy
+MIN_FLOOR_DB = 20.0         # Digital silence would otherwise drag the floor to -inf
+
+# ==================== FEATURES ====================
+def frame_features(samples: np.ndarray, frame_len: int):
+    """Per-frame energy (dB) and zero-crossing rate, vectorised over whole frames."""
+    n = len(samples) // frame_len
+    frames = samples[:n * frame_len].astype(np.float32).reshape(n, frame_len)
+    energy_db = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1.0)
+    zcr = np.mean(np.abs(np.diff(np.signbit(frames), axis=1)), axis=1)
+    return energy_db, zcr
+
+def is_speech(energy_db: np.ndarray, zcr: np.ndarray, floor_db: float) -> np.ndarray:
+    loud = energy_db > floor_db + VAD_MARGIN_DB
+    # High ZCR only counts as speech (fricatives) when it's clearly loud, not just above the floor
+    noisy = (zcr > NOISE_ZCR) & (energy_db < floor_db + 2 * VAD_MARGIN_DB)
+    return loud & ~noisy
+
+# ==================== OFFLINE TRIM ====================
+def speech_bounds(samples: np.ndarray, sample_rate: int):
+    """(start, end) sample indices of the speech in a clip, or None if nobody spoke."""
+    frame_len = sample_rate * VAD_FRAME_MS // 1000
+    if len(samples) < frame_len:
+        return None
+    energy_db, zcr = frame_features(samples, frame_len)
+    floor_db = max(MIN_FLOOR_DB, float(np.percentile(energy_db, 10)))  # Quietest frames ~ room noise
+    voiced = np.flatnonzero(is_speech(energy_db, zcr, floor_db))
+    if voiced.size * VAD_FRAME_MS < VAD_MIN_SPEECH_MS:
+        return None
+    pad = VAD_PAD_MS // VAD_FRAME_MS
+    start = max(0, voiced[0] - pad) * frame_len
+    end = len(samples) if voiced[-1] + pad + 1 >= len(energy_db) else (voiced[-1] + pad + 1) * frame_len
+    return start, end
+
+def trim_silence(samples: np.ndarray, sample_rate: int) -> np.ndarray:
+    """Cut leading/trailing non-speech. Returns an empty array if nobody spoke."""
+    bounds = speech_bounds(samples, sample_rate)
+    return samples[bounds[0]:bounds[1]] if bounds else samples[:0]
+
+def trim_wav(audio: bytes) -> bytes:
+    """
+    Trim silence from a PCM16 WAV before STT (shorter Whisper uploads).
+    Returns b"" if it holds no speech, or the input untouched if it isn't PCM16 WAV
+    (e.g. browser webm/opus blobs).
+    """
+    try:
+        with wave.open(io.BytesIO(audio), "rb") as w:
+            channels, width, rate = w.getnchannels(), w.getsampwidth(), w.getframerate()
+            frames = w.readframes(w.getnframes())
+    except (wave.Error, EOFError):
+        return audio
+    if width != 2:
+        return audio
+
+    samples = np.frombuffer(frames, dtype="<i2").reshape(-1, channels)
+    bounds = speech_bounds(samples.mean(axis=1), rate)
+    start, end = bounds or (0, 0)
+    metrics.observe("vad.trimmed_ms", (len(samples) - (end - start)) / rate * 1000)
+    if not bounds:
+        return b""
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(width)
+        w.setframerate(rate)
+        w.writeframes(samples[start:end].tobytes())
+    return buf.getvalue()
+
+# ==================== STREAMING ENDPOINTER ====================
+class VoiceActivityDetector:
+    """
+    Frame-level VAD for a live PCM16 stream with an adaptive noise floor.
+    process() returns events: "speech_start" and "end_of_utterance".
+    The hangover (silence needed to end a turn) adapts to how long this caller
+    pauses mid-sentence, between VAD_MIN_HANGOVER_MS and VAD_MAX_HANGOVER_MS.
+    """
+
+    def __init__(self, sample_rate: int):
+        self.sample_rate = sample_rate
+        self.frame_len = sample_rate * VAD_FRAME_MS // 1000
+        self._pending = np.zeros(0, dtype=np.int16)
+        self.floor_db = None
+        self.in_speech = False
+        self.speech_ms = 0
+        self.silence_ms = 0
+        self.pauses = deque(maxlen=20)  # Mid-utterance pauses (ms) that ended with more speech
+
+    @property
+    def hangover_ms(self) -> int:
+        if not self.pauses:
+            return (VAD_MIN_HANGOVER_MS + VAD_MAX_HANGOVER_MS) // 2
+        # Comfortably longer than this caller's typical thinking pause
+        typical = float(np.percentile(self.pauses, 90))
+        return int(min(VAD_MAX_HANGOVER_MS, max(VAD_MIN_HANGOVER_MS, typical * 1.5)))
+
+    def _update_floor(self, energy_db: np.ndarray, voiced: np.ndarray):
+        quiet = energy_db[~voiced]
+        if self.floor_db is None:
+            self.floor_db = max(MIN_FLOOR_DB, float(np.min(energy_db)))
+        elif quiet.size:
+            # Falls fast (quieter room found), rises slowly (so speech can't drag it up)
+            target = float(np.median(quiet))
+            rate = 0.5 if target < self.floor_db else 0.05
+            self.floor_db = max(MIN_FLOOR_DB, self.floor_db + rate * (target - self.floor_db))
+
+    def process(self, frame: bytes) -> List[str]:
+        if len(frame) % 2: frame = frame[:-1]
+        self._pending = np.concatenate([self._pending, np.frombuffer(frame, dtype="<i2")])
+        n = len(self._pending) // self.frame_len
+        if not n:
+            return []
+        samples, self._pending = self._pending[:n * self.frame_len], self._pending[n * self.frame_len:]
+
+        energy_db, zcr = frame_features(samples, self.frame_len)
+        if self.floor_db is None:
+            self._update_floor(energy_db, np.zeros(n, dtype=bool))
+        voiced = is_speech(energy_db, zcr, self.floor_db)
+        self._update_floor(energy_db, voiced)
+
+        events = []
+        for v in voiced:
+            if v:
+                if self.in_speech and self.silence_ms >= 100:
+                    self.pauses.append(self.silence_ms)
+                self.silence_ms = 0
+                self.speech_ms += VAD_FRAME_MS
+                if not self.in_speech and self.speech_ms >= VAD_MIN_SPEECH_MS:
+                    self.in_speech = True
+                    events.append("speech_start")
+            else:
+                self.silence_ms += VAD_FRAME_MS
+                if not self.in_speech:
+                    self.speech_ms = 0  # Blip too short to count
+                elif self.silence_ms >= self.hangover_ms:
+                    metrics.incr("vad.end_of_utterance")
+                    metrics.observe("vad.hangover_ms", self.hangover_ms)
+                    events.append("end_of_utterance")
+                    self.in_speech, self.speech_ms, self.silence_ms = False, 0, 0
+        return events
@@ -1,50 +1,132 @@
-import faiss
-from sentence_transformers import SentenceTransformer
+"""
+Incremental vector store build.
+
+Each chunk of projects.txt is hashed; embeddings are cached by hash in
+embedding_cache.npz, so only new or edited chunks go through the model (which
+isn't even loaded when nothing changed). The FAISS index is ID-mapped
+(id = hash-derived int64), so removed chunks are deleted in place instead of
+rebuilding. All outputs are written atomically.
+"""
+import io
+import os
+import hashlib
+
 import numpy as np
-import re
 
-print("Starting vector store creation...")
+from core.embeddings import MiniLMEmbedder, MINILM_MODEL
+from core.retrieval import (
+    FAISS_INDEX_FILE, CHUNK_STORE_FILE, atomic_write, read_chunk_store, write_chunk_store,
+)
 
-try:
-    # 1. Load the detailed project descriptions
-    with open('projects.txt', 'r', encoding='utf-8') as f:
-        text = f.read()
+SOURCE_FILE = "projects.txt"
+CHUNKS_FILE = "project_chunks.txt"   # Plain-text KB for the massive-context researcher
+CHUNK_SEPARATOR = "\n===\n"
+EMBEDDING_CACHE_FILE = "embedding_cache.npz"
+
+def chunk_id(chunk: str) -> int:
+    """Stable positive int64 id from the chunk's content hash."""
+    digest = hashlib.sha256(chunk.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "little") & 0x7FFF_FFFF_FFFF_FFFF
 
-    # 2. Chunk the text by project using "---" as a separator
-    chunks = text.split('---')
-    project_chunks = [chunk.strip() for chunk in chunks if chunk.strip()]
+def load_chunks() -> dict:
+    with open(SOURCE_FILE, 'r', encoding='utf-8') as f:
+        text = f.read()
+    # Chunk the text by project using "---" as a separator
+    project_chunks = [chunk.strip() for chunk in text.split('---') if chunk.strip()]
     if not project_chunks:
         raise ValueError("No project chunks found. Check projects.txt for '---' separators.")
-    print(f"Found and chunked {len(project_chunks)} projects.")
-
-    # 3. Load the embedding model
-    print("Loading embedding model (all-MiniLM-L6-v2)... This may take a moment.")
-    model = SentenceTransformer('all-MiniLM-L6-v2')
-    print("Embedding model loaded.")
-
-    # 4. Create embeddings for each project chunk
-    print("Creating embeddings for project chunks...")
-    embeddings = model.encode(project_chunks, convert_to_tensor=False, show_progress_bar=True)
-    embeddings = np.array(embeddings).astype('float32') # FAISS requires float32
-    print(f"Embeddings created with shape: {embeddings.shape}")
-
-    # 5. Build the FAISS index
-    dimension = embeddings.shape[1]
-    index = faiss.IndexFlatL2(dimension)
-    index.add(embeddings)
-    print(f"FAISS index built. Total vectors in index: {index.ntotal}")
-
-    # 6. Save the index and the text chunks for the main app to use
-    faiss.write_index(index, 'faiss_index.bin')
-    with open('project_chunks.txt', 'w', encoding='utf-8') as f:
-        for chunk in project_chunks:
-            f.write(chunk + "\n===\n") # Use a unique separator for easy splitting later
+    return {chunk_id(chunk): chunk for chunk in project_chunks}  # Insertion order = document order
+
+def load_embedding_cache() -> dict:
+    """{id: vector} from previous builds (any model change invalidates it)."""
+    try:
+        data = np.load(EMBEDDING_CACHE_FILE)
+        if str(data["model"]) != MINILM_MODEL:
+            print("Embedding model changed; ignoring the embedding cache.")
+            return {}
+        return dict(zip(data["ids"].tolist(), data["vectors"]))
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"⚠️ Embedding cache unreadable ({e}); re-embedding everything.")
+        return {}
+
+def save_embedding_cache(cache: dict):
+    buf = io.BytesIO()
+    ids = np.array(list(cache.keys()), dtype=np.int64)
+    vectors = np.stack(list(cache.values())).astype('float32')
+    np.savez(buf, model=np.array(MINILM_MODEL), ids=ids, vectors=vectors)
+    atomic_write(EMBEDDING_CACHE_FILE, buf.getvalue())
+
+def load_index(faiss, dimension: int):
+    """Existing ID-mapped index, or a fresh one (old positional indexes are replaced)."""
+    if os.path.exists(FAISS_INDEX_FILE):
+        try:
+            index = faiss.read_index(FAISS_INDEX_FILE)
+            if isinstance(index, faiss.IndexIDMap) and index.d == dimension:
+                return index
+            print("Existing index is not ID-mapped; rebuilding it.")
+        except Exception as e:
+            print(f"⚠️ Existing index unreadable ({e}); rebuilding it.")
+    return faiss.IndexIDMap(faiss.IndexFlatL2(dimension))
+
+def write_index(faiss, index):
+    tmp = f"{FAISS_INDEX_FILE}.tmp"
+    faiss.write_index(index, tmp)
+    os.replace(tmp, FAISS_INDEX_FILE)
+
+def build():
+    print("Starting vector store creation...")
+    chunks = load_chunks()
+    print(f"Found and chunked {len(chunks)} projects.")
+
+    try:
+        stored_ids = set(read_chunk_store(CHUNK_STORE_FILE))
+    except (FileNotFoundError, ValueError):
+        stored_ids = set()
+    if stored_ids == set(chunks) and os.path.exists(FAISS_INDEX_FILE):
+        print("\n✅ Vector store already up to date (nothing to embed).")
+        return
+
+    import faiss  # Only needed when something changed
+
+    # 1. Embed only chunks whose hash we haven't seen (model loads lazily on first encode)
+    cache = load_embedding_cache()
+    new_ids = [i for i in chunks if i not in cache]
+    if new_ids:
+        print(f"Embedding {len(new_ids)} new/changed chunks with {MINILM_MODEL}...")
+        vectors = MiniLMEmbedder().encode([chunks[i] for i in new_ids])
+        cache.update(zip(new_ids, vectors))
+    else:
+        print("All chunks found in the embedding cache.")
+
+    # 2. Apply the diff to the ID-mapped index
+    dimension = len(next(iter(cache.values())))
+    index = load_index(faiss, dimension)
+    indexed = set(faiss.vector_to_array(index.id_map).tolist()) if index.ntotal else set()
+    removed = np.array(sorted(indexed - set(chunks)), dtype=np.int64)
+    added = [i for i in chunks if i not in indexed]
+    if removed.size:
+        index.remove_ids(removed)
+    if added:
+        index.add_with_ids(np.stack([cache[i] for i in added]).astype('float32'), np.array(added, dtype=np.int64))
+    print(f"FAISS index updated: +{len(added)} / -{removed.size}. Total vectors in index: {index.ntotal}")
+
+    # 3. Persist atomically (index, chunk store, plain-text KB, then the cache of live chunks only)
+    write_index(faiss, index)
+    write_chunk_store(CHUNK_STORE_FILE, chunks)
+    atomic_write(CHUNKS_FILE, "".join(chunk + CHUNK_SEPARATOR for chunk in chunks.values()).encode("utf-8"))
+    save_embedding_cache({i: cache[i] for i in chunks})
 
     print("\n✅ Vector store created successfully!")
-    print("   - faiss_index.bin")
-    print("   - project_chunks.txt")
+    print(f"   - {FAISS_INDEX_FILE}")
+    print(f"   - {CHUNK_STORE_FILE}")
+    print(f"   - {CHUNKS_FILE}")
 
-except FileNotFoundError:
-    print("❌ ERROR: `projects.txt` not found. Please create it and add your project details.")
-except Exception as e:
-    print(f"❌ An unexpected error occurred: {e}")
\ No newline at end of file
+if __name__ == "__main__":
+    try:
+        build()
+    except FileNotFoundError:
+        print("❌ ERROR: `projects.txt` not found. Please create it and add your project details.")
+    except Exception as e:
+        print(f"❌ An unexpected error occurred: {e}")
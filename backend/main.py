@@ -1,5 +1,9 @@
 
+import os
 import json
+import time
+import uuid
+import asyncio
 from typing import Optional
 from fastapi import FastAPI, File, UploadFile, HTTPException, Query, WebSocket, WebSocketDisconnect
 from fastapi.responses import StreamingResponse
@@ -15,10 +19,22 @@ from core.hospitality_services import (
     process_booking_text_stream,
     process_text_to_audio,
     get_speech_from_text,
+    read_audio,
     start_new_call,  # Ensure this is in your core services
+    start_spoken_turn,
+    start_spoken_audio_turn,
+    start_spoken_stream_turn,
+    get_text_from_speech,
     process_booking_conversation
 )
 from core.database import db_client, BookingManager, SessionManager
+from core.metrics import metrics, watch_event_loop_lag
+from core.session_store import session_store
+from core.phrase_cache import phrase_cache, PHRASES
+from core.audio_assembly import fragment_assembler
+from core.streaming_stt import StreamingTranscriber, STREAM_SAMPLE_RATE
+from core.vad import VoiceActivityDetector
+from core.audio_codec import negotiate_codec, media_type
 
 load_dotenv()
 
@@ -33,10 +49,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ==================== LIFECYCLE ====================
+@app.on_event("startup")
+async def start_background_monitors():
+    # Measures how long anything blocks the loop (DB, CPU) -> /metrics
+    app.state.loop_monitor = asyncio.create_task(watch_event_loop_lag())
+    phrase_cache.load()  # mmap only; pages are read on first use
+    fragment_assembler.pack.load()
+    # Evicts abandoned calls from the write-behind session cache
+    app.state.session_sweeper = asyncio.create_task(session_store.evict_idle())
+
+@app.on_event("shutdown")
+async def stop_background_monitors():
+    app.state.loop_monitor.cancel()
+    app.state.session_sweeper.cancel()
+    await session_store.flush_all()
+
 # ==================== MODELS ====================
 class TextBookingRequest(BaseModel):
     text: str
     caller_phone: Optional[str] = None
+    codec: Optional[str] = None  # "opus" | "mp3" | "wav" (or a preference list like "opus,mp3")
 
 # ==================== DEBUG LOGGER ====================
 def log_flow(stage, details):
@@ -186,106 +219,292 @@ def log_flow(stage, details):
 #             pass
 # In main.py - Update the WebSocket handler
 
+# Bounded queues between the socket and the pipeline. A full inbox stops us reading
+# the socket (TCP backpressure on the client); a full outbox pauses the turn producing audio.
+WS_INBOX_MAX = int(os.environ.get("WS_INBOX_MAX", "64"))
+WS_OUTBOX_MAX = int(os.environ.get("WS_OUTBOX_MAX", "32"))
+
+active_calls = set()
+
+class CallState:
+    """Per-connection state for /ws/call. One turn runs at a time; a newer one barges in."""
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.session_id = str(uuid.uuid4())[:8]  # Temp tracking ID
+        self.real_phone = None  # Actual verified phone
+        self.turn_task = None  # Current reply (STT -> LLM -> TTS -> outbox), cancellable
+        self.transcriber = None  # Set while the client streams PCM frames (audio_stream_start)
+        self.vad = None  # Server-side endpointing for the PCM stream
+        self.pcm_stream_open = False  # Frames after our own end_of_utterance are dropped, not treated as a blob
+        self.codec = "wav"  # Negotiated on "start"
+        self.inbox = asyncio.Queue(maxsize=WS_INBOX_MAX)    # reader -> processor
+        self.outbox = asyncio.Queue(maxsize=WS_OUTBOX_MAX)  # turns/processor -> writer
+
+    async def send(self, payload):
+        """Queue bytes (audio) or a dict (JSON event) for the writer, tagged with the sending task."""
+        start = time.perf_counter()
+        await self.outbox.put((asyncio.current_task(), payload))
+        metrics.observe("ws.outbox_wait_ms", (time.perf_counter() - start) * 1000)
+
+    def start_turn(self, coro):
+        self.turn_task = asyncio.create_task(coro)
+        self.turn_task.add_done_callback(_report_turn_error)
+
+    def _purge_outbox(self, task: asyncio.Task):
+        """Drop audio a cancelled turn already queued; keep everything else in order."""
+        kept = []
+        while not self.outbox.empty():
+            item = self.outbox.get_nowait()
+            if item[0] is task and isinstance(item[1], bytes):
+                metrics.incr("turn.discarded_audio_clauses")
+            else:
+                kept.append(item)
+        for item in kept:
+            self.outbox.put_nowait(item)
+
+    async def cancel_turn(self, reason: str):
+        """Barge-in: stop generating, synthesising and sending a reply the caller is talking over."""
+        task, self.turn_task = self.turn_task, None
+        if not task: return
+        if not task.done():
+            log_flow("WS_BARGE_IN", f"{reason} -> cancelling turn for {self.real_phone or self.session_id}")
+            metrics.incr("turn.cancelled")
+            task.cancel()
+            try:
+                await task  # Let it unwind: LLM stream closed, pending TTS cancelled
+            except (asyncio.CancelledError, Exception):
+                pass  # Real errors are already logged by _report_turn_error
+        self._purge_outbox(task)
+
+def _report_turn_error(task: asyncio.Task):
+    if not task.cancelled() and task.exception():
+        print(f"❌ Turn failed: {task.exception()}")
+
+# ---------- Turns (run as call.turn_task) ----------
+async def lock_phone(call: CallState, detected_phone: Optional[str]):
+    if detected_phone and detected_phone != call.real_phone:
+        log_flow("WS_PHONE_VERIFIED", f"Locked phone: {detected_phone}")
+        call.real_phone = detected_phone
+        await call.send({"event": "identity_verified", "phone": call.real_phone})
+
+async def stream_turn(call: CallState, audio_chunks, turn):
+    """Queue clause audio as it arrives, then lock in any phone the turn verified."""
+    try:
+        async for chunk in audio_chunks:
+            await call.send(chunk)
+        _, detected_phone = await turn
+    except asyncio.CancelledError:
+        if turn.done() and not turn.cancelled() and not turn.exception():
+            # Interrupted while speaking: the turn itself completed (state saved), keep its identity
+            await lock_phone(call, turn.result()[1])
+        else:
+            turn.cancel()
+        raise
+    except Exception as e:
+        # Never leave the client "thinking": apologise, then complete the turn as usual
+        print(f"❌ Turn failed: {e}")
+        metrics.incr("turn.failed")
+        turn.cancel()
+        await call.send({"event": "error", "message": PHRASES["generator_error"]})
+        audio_gen = await get_speech_from_text(PHRASES["generator_error"], call.codec)
+        if audio_gen:
+            await call.send(await read_audio(audio_gen))
+        await call.send({"event": "response_complete"})
+        return
+    
+    await lock_phone(call, detected_phone)
+    await call.send({"event": "response_complete"})
+
+async def greeting_turn(call: CallState):
+    audio_gen = await get_speech_from_text(PHRASES["greeting"], call.codec)
+    if audio_gen:
+        await call.send(await read_audio(audio_gen))
+        await call.send({"event": "response_complete"})
+
+async def text_turn(call: CallState, user_text: str):
+    # 🔥 Pipelined: clause audio is streamed while Riya is still "thinking"
+    audio_chunks, turn = start_spoken_turn(
+        user_text, 
+        session_id=call.session_id, 
+        real_phone=call.real_phone,
+        audio_format=call.codec
+    )
+    await stream_turn(call, audio_chunks, turn)
+
+async def audio_turn(call: CallState, audio_bytes: bytes):
+    audio_chunks, turn = await start_spoken_audio_turn(
+        audio_bytes, 
+        session_id=call.session_id, 
+        real_phone=call.real_phone,
+        audio_format=call.codec
+    )
+    await stream_turn(call, audio_chunks, turn)
+
+async def streamed_audio_turn(call: CallState, transcriber: StreamingTranscriber):
+    """End of utterance on the PCM stream: finalise the transcript and speak the reply."""
+    audio_chunks, turn = await start_spoken_stream_turn(
+        transcriber,
+        session_id=call.session_id,
+        real_phone=call.real_phone,
+        audio_format=call.codec
+    )
+    await stream_turn(call, audio_chunks, turn)
+
+def end_pcm_utterance(call: CallState):
+    transcriber, call.transcriber = call.transcriber, None
+    call.start_turn(streamed_audio_turn(call, transcriber))
+
+# ---------- Reader / processor / writer ----------
+async def ws_reader(call: CallState):
+    """Socket -> inbox. Only barge-in is handled here, so it never waits behind queued audio."""
+    while True:
+        message = await call.websocket.receive()
+        if message.get("type") == "websocket.disconnect":
+            return
+        if "text" in message:
+            try:
+                item = ("event", json.loads(message["text"]))
+            except json.JSONDecodeError:
+                print("⚠️ Invalid JSON")
+                continue
+            if item[1].get("event") == "interrupt":
+                await call.cancel_turn("interrupt")
+                continue
+        elif "bytes" in message:
+            item = ("audio", message["bytes"])
+        else:
+            continue
+        if call.inbox.full():
+            metrics.incr("ws.inbox_full")  # Processor is behind: stop reading until it catches up
+        await call.inbox.put(item)
+        metrics.gauge("ws.inbox_depth", call.inbox.qsize())
+
+async def handle_event(call: CallState, data: dict):
+    event_type = data.get("event")
+
+    if event_type == "start":
+        await call.cancel_turn("call restarted")
+        call.codec = negotiate_codec(data.get("codec"))
+        await call.send({"event": "codec", "codec": call.codec})
+        call.start_turn(greeting_turn(call))
+
+    elif event_type == "text_input":
+        await call.cancel_turn("new text")
+        call.start_turn(text_turn(call, data.get("text")))
+
+    elif event_type == "audio_stream_start":
+        # Binary frames are now raw PCM16 mono, transcribed while the caller speaks
+        await call.cancel_turn("new audio")
+        if call.transcriber: call.transcriber.cancel()
+        sample_rate = int(data.get("sample_rate") or STREAM_SAMPLE_RATE)
+        call.transcriber = StreamingTranscriber(get_text_from_speech, sample_rate=sample_rate)
+        call.vad = VoiceActivityDetector(sample_rate)
+        call.pcm_stream_open = True
+
+    elif event_type == "audio_stream_end":
+        # Client-side fallback: only the tail since the last partial is left to transcribe
+        call.pcm_stream_open = False
+        if call.transcriber:
+            end_pcm_utterance(call)
+
+async def handle_audio(call: CallState, frame: bytes):
+    if not call.pcm_stream_open:
+        # Blob mode: one complete recording per utterance
+        await call.cancel_turn("new audio")
+        call.start_turn(audio_turn(call, frame))
+        return
+    if not call.transcriber: return  # Tail of an utterance we already ended
+    call.transcriber.feed(frame)
+    events = call.vad.process(frame)
+    if "speech_start" in events:
+        await call.cancel_turn("caller speaking")
+    if "end_of_utterance" in events:
+        # Server-side endpointing: don't wait for the browser's silence timer
+        await call.send({"event": "end_of_utterance"})
+        end_pcm_utterance(call)
+
+async def ws_processor(call: CallState):
+    """Inbox -> pipeline. Turns run as their own task, so frames keep flowing while Riya thinks."""
+    while True:
+        kind, payload = await call.inbox.get()
+        metrics.gauge("ws.inbox_depth", call.inbox.qsize())
+        if kind == "event":
+            await handle_event(call, payload)
+        else:
+            await handle_audio(call, payload)
+
+async def ws_writer(call: CallState):
+    """Outbox -> socket. The only task that ever sends, so frames never interleave."""
+    while True:
+        _, payload = await call.outbox.get()
+        metrics.gauge("ws.outbox_depth", call.outbox.qsize())
+        if isinstance(payload, bytes):
+            await call.websocket.send_bytes(payload)
+        else:
+            await call.websocket.send_text(json.dumps(payload))
+
 @app.websocket("/ws/call")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
     print(f"🔌 Socket Connected: {websocket.client}")
     
-    import uuid
-    session_id = str(uuid.uuid4())[:8]  # Temp tracking ID
-    real_phone = None  # Actual verified phone
-    
+    call = CallState(websocket)
+    active_calls.add(call)
+    metrics.gauge("ws.active_calls", len(active_calls))
+    loops = [
+        asyncio.create_task(ws_reader(call)),
+        asyncio.create_task(ws_processor(call)),
+        asyncio.create_task(ws_writer(call)),
+    ]
     try:
-        while True:
-            message = await websocket.receive()
-            
-            if "text" in message:
-                try:
-                    data = json.loads(message["text"])
-                    event_type = data.get("event")
-                    
-                    if event_type == "start":
-                        # 🔥 Pass session_id, not as phone
-                        welcome_text = "Hi! Thanks for calling The Guru's Kitchen. This is Riya. Who am I speaking with?"
-                        audio_gen = await get_speech_from_text(welcome_text)
-                        
-                        if audio_gen:
-                            for chunk in audio_gen:
-                                await websocket.send_bytes(chunk)
-                            await websocket.send_text(json.dumps({"event": "response_complete"}))
-
-                    elif event_type == "text_input":
-                        user_text = data.get("text")
-                        
-                        # 🔥 NEW: Pass both session_id AND real_phone
-                        audio_gen, detected_phone = await process_text_to_audio(
-                            user_text, 
-                            session_id=session_id, 
-                            real_phone=real_phone
-                        )
-                        
-                        # If phone was detected/verified, lock it in
-                        if detected_phone and detected_phone != real_phone:
-                            log_flow("WS_PHONE_VERIFIED", f"Locked phone: {detected_phone}")
-                            real_phone = detected_phone
-                            await websocket.send_text(json.dumps({
-                                "event": "identity_verified", 
-                                "phone": real_phone
-                            }))
-                        
-                        if audio_gen:
-                            for chunk in audio_gen:
-                                await websocket.send_bytes(chunk)
-                            await websocket.send_text(json.dumps({"event": "response_complete"}))
-
-                except json.JSONDecodeError:
-                    print("⚠️ Invalid JSON")
-
-            elif "bytes" in message:
-                audio_bytes = message["bytes"]
-                
-                # 🔥 NEW: Pass session_id and real_phone separately
-                audio_gen, detected_phone = await process_booking_audio(
-                    audio_bytes, 
-                    session_id=session_id, 
-                    real_phone=real_phone
-                )
-                
-                if detected_phone and detected_phone != real_phone:
-                    log_flow("WS_PHONE_VERIFIED", f"Locked phone: {detected_phone}")
-                    real_phone = detected_phone
-                    await websocket.send_text(json.dumps({
-                        "event": "identity_verified",
-                        "phone": real_phone
-                    }))
-                
-                if audio_gen:
-                    for chunk in audio_gen:
-                        await websocket.send_bytes(chunk)
-                    await websocket.send_text(json.dumps({"event": "response_complete"}))
-
-    except WebSocketDisconnect:
-        print(f"🔌 Socket Disconnected: {session_id}")
+        # Any loop ending (disconnect, send failure, bug) ends the call
+        done, _ = await asyncio.wait(loops, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if not task.cancelled() and task.exception() and not isinstance(task.exception(), WebSocketDisconnect):
+                print(f"❌ Socket Error: {task.exception()}")
+    finally:
+        print(f"🔌 Socket Disconnected: {call.session_id}")
+        for task in loops: task.cancel()
+        await asyncio.gather(*loops, return_exceptions=True)
+        await call.cancel_turn("hang-up")
+        if call.transcriber: call.transcriber.cancel()
+        active_calls.discard(call)
+        metrics.gauge("ws.active_calls", len(active_calls))
+        # Persist whatever the write-behind cache still holds for this caller
+        await session_store.flush(call.real_phone or call.session_id)
 
 # ==================== HTTP ENDPOINTS (LEGACY / FALLBACK) ====================
 
+async def metered_audio(audio_generator, codec: str, started: float):
+    """Pass-through that records first-audio latency and bytes sent, per codec."""
+    total = 0
+    async for chunk in audio_generator:
+        if not total:
+            metrics.observe(f"http.{codec}.first_audio_ms", (time.perf_counter() - started) * 1000)
+        total += len(chunk)
+        yield chunk
+    metrics.observe(f"http.{codec}.bytes_per_turn", total)
+
 @app.post("/api/call/start")
 async def start_call_endpoint(request: TextBookingRequest): 
     """
     Triggers the initial greeting audio via HTTP (Fallback).
     """
     log_flow("API_HIT: /api/call/start", f"Starting call for {request.caller_phone}")
+    started = time.perf_counter()
+    codec = negotiate_codec(request.codec)
     try:
         # Generate the welcome audio
-        audio_generator = await start_new_call(request.caller_phone)
+        audio_generator = await start_new_call(request.caller_phone, codec)
         
         if not audio_generator:
              raise HTTPException(status_code=500, detail="Failed to generate welcome audio")
 
         return StreamingResponse(
-            audio_generator, 
-            media_type="audio/wav",
-            headers={"Content-Disposition": "inline; filename=welcome.wav"}
+            metered_audio(audio_generator, codec, started), 
+            media_type=media_type(codec),
+            headers={"Content-Disposition": f"inline; filename=welcome.{codec}", "X-Audio-Codec": codec}
         )
     except Exception as e:
         log_flow("CALL_START_FAIL", str(e))
@@ -297,10 +516,12 @@ async def chat_text_to_audio(request: TextBookingRequest):
     Input: Text (JSON) -> Output: Audio Stream (WAV) + Header (Identity)
     """
     log_flow("API_HIT: /api/chat/text-to-audio", f"User: '{request.text}' | Phone: {request.caller_phone}")
+    started = time.perf_counter()
+    codec = negotiate_codec(request.codec)
     
     try:
         # 1. Pass to Service Layer (Returns Tuple: Stream, Phone)
-        audio_generator, resolved_phone = await process_text_to_audio(request.text, request.caller_phone)
+        audio_generator, resolved_phone = await process_text_to_audio(request.text, request.caller_phone, audio_format=codec)
         
         if not audio_generator:
             log_flow("ERROR", "TTS Generator returned None")
@@ -310,8 +531,9 @@ async def chat_text_to_audio(request: TextBookingRequest):
         
         # 2. Prepare Headers
         headers = {
-            "Content-Disposition": "inline; filename=response.wav",
-            "Access-Control-Expose-Headers": "X-Detected-Phone" # Allow JS to read this
+            "Content-Disposition": f"inline; filename=response.{codec}",
+            "X-Audio-Codec": codec,
+            "Access-Control-Expose-Headers": "X-Detected-Phone, X-Audio-Codec" # Allow JS to read this
         }
         
         # 3. Inject Phone into header if found
@@ -319,8 +541,8 @@ async def chat_text_to_audio(request: TextBookingRequest):
             headers["X-Detected-Phone"] = str(resolved_phone)
         
         return StreamingResponse(
-            audio_generator,
-            media_type="audio/wav",
+            metered_audio(audio_generator, codec, started),
+            media_type=media_type(codec),
             headers=headers
         )
         
@@ -331,21 +553,25 @@ async def chat_text_to_audio(request: TextBookingRequest):
 @app.post("/api/book/voice")
 async def book_via_voice(
     audio: UploadFile = File(...),
-    caller_phone: Optional[str] = Query(None)
+    caller_phone: Optional[str] = Query(None),
+    codec: Optional[str] = Query(None)
 ):
     log_flow("API_HIT: /api/book/voice", f"Received Audio | Phone: {caller_phone}")
+    started = time.perf_counter()
+    codec = negotiate_codec(codec)
     try:
         audio_bytes = await audio.read()
         
         # 1. CALL SERVICE (Now returns Tuple)
-        audio_generator, resolved_phone = await process_booking_audio(audio_bytes, caller_phone)
+        audio_generator, resolved_phone = await process_booking_audio(audio_bytes, caller_phone, audio_format=codec)
         
         if not audio_generator:
             raise HTTPException(status_code=500, detail="TTS generation failed")
         
         # 2. PREPARE HEADERS (The Handshake)
         headers = {
-            "Access-Control-Expose-Headers": "X-Detected-Phone"
+            "X-Audio-Codec": codec,
+            "Access-Control-Expose-Headers": "X-Detected-Phone, X-Audio-Codec"
         }
         if resolved_phone:
             headers["X-Detected-Phone"] = str(resolved_phone)
@@ -353,8 +579,8 @@ async def book_via_voice(
 
         # 3. STREAM BACK
         return StreamingResponse(
-            audio_generator, 
-            media_type="audio/wav",
+            metered_audio(audio_generator, codec, started), 
+            media_type=media_type(codec),
             headers=headers
         )
         
@@ -375,6 +601,10 @@ async def stream_chat_response(request: TextBookingRequest):
 async def health_check():
     return {"status": "online", "mode": "websocket_enabled"}
 
+@app.get("/metrics")
+async def get_metrics():
+    return {**metrics.snapshot(), "phrase_cache_top_misses": phrase_cache.top_misses()}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,24 @@
+-- Single round-trip upsert + JSONB merge for conversation_state.
+-- Used by SessionManager.update_state via db_client.rpc('merge_conversation_state', ...).
+-- Run once in the Supabase SQL editor (or psql) before deploying.
+
+create unique index if not exists conversation_state_phone_key
+    on conversation_state (phone);
+
+create or replace function merge_conversation_state(
+    p_phone text,
+    p_step  text,
+    p_data  jsonb default '{}'::jsonb
+)
+returns setof conversation_state
+language sql
+as $$
+    insert into conversation_state (phone, current_step, collected_data, last_interaction)
+    values (p_phone, p_step, coalesce(p_data, '{}'::jsonb), now())
+    on conflict (phone) do update
+        set current_step     = excluded.current_step,
+            -- Shallow merge, same semantics as dict.update() in Python
+            collected_data   = coalesce(conversation_state.collected_data, '{}'::jsonb) || excluded.collected_data,
+            last_interaction = excluded.last_interaction
+    returning *;
+$$;
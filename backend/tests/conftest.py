@@ -0,0 +1,10 @@
+import os
+import sys
+
+# Modules create their clients at import time; unit tests never reach the network
+os.environ.setdefault("GROQ_API_KEY_1", "test-key-1")
+os.environ.setdefault("GROQ_API_KEY_2", "test-key-2")
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.test")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
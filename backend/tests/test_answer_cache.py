@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from core.answer_cache import SemanticAnswerCache, key_terms, terms_agree
+from core.embeddings import HashingEmbedder
+
+class SynonymEmbedder(HashingEmbedder):
+    """Stand-in for MiniLM: knows that "greatest" means "biggest"."""
+    name = "minilm"
+
+    def encode(self, texts):
+        return super().encode([t.lower().replace("greatest", "biggest") for t in texts])
+
+@pytest.fixture(autouse=True)
+def no_threshold_override(monkeypatch):
+    monkeypatch.delenv("ANSWER_CACHE_THRESHOLD", raising=False)
+
+def cache_with(embedder, *questions):
+    cache = SemanticAnswerCache(embedder=embedder)
+    for question in questions:
+        cache.store(question, f"answer to {question}")
+    return cache
+
+def hit(cache, question):
+    return cache.lookup(question)[1]
+
+# ---------- Hashing embedder: exact repeats only ----------
+def test_hashing_serves_exact_repeats():
+    cache = cache_with(HashingEmbedder(), "Why FastAPI over Flask?")
+    assert hit(cache, "why fastapi over flask").text == "answer to Why FastAPI over Flask?"
+
+@pytest.mark.parametrize("cached, asked", [
+    ("Why FastAPI over Flask?", "Why Flask over FastAPI?"),                 # 0.94 hashed
+    ("What did you learn from the voice bot project?",
+     "What did you learn from the booking bot project?"),                  # 0.85 hashed
+    ("How does the voice bot handle interruptions?",
+     "How does the voice bot handle reservations?"),
+])
+def test_hashing_never_serves_a_different_question(cached, asked):
+    assert hit(cache_with(HashingEmbedder(), cached), asked) is None
+
+def test_hashing_misses_paraphrases():
+    # 0.71 hashed: a known miss, only a semantic embedder can serve it
+    assert hit(cache_with(HashingEmbedder(), "What is your biggest weakness?"), "What is your greatest weakness?") is None
+
+# ---------- Semantic embedder ----------
+def test_semantic_embedder_serves_paraphrases():
+    cache = cache_with(SynonymEmbedder(), "What is your biggest weakness?")
+    assert hit(cache, "What is your greatest weakness?") is not None
+
+def test_swapped_key_terms_never_hit_even_with_identical_embeddings():
+    class BagOfWords(SynonymEmbedder):
+        def encode(self, texts):
+            return super().encode([" ".join(sorted(t.lower().strip("?").split())) for t in texts])
+
+    cache = cache_with(BagOfWords(), "Why FastAPI over Flask?")
+    assert hit(cache, "Why Flask over FastAPI?") is None
+    assert hit(cache, "why fastapi over flask?") is not None
+
+def test_question_word_must_match():
+    cache = cache_with(SynonymEmbedder(), "How did you build the voice bot?")
+    assert hit(cache, "Why did you build the voice bot?") is None
+
+def test_key_terms():
+    assert key_terms("Why FastAPI over Flask?") == ["why", "fastapi", "flask"]
+    assert terms_agree(["fastapi", "flask", "speed"], ["fastapi", "latency", "flask"])
+    assert not terms_agree(["fastapi", "flask"], ["flask", "fastapi"])
+
+# ---------- Eviction ----------
+def test_lru_and_ttl_eviction():
+    cache = SemanticAnswerCache(max_entries=2, embedder=SynonymEmbedder())
+    first = cache.store("Who are you?", "a")
+    cache.store("What is your tech stack?", "b")
+    assert hit(cache, "Who are you?")             # first is now most recently used
+    cache.store("Where are you based?", "c")       # evicts the tech stack answer
+    assert hit(cache, "What is your tech stack?") is None
+    cache.entries[first].created -= cache.ttl_s + 1
+    assert hit(cache, "Who are you?") is None
+
+def test_audio_is_kept_per_codec():
+    cache = cache_with(SynonymEmbedder())
+    entry_id = cache.store("Who are you?", "a")
+    cache.store_audio(entry_id, "opus", b"OGG")
+    cache.store_audio(entry_id, "wav", b"")
+    assert hit(cache, "Who are you?").audio == {"opus": b"OGG"}
+    assert np.isclose(cache.vectors[entry_id] @ cache.vectors[entry_id], 1.0)
@@ -0,0 +1,80 @@
+import io
+import wave
+
+import numpy as np
+
+from core.audio_assembly import AudioAssembler, MAX_GAP_WORDS, prepare_fragment
+from core.phrase_cache import PhraseCache, write_pack
+
+RATE = 24000
+
+def tone(seconds: float, rate: int = RATE, silence: float = 0.0) -> bytes:
+    t = np.arange(int(rate * seconds)) / rate
+    voiced = (8000 * np.sin(2 * np.pi * 440 * t)).astype("<i2")
+    quiet = np.zeros(int(rate * silence), dtype="<i2")
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(np.concatenate([quiet, voiced, quiet]).tobytes())
+    return buf.getvalue()
+
+def frames(audio: bytes) -> int:
+    with wave.open(io.BytesIO(audio), "rb") as w:
+        return w.getnframes()
+
+FRAGMENTS = ["Amazing!", "You're all set, table for", "4", "on", "Thursday", "January", "9th", "at", "7 PM", "under", "We can't wait to see you!"]
+
+def make_assembler(tmp_path) -> AudioAssembler:
+    path = str(tmp_path / "fragments.bin")
+    write_pack(path, {f: tone(0.1) for f in FRAGMENTS}, model="m", voice="v")
+    return AudioAssembler(PhraseCache(path, name="fragments"))
+
+def test_line_made_of_fragments_needs_no_tts(tmp_path):
+    plan = make_assembler(tmp_path).plan("Amazing! You're all set, table for 4 on Thursday, January 9th at 7 PM.")
+    assert plan and not any(synth for _, _, synth in plan)
+    assert plan[0] == ("amazing", 0.25, False)
+
+def test_name_becomes_one_synthesised_gap(tmp_path):
+    plan = make_assembler(tmp_path).plan("Table for 4 at 7 PM under John Smith. We can't wait to see you!", max_gaps=1)
+    assert plan is None  # "Table for" alone is not a fragment
+
+    plan = make_assembler(tmp_path).plan("You're all set, table for 4 at 7 PM under John Smith. We can't wait to see you!", max_gaps=1)
+    gaps = [(key, pause) for key, pause, synth in plan if synth]
+    assert gaps == [("John Smith", 0.25)]
+
+def test_no_gaps_unless_allowed(tmp_path):
+    assert make_assembler(tmp_path).plan("You're all set, table for 4 under John.") is None
+
+def test_gaps_are_limited(tmp_path):
+    assembler = make_assembler(tmp_path)
+    # Two unknown spans too far apart to synthesise as one
+    assert assembler.plan("Bob, you're all set, table for 4 under John.", max_gaps=1) is None
+    assert assembler.plan("Bob, you're all set, table for 4 under John.", max_gaps=2) is not None
+    long_name = " ".join(["Name"] * (MAX_GAP_WORDS + 1))
+    assert assembler.plan(f"You're all set, table for 4 under {long_name}.", max_gaps=1) is None
+
+def test_covered_line_is_not_split_into_gaps(tmp_path):
+    plan = make_assembler(tmp_path).plan("You're all set, table for 4 on Thursday.", max_gaps=1)
+    assert not any(synth for _, _, synth in plan)
+
+def test_assemble_stitches_synthesised_name_in(tmp_path):
+    assembler = make_assembler(tmp_path)
+    plan = assembler.plan("You're all set, table for 4 under John.", max_gaps=1)
+    name = prepare_fragment(tone(0.2, silence=0.3))
+    audio = assembler.assemble(plan, {"John": name})
+    assert audio[:4] == b"RIFF"
+    # 3 fragments + the trimmed name, minus crossfades, plus the comma/period pauses
+    assert frames(audio) > 3 * 0.1 * RATE + frames(name) - 0.05 * RATE
+
+def test_assemble_rejects_missing_or_mismatched_gap_audio(tmp_path):
+    assembler = make_assembler(tmp_path)
+    plan = assembler.plan("You're all set, table for 4 under John.", max_gaps=1)
+    assert assembler.assemble(plan) is None
+    assert assembler.assemble(plan, {"John": tone(0.2, rate=16000)}) is None
+
+def test_prepare_fragment_trims_silence():
+    trimmed = prepare_fragment(tone(0.2, silence=0.5))
+    assert frames(trimmed) < 0.3 * RATE
+    assert prepare_fragment(b"not a wav") is None
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+import core.audio_codec as audio_codec
+from core.audio_codec import encode_audio, media_type, negotiate_codec
+
+# ---------- negotiate_codec ----------
+def test_first_supported_preference_wins(monkeypatch):
+    monkeypatch.setattr(audio_codec, "FFMPEG_AVAILABLE", True)
+    assert negotiate_codec("opus,mp3") == "opus"
+    assert negotiate_codec("flac, MP3") == "mp3"
+    assert negotiate_codec("flac") == "wav"
+    assert negotiate_codec(None) == "wav"
+
+def test_without_ffmpeg_everything_is_wav(monkeypatch):
+    monkeypatch.setattr(audio_codec, "FFMPEG_AVAILABLE", False)
+    assert negotiate_codec("opus,mp3") == "wav"
+
+def test_media_types():
+    assert media_type("opus") == "audio/ogg"
+    assert media_type("mp3") == "audio/mpeg"
+    assert media_type("unknown") == "audio/wav"
+
+# ---------- encode_audio ----------
+def test_wav_is_passed_through():
+    assert asyncio.run(encode_audio(b"RIFF", "wav")) == b"RIFF"
+    assert asyncio.run(encode_audio(b"", "opus")) == b""
+
+def test_missing_ffmpeg_returns_none(monkeypatch):
+    monkeypatch.setattr(audio_codec, "FFMPEG_BIN", "/nonexistent/ffmpeg")
+    assert asyncio.run(encode_audio(b"RIFF", "opus")) is None
+
+class HangingProcess:
+    def __init__(self):
+        self.returncode = None
+        self.killed = self.reaped = False
+
+    async def communicate(self, data):
+        await asyncio.sleep(10)
+
+    def kill(self):
+        self.killed = True
+
+    async def wait(self):
+        self.reaped = True
+        self.returncode = -9
+        return self.returncode
+
+def test_cancelled_encode_kills_and_reaps_ffmpeg(monkeypatch):
+    proc = HangingProcess()
+
+    async def create_subprocess_exec(*args, **kwargs):
+        return proc
+    monkeypatch.setattr(audio_codec.asyncio, "create_subprocess_exec", create_subprocess_exec)
+
+    async def run():
+        task = asyncio.create_task(encode_audio(b"RIFF", "opus"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await task
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(run())
+    assert proc.killed and proc.reaped
@@ -0,0 +1,126 @@
+import asyncio
+
+import core.hospitality_services as hs
+import main
+from core.hospitality_services import SpeechPipeline
+from core.metrics import metrics
+
+def slow_tts(delays):
+    started, cancelled = [], []
+
+    async def get_speech_from_text(text, audio_format="wav", lane=None):
+        started.append(text)
+        try:
+            await asyncio.sleep(delays.get(text, 0))
+        except asyncio.CancelledError:
+            cancelled.append(text)
+            raise
+
+        async def stream():
+            yield text.encode()
+        return stream()
+    return get_speech_from_text, started, cancelled
+
+# ---------- SpeechPipeline.cancel ----------
+def test_cancel_stops_unsent_clauses(monkeypatch):
+    tts, started, cancelled = slow_tts({"second": 10, "third": 10})
+    monkeypatch.setattr(hs, "get_speech_from_text", tts)
+    before = dict(metrics.counters)
+
+    async def main_():
+        speech = SpeechPipeline()
+        speech.say("first")
+        speech.say("second")
+        speech.say("third")
+        heard = []
+        async for chunk in speech.audio():
+            heard.append(chunk)
+            speech.cancel()  # Caller talks over the first clause
+        speech.say("fourth")  # Late clauses from a still-running LLM stream are dropped
+        await asyncio.sleep(0)
+        return heard
+
+    assert asyncio.run(main_()) == [b"first"]
+    assert sorted(cancelled) == ["second", "third"]
+    assert "fourth" not in started
+    delta = lambda name: metrics.counters[name] - before.get(name, 0)
+    assert delta("turn.cancelled_tts_tasks") == 2
+    assert delta("turn.cancelled_tts_chars") == len("second") + len("third")
+
+def test_cancel_counts_synthesised_but_unsent_audio(monkeypatch):
+    tts, _, cancelled = slow_tts({})
+    monkeypatch.setattr(hs, "get_speech_from_text", tts)
+    before = metrics.counters["turn.discarded_audio_clauses"]
+
+    async def main_():
+        speech = SpeechPipeline()
+        speech.say("done already")
+        await asyncio.sleep(0.01)
+        speech.cancel()
+        speech.cancel()  # Idempotent
+        return [chunk async for chunk in speech.audio()]
+
+    assert asyncio.run(main_()) == []
+    assert cancelled == []
+    assert metrics.counters["turn.discarded_audio_clauses"] - before == 1
+
+# ---------- CallState.cancel_turn ----------
+def test_cancel_turn_purges_only_the_cancelled_turns_audio():
+    async def main_():
+        call = main.CallState(websocket=None)
+        await call.send({"event": "codec", "codec": "wav"})
+
+        async def turn():
+            await call.send(b"clause 1")
+            await call.send({"event": "identity_verified", "phone": "9999999999"})
+            await call.send(b"clause 2")
+            await asyncio.sleep(10)
+
+        call.start_turn(turn())
+        await asyncio.sleep(0.01)
+        await call.send(b"not this turn's audio")
+        task = call.turn_task
+        await call.cancel_turn("interrupt")
+        left = []
+        while not call.outbox.empty():
+            left.append(call.outbox.get_nowait())
+        return task, call, left
+
+    task, call, left = asyncio.run(main_())
+    assert task.cancelled()
+    assert call.turn_task is None
+    # Events stay in order; only audio queued by the cancelled turn is dropped
+    assert [payload for _, payload in left] == [
+        {"event": "codec", "codec": "wav"},
+        {"event": "identity_verified", "phone": "9999999999"},
+        b"not this turn's audio",
+    ]
+
+def test_cancel_turn_without_a_turn_is_a_no_op():
+    async def main_():
+        call = main.CallState(websocket=None)
+        await call.cancel_turn("interrupt")
+        return call.turn_task
+
+    assert asyncio.run(main_()) is None
+
+def test_interrupted_turn_keeps_the_identity_it_verified():
+    async def main_():
+        call = main.CallState(websocket=None)
+
+        async def audio_chunks():
+            yield b"clause"
+            await asyncio.sleep(10)
+
+        async def finished_turn():
+            return "reply", "9876543210"
+
+        turn = asyncio.ensure_future(finished_turn())
+        await asyncio.sleep(0)
+        call.start_turn(main.stream_turn(call, audio_chunks(), turn))
+        await asyncio.sleep(0.01)
+        await call.cancel_turn("caller speaking")
+        return call
+
+    call = asyncio.run(main_())
+    assert call.real_phone == "9876543210"
@@ -0,0 +1,39 @@
+import asyncio
+import threading
+
+import pytest
+
+from core import database
+
+def test_run_query_returns_result():
+    assert asyncio.run(database.run_query("t", lambda: 42)) == 42
+
+def test_timed_out_query_keeps_its_slot_until_the_thread_finishes(monkeypatch):
+    monkeypatch.setattr(database, "DB_MAX_WORKERS", 1)
+    release = threading.Event()
+
+    async def main():
+        with pytest.raises(TimeoutError):
+            await database.run_query("slow", release.wait, timeout=0.05)
+        # The abandoned thread still holds the only slot: fail fast, don't queue behind it
+        with pytest.raises(TimeoutError):
+            await database.run_query("next", lambda: "ok", timeout=0.05)
+        release.set()
+        await asyncio.sleep(0.05)
+        return await database.run_query("after", lambda: "ok", timeout=1)
+
+    assert asyncio.run(main()) == "ok"
+
+def test_query_errors_propagate_and_free_the_slot(monkeypatch):
+    monkeypatch.setattr(database, "DB_MAX_WORKERS", 1)
+
+    def boom():
+        raise ValueError("bad query")
+
+    async def main():
+        with pytest.raises(ValueError):
+            await database.run_query("bad", boom)
+        await asyncio.sleep(0.01)
+        return await database.run_query("good", lambda: 1, timeout=1)
+
+    assert asyncio.run(main()) == 1
@@ -0,0 +1,77 @@
+import json
+import os
+from datetime import date
+
+import pytest
+
+from bench_extraction import CORPUS_FILE, score
+from core.fast_extractor import fast_extract
+
+TODAY = date(2025, 1, 8)  # A Wednesday
+
+def found(text):
+    result = fast_extract(text, TODAY)
+    return {k: v for k, v in result.data.items() if v is not None}, result
+
+def load_corpus():
+    path = os.path.join(os.path.dirname(os.path.dirname(__file__)), CORPUS_FILE)
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+@pytest.mark.parametrize("item", load_corpus()["utterances"], ids=lambda item: item["text"])
+def test_corpus_turns_kept_on_the_fast_path_are_correct(item):
+    corpus_today = date.fromisoformat(load_corpus()["today"])
+    result = fast_extract(item["text"], corpus_today)
+    if result.is_confident:
+        assert score(item["expected"], result.data), result.data
+
+@pytest.mark.parametrize("text", ["Just me and one friend", "just me plus two", "Just me, with my son"])
+def test_just_me_with_companions_escalates(text):
+    data, result = found(text)
+    assert "party_size" not in data
+    assert not result.is_confident
+
+def test_just_me_alone_is_one():
+    data, result = found("Just me")
+    assert data == {"party_size": 1}
+    assert result.is_confident
+
+@pytest.mark.parametrize("text, name", [
+    ("My name is john smith", "John Smith"),
+    ("my name is john please", "John"),
+    ("my name is john table for 4", "John"),
+    ("This is Sarah Connor", "Sarah Connor"),
+])
+def test_names(text, name):
+    assert found(text)[0]["name"] == name
+
+def test_impossible_half_past_leaves_time_alone():
+    data, result = found("half past fifty")
+    assert "time" not in data
+    assert "time" not in result.confidence
+    assert not result.is_confident
+
+def test_impossible_half_past_does_not_clear_an_extracted_time():
+    data, _ = found("at 7 pm, half past fifty")
+    assert data["time"] == "19:00"
+
+def test_half_past_means_evening():
+    assert found("half past seven")[0]["time"] == "19:30"
+
+def test_conflicting_values_escalate():
+    data, result = found("table for 4, no wait, 6 people")
+    assert not result.is_confident
+
+def test_leftover_numbers_escalate():
+    _, result = found("I'd like a table, maybe 15")
+    assert any("unexplained" in reason for reason in result.escalate_reasons)
+
+@pytest.mark.parametrize("text", ["john", "John", "anil sharma", "Anil Sharma."])
+def test_bare_names_escalate_whatever_the_case(text):
+    _, result = found(text)
+    assert not result.is_confident
+    assert "no fields found" in result.escalate_reasons
+
+@pytest.mark.parametrize("text", ["hello", "Okay thanks", "Yes, that's right", "sounds good"])
+def test_bare_chit_chat_stays_on_the_fast_path(text):
+    assert found(text)[1].is_confident
@@ -0,0 +1,136 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+import core.groq_pool as groq_pool
+from core.groq_pool import CIRCUIT_FAILURES, CIRCUIT_OPEN_S, GroqPool, KeyState, parse_reset
+
+def test_parse_reset():
+    assert parse_reset("7.66s") == pytest.approx(7.66)
+    assert parse_reset("2m59.56s") == pytest.approx(179.56)
+    assert parse_reset("120ms") == pytest.approx(0.12)
+    assert parse_reset("1h") == 3600
+    assert parse_reset("30") == 30
+    assert parse_reset(None) is None
+
+# ---------- KeyState ----------
+def test_circuit_opens_after_consecutive_failures_and_backs_off():
+    key = KeyState(0, "k")
+    for _ in range(CIRCUIT_FAILURES - 1):
+        assert not key.record_failure(100.0)
+    assert key.record_failure(100.0)
+    assert not key.available(100.0 + CIRCUIT_OPEN_S - 1)
+    assert key.available(100.0 + CIRCUIT_OPEN_S)
+    # Half-open: a single failure re-trips it, for twice as long
+    assert key.record_failure(200.0)
+    assert key.open_until == 200.0 + 2 * CIRCUIT_OPEN_S
+
+def test_success_closes_the_circuit():
+    key = KeyState(0, "k")
+    for _ in range(CIRCUIT_FAILURES): key.record_failure(100.0)
+    key.record_success(200.0)
+    assert key.failures == 0 and key.open_s == CIRCUIT_OPEN_S
+    assert not key.record_failure(500.0)
+
+def test_rate_limit_headers_set_headroom_and_exhaustion(monkeypatch):
+    monkeypatch.setattr(groq_pool.time, "monotonic", lambda: 1000.0)
+    key = KeyState(0, "k")
+    response = SimpleNamespace(status_code=200, headers={
+        "x-ratelimit-remaining-requests": "10", "x-ratelimit-limit-requests": "100",
+        "x-ratelimit-remaining-tokens": "0", "x-ratelimit-limit-tokens": "6000",
+        "x-ratelimit-reset-tokens": "7.5s",
+    })
+    asyncio.run(key._read_headers(response))
+    assert key.headroom == 0
+    assert key.exhausted_until == 1007.5
+    assert not key.available(1007.0) and key.available(1008.0)
+
+# ---------- GroqPool ----------
+def make_pool(n=2):
+    pool = GroqPool([f"key-{i}" for i in range(n)])
+    return pool, {key.client: key.name for key in pool.keys}
+
+def status_error(cls, code):
+    request = httpx.Request("POST", "https://api.groq.com")
+    return cls("boom", response=httpx.Response(code, request=request), body=None)
+
+def test_key_problems_fail_over_and_request_errors_do_not():
+    pool, names = make_pool()
+    calls = []
+
+    async def flaky(client):
+        calls.append(names[client])
+        if len(calls) == 1: raise status_error(openai.InternalServerError, 500)
+        return "ok"
+
+    assert asyncio.run(pool.call(flaky, hedge=False)) == "ok"
+    assert len(set(calls)) == 2
+
+    async def bad_request(client):
+        calls.append(names[client])
+        raise status_error(openai.BadRequestError, 400)
+
+    calls.clear()
+    with pytest.raises(openai.BadRequestError):
+        asyncio.run(pool.call(bad_request, hedge=False))
+    assert len(calls) == 1
+
+def hedging_pool(monkeypatch):
+    pool, names = make_pool()
+    monkeypatch.setattr(groq_pool, "GROQ_HEDGE", True)
+    monkeypatch.setattr(groq_pool, "GROQ_HEDGE_MIN_MS", 10)
+    pool.latencies["chat"].extend([10.0] * 50)  # p90 = 10 ms -> hedge after 10 ms
+    return pool, names
+
+def test_slow_call_is_hedged_and_the_loser_is_closed(monkeypatch):
+    pool, names = hedging_pool(monkeypatch)
+    first = {}
+    closed = []
+
+    class Stream:
+        def __init__(self, name): self.name = name
+        async def close(self): closed.append(self.name)
+
+    async def op(client):
+        name = names[client]
+        first.setdefault("name", name)
+        if name == first["name"]:
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                return Stream(name)  # Answer landed just as we cancelled it
+        return Stream(name)
+
+    result = asyncio.run(pool.call(op))
+    assert result.name != first["name"]
+    assert closed == [first["name"]]
+
+def test_cancelling_the_caller_while_losers_drain_is_not_swallowed(monkeypatch):
+    pool, names = hedging_pool(monkeypatch)
+    first = {}
+
+    async def op(client):
+        name = names[client]
+        first.setdefault("name", name)
+        if name == first["name"]:
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                await asyncio.sleep(0.2)  # Slow to unwind
+                raise
+        return name
+
+    async def run():
+        call = asyncio.create_task(pool.call(op))
+        await asyncio.sleep(0.05)  # Hedge has won; the slow key is still unwinding
+        call.cancel()
+        try:
+            await call
+        except asyncio.CancelledError:
+            return "cancelled"
+        return "returned"
+
+    assert asyncio.run(run()) == "cancelled"
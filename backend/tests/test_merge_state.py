@@ -0,0 +1,73 @@
+import asyncio
+from types import SimpleNamespace
+
+from core import database
+from core import session_store as store_module
+from core.database import SessionManager
+from core.session_store import SessionStore
+
+class FakeRpc:
+    def __init__(self, client, name, params):
+        self.client, self.name, self.params = client, name, params
+
+    def execute(self):
+        self.client.calls.append((self.name, self.params))
+        if self.client.rpc_error:
+            raise Exception(self.client.rpc_error)
+        return SimpleNamespace(data=[{"phone": self.params["p_phone"], "current_step": self.params["p_step"],
+                                      "collected_data": {"name": "John", **self.params["p_data"]}}])
+
+class FakeClient:
+    def __init__(self, rpc_error=None):
+        self.calls = []
+        self.rpc_error = rpc_error
+
+    def rpc(self, name, params):
+        return FakeRpc(self, name, params)
+
+def test_update_state_is_one_rpc_returning_the_merged_row(monkeypatch):
+    client = FakeClient()
+    monkeypatch.setattr(database, "db_client", client)
+    row = asyncio.run(SessionManager.update_state("+911234567890", "ask_time", {"party_size": 4}))
+    assert client.calls == [("merge_conversation_state", {"p_phone": "+911234567890", "p_step": "ask_time", "p_data": {"party_size": 4}})]
+    assert row["collected_data"] == {"name": "John", "party_size": 4}
+
+def test_missing_rpc_falls_back_to_legacy_path(monkeypatch):
+    monkeypatch.setattr(database, "db_client", FakeClient(rpc_error="PGRST202: function not found"))
+    legacy = []
+
+    async def fake_legacy(phone, step, data=None):
+        legacy.append((phone, step, data))
+        return {"phone": phone}
+
+    monkeypatch.setattr(SessionManager, "_update_state_legacy", staticmethod(fake_legacy))
+    assert asyncio.run(SessionManager.update_state("p", "ask_name", {"a": 1})) == {"phone": "p"}
+    assert legacy == [("p", "ask_name", {"a": 1})]
+
+def test_other_rpc_errors_return_none(monkeypatch):
+    monkeypatch.setattr(database, "db_client", FakeClient(rpc_error="connection reset"))
+    assert asyncio.run(SessionManager.update_state("p", "ask_name", {})) is None
+
+def test_cold_key_update_needs_no_read(monkeypatch):
+    calls = []
+
+    class DB:
+        @staticmethod
+        async def get_state(key):
+            calls.append("get")
+
+        @staticmethod
+        async def update_state(key, step, data=None):
+            calls.append("merge")
+            return {"phone": key, "current_step": step, "collected_data": {"name": "John", **data}}
+
+    monkeypatch.setattr(store_module, "SessionManager", DB)
+    store = SessionStore(durability="batched", flush_delay=10)
+
+    async def main():
+        merged = await store.update_state("p", "ask_time", {"party_size": 4})
+        return merged, await store.get_state("p")
+
+    merged, cached = asyncio.run(main())
+    assert calls == ["merge"]
+    assert merged == cached == {"phone": "p", "current_step": "ask_time", "collected_data": {"name": "John", "party_size": 4}}
@@ -0,0 +1,122 @@
+import copy
+import asyncio
+from types import SimpleNamespace as NS
+
+import pytest
+
+import core.hospitality_services as hs
+import core.model_cascade as cascade
+from core.hospitality_services import reply_problem
+from core.metrics import metrics
+from core.model_cascade import FAST_MODEL, REPLY_MODEL, models_for, pool_kind, run_cascade
+
+def run(intent, answers, validate=lambda r: None if r == "good" else "bad"):
+    """answers: model -> reply (or exception to raise)."""
+    tried = []
+
+    async def attempt(model, final):
+        tried.append((model, final))
+        answer = answers[model]
+        if isinstance(answer, Exception): raise answer
+        return answer
+
+    return asyncio.run(run_cascade("generate", intent, attempt, validate, 100)), tried
+
+def counter(name):
+    return metrics.counters[name]
+
+# ---------- Routes ----------
+def test_routes():
+    assert models_for("generate", "ask_time") == [FAST_MODEL, REPLY_MODEL]
+    assert models_for("generate", "confirm_booking") == [REPLY_MODEL]
+    assert pool_kind("generate", FAST_MODEL) == "generate_fast"
+    assert pool_kind("generate", REPLY_MODEL) == "generate"
+
+def test_route_overrides_from_env(monkeypatch):
+    monkeypatch.setattr(cascade, "MODEL_ROUTES", copy.deepcopy(cascade.MODEL_ROUTES))
+    monkeypatch.setenv("MODEL_ROUTES_JSON", '{"generate": {"ask_time": ["%s"]}, "summarise": {"default": ["m"]}}' % FAST_MODEL)
+    cascade._load_route_overrides()
+    assert models_for("generate", "ask_time") == [FAST_MODEL]
+    assert models_for("generate", "ask_name") == [FAST_MODEL, REPLY_MODEL]  # Untouched entries stay
+    assert models_for("summarise", "anything") == ["m"]
+
+@pytest.mark.parametrize("raw", ["not json", '["a list"]', '{"generate": ["no intents"]}'])
+def test_invalid_route_overrides_are_ignored(monkeypatch, raw):
+    routes = copy.deepcopy(cascade.MODEL_ROUTES)
+    monkeypatch.setattr(cascade, "MODEL_ROUTES", routes)
+    monkeypatch.setenv("MODEL_ROUTES_JSON", raw)
+    cascade._load_route_overrides()
+    assert models_for("generate", "ask_time") == [FAST_MODEL, REPLY_MODEL]
+
+# ---------- run_cascade ----------
+def test_valid_fast_reply_is_served_without_escalating():
+    before = counter("cascade.generate.ask_time.escalations")
+    result, tried = run("ask_time", {FAST_MODEL: "good", REPLY_MODEL: "unused"})
+    assert result == "good"
+    assert tried == [(FAST_MODEL, False)]
+    assert counter("cascade.generate.ask_time.escalations") == before
+
+def test_invalid_fast_reply_escalates_and_counts_the_penalty():
+    before = counter("cascade.generate.ask_date.escalations")
+    result, tried = run("ask_date", {FAST_MODEL: "bad", REPLY_MODEL: "good"})
+    assert result == "good"
+    assert tried == [(FAST_MODEL, False), (REPLY_MODEL, True)]
+    assert counter("cascade.generate.ask_date.escalations") == before + 1
+    assert metrics.samples["cascade.generate.ask_date.escalation_penalty_ms"]
+    assert counter("cascade.generate.ask_date.served.large") >= 1
+
+def test_fast_model_error_escalates():
+    result, tried = run("ask_name", {FAST_MODEL: RuntimeError("503"), REPLY_MODEL: "good"})
+    assert result == "good"
+    assert len(tried) == 2
+
+def test_final_model_answer_is_returned_even_if_invalid():
+    before = counter("cascade.generate.ask_phone.final_invalid")
+    result, _ = run("ask_phone", {FAST_MODEL: "bad", REPLY_MODEL: "still bad"})
+    assert result == "still bad"
+    assert counter("cascade.generate.ask_phone.final_invalid") == before + 1
+
+def test_final_model_error_is_raised():
+    with pytest.raises(RuntimeError):
+        run("ask_party_size", {FAST_MODEL: "bad", REPLY_MODEL: RuntimeError("down")})
+
+# ---------- reply_problem ----------
+@pytest.mark.parametrize("text, intent, problem", [
+    ("What time works best for you?", "ask_time", None),
+    ("", "ask_time", "empty"),
+    ("Lovely.", "ask_time", "asks nothing"),
+    ("Per the collected JSON, what time?", "ask_time", "prompt leak"),
+    ("x" * 301 + "?", "ask_time", "too long"),
+    ("You're all set, Priya, table for 4!", "confirm_booking", None),
+    ("You're all set, table for 4!", "confirm_booking", "missing details ['Priya']"),
+])
+def test_reply_problem(text, intent, problem):
+    assert reply_problem(text, intent, {"name": "Priya", "party_size": 4}) == problem
+
+# ---------- Streaming with escalation ----------
+def test_escalated_reply_is_streamed_and_only_the_final_tier_is_spoken(monkeypatch):
+    class Stream:
+        def __aiter__(self):
+            async def chunks():
+                for delta in ["Sure! ", "What time works best?"]:
+                    yield NS(choices=[NS(delta=NS(content=delta))])
+            return chunks()
+
+        async def close(self): pass
+
+    async def create(**kwargs):
+        if kwargs.get("stream"): return Stream()
+        return NS(choices=[NS(message=NS(content="Okay."))])  # Fast tier forgets to ask
+
+    class Pool:
+        async def call(self, op, **kwargs):
+            return await op(NS(chat=NS(completions=NS(create=create))))
+
+    monkeypatch.setattr(hs, "groq_pool", Pool())
+    monkeypatch.setattr(hs, "TEMPLATE_RESPONSES", False)
+    spoken = []
+    before = metrics.sample_counts["generator.first_clause_ms.large"]
+    reply = asyncio.run(hs.generate_riya_response("ask_time", {"name": "Priya"}, "tomorrow", on_clause=spoken.append))
+    assert reply == "Sure! What time works best?"
+    assert spoken == ["Sure!", "What time works best?"]
+    assert metrics.sample_counts["generator.first_clause_ms.large"] == before + 1
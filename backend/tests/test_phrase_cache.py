@@ -0,0 +1,33 @@
+from core.phrase_cache import PhraseCache, normalise_phrase, write_pack
+
+def test_normalise_ignores_case_punctuation_and_spacing():
+    assert normalise_phrase("I’m sorry,  I didn't catch THAT!") == "i'm sorry i didn't catch that"
+    assert normalise_phrase(None) == ""
+
+def make_pack(tmp_path, **kwargs):
+    path = str(tmp_path / "phrases.bin")
+    write_pack(path, {"Hi there!": b"AUDIO-1", "I couldn't hear you.": b"AUDIO-22"}, model="m", voice="v")
+    return PhraseCache(path, **kwargs)
+
+def test_round_trip_through_the_pack(tmp_path):
+    cache = make_pack(tmp_path)
+    assert cache.get("hi there") == b"AUDIO-1"
+    assert cache.get("I couldn’t hear you") == b"AUDIO-22"
+
+def test_other_voice_is_a_miss(tmp_path):
+    cache = make_pack(tmp_path)
+    assert cache.get("Hi there!", model="m", voice="v") == b"AUDIO-1"
+    assert cache.get("Hi there!", model="m", voice="other") is None
+
+def test_misses_are_counted(tmp_path):
+    cache = make_pack(tmp_path)
+    for _ in range(3):
+        cache.get("What time works best?")
+    cache.get("Anything else?")
+    assert cache.top_misses(1) == [("what time works best", 3)]
+
+def test_missing_or_corrupt_pack_just_misses(tmp_path):
+    assert PhraseCache(str(tmp_path / "nope.bin")).get("Hi there!") is None
+    bad = tmp_path / "bad.bin"
+    bad.write_bytes(b"NOPE" + b"\0" * 16)
+    assert PhraseCache(str(bad)).get("Hi there!") is None
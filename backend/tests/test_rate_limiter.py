@@ -0,0 +1,73 @@
+import time
+import asyncio
+
+import pytest
+
+from core.rate_limiter import Lane, RateLimiter, RateLimitTimeout, TokenBucket, estimate_tokens
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 20
+    assert estimate_tokens("a" * 400) == 120
+    assert estimate_tokens("  two   words ") == estimate_tokens("two words")
+
+# ---------- TokenBucket ----------
+def test_bucket_refills_continuously():
+    bucket = TokenBucket(60)  # 1 per second
+    now = bucket.updated
+    bucket.take(60)
+    assert bucket.wait_time(1, now) == pytest.approx(1.0, abs=0.01)
+    assert bucket.wait_time(1, now + 1.0) == pytest.approx(0, abs=0.01)
+    assert bucket.wait_time(10, now + 1.0) == pytest.approx(9.0, abs=0.01)
+
+def test_oversized_requests_wait_for_a_full_bucket_not_forever():
+    bucket = TokenBucket(60)
+    now = bucket.updated
+    bucket.take(30)
+    assert bucket.wait_time(1000, now) == pytest.approx(30.0, abs=0.01)
+
+# ---------- RateLimiter ----------
+def test_fast_path_takes_budget_without_queueing():
+    limiter = RateLimiter({"stt": 20})
+    asyncio.run(limiter.acquire("key1", "stt", 1))
+    assert limiter.bucket("key1", "stt").level == pytest.approx(19, abs=0.01)
+    assert limiter.waiters[("key1", "stt")] == []
+
+def test_higher_lanes_are_served_first_when_contended():
+    limiter = RateLimiter({"stt": 600})  # 10 per second
+    served = []
+
+    async def request(name, lane):
+        await limiter.acquire("key1", "stt", 1, lane, deadline=time.monotonic() + 5)
+        served.append(name)
+
+    async def run():
+        limiter.bucket("key1", "stt").take(600)  # Empty: everyone queues
+        tasks = [asyncio.create_task(request("partial 1", Lane.BACKGROUND))]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(request("partial 2", Lane.BACKGROUND)))
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(request("final", Lane.DIALOGUE)))
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(request("confirmation", Lane.CONFIRMATION)))
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    assert served == ["confirmation", "final", "partial 1", "partial 2"]
+
+def test_waiting_past_the_deadline_raises_and_frees_the_queue():
+    limiter = RateLimiter({"stt": 60})
+
+    async def run():
+        limiter.bucket("key1", "stt").take(60)
+        with pytest.raises(RateLimitTimeout):
+            await limiter.acquire("key1", "stt", 1, Lane.BACKGROUND, deadline=time.monotonic() + 0.05)
+
+    asyncio.run(run())
+    assert limiter.waiters[("key1", "stt")] == []
+
+def test_buckets_are_per_key_and_model():
+    limiter = RateLimiter({"stt": 20, "llm": 6000})
+    limiter.bucket("key1", "stt").take(20)
+    assert limiter.wait_time("key1", "stt", 1) > 0
+    assert limiter.wait_time("key2", "stt", 1) == 0
+    assert limiter.wait_time("key1", "llm", 100) == 0
@@ -0,0 +1,46 @@
+import pytest
+
+from core.phrase_cache import PHRASES
+from core.response_templates import (
+    ASKS, render_template_response, speak_date, speak_phone, speak_time, static_template_lines,
+)
+
+BOOKING = {"name": "John", "phone": "7994335235", "party_size": 4, "date": "2025-01-09", "time": "19:00"}
+
+@pytest.mark.parametrize("value, spoken", [("19:00", "7 PM"), ("19:30", "7:30 PM"), ("12:00", "noon"), ("00:15", "12:15 AM")])
+def test_speak_time(value, spoken):
+    assert speak_time(value) == spoken
+
+def test_speak_date_and_phone():
+    assert speak_date("2025-01-09") == "Thursday, January 9th"
+    assert speak_date("2025-01-11") == "Saturday, January 11th"
+    assert speak_phone("7994335235") == "799-433-5235"
+    assert speak_phone("+91 79943 35235") == "91 799-433-5235"
+
+def test_confirmation_reads_back_every_slot():
+    reply = render_template_response("confirm_booking", BOOKING, {"time": "19:00"})
+    assert reply == "Amazing! You're all set, table for 4 on Thursday, January 9th at 7 PM under John. We can't wait to see you!"
+
+def test_confirmation_needs_the_booking_slots():
+    assert render_template_response("confirm_booking", {**BOOKING, "time": None}, {}) is None
+
+def test_ask_acknowledges_what_was_just_given():
+    reply = render_template_response("ask_time", BOOKING, {"party_size": 4, "date": "2025-01-09"})
+    assert "a table for 4 on Thursday, January 9th" in reply
+    assert reply.endswith(tuple(ASKS["ask_time"]))
+
+@pytest.mark.parametrize("intent, extracted, text", [
+    ("ask_time", {"party_size": 4}, "Do you have a patio?"),           # Caller asked something
+    ("ask_time", {"special_requests": "birthday"}, "It's a birthday"),  # Needs a real reply
+    ("ask_time", {}, "hmm let me think"),                               # Nothing answered
+    ("welcome", {"name": "John"}, "Hi, I'm John"),                      # Deserves a real greeting
+    ("something_new", {"name": "John"}, "John"),                        # No template
+])
+def test_off_script_turns_go_to_the_llm(intent, extracted, text):
+    assert render_template_response(intent, BOOKING, extracted, text) is None
+
+def test_plain_hello_gets_the_stock_greeting():
+    assert render_template_response("welcome", {}, {}, "hello") == PHRASES["greeting"]
+
+def test_static_lines_have_no_slots():
+    assert all("{" not in line for line in static_template_lines())
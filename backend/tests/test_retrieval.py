@@ -0,0 +1,78 @@
+import os
+
+import numpy as np
+import pytest
+
+import core.retrieval as retrieval
+from core.retrieval import ChunkRetriever, atomic_write, read_chunk_store, write_chunk_store
+
+# ---------- Chunk store ----------
+def test_chunk_store_round_trip(tmp_path):
+    path = str(tmp_path / "chunks.bin")
+    chunks = {7: "First project", -1: "", 2**62: "Ünïcode — “quotes”"}
+    write_chunk_store(path, chunks)
+    assert read_chunk_store(path) == chunks
+    assert list(read_chunk_store(path)) == list(chunks)  # Document order is kept
+
+def test_foreign_file_is_rejected(tmp_path):
+    path = tmp_path / "chunks.bin"
+    path.write_bytes(b"nope")
+    with pytest.raises(ValueError):
+        read_chunk_store(str(path))
+
+def test_atomic_write_replaces_without_leftovers(tmp_path):
+    path = tmp_path / "out.bin"
+    path.write_bytes(b"old")
+    atomic_write(str(path), b"new")
+    assert path.read_bytes() == b"new"
+    assert os.listdir(tmp_path) == ["out.bin"]
+
+# ---------- ChunkRetriever ----------
+class FakeEmbedder:
+    """Orthogonal one-hot vectors per known text (so search results are exact)."""
+    name = "minilm"
+    dim = 4
+    texts = ["pasta", "sushi", "tacos", "curry"]
+
+    def encode(self, texts):
+        return np.stack([np.eye(self.dim, dtype=np.float32)[self.texts.index(t)] for t in texts])
+
+@pytest.fixture
+def vector_store(tmp_path):
+    faiss = pytest.importorskip("faiss")
+    embedder = FakeEmbedder()
+    ids = np.array([10, 20, 30, 40], dtype=np.int64)
+    index = faiss.IndexIDMap(faiss.IndexFlatL2(embedder.dim))
+    index.add_with_ids(embedder.encode(embedder.texts), ids)
+    index_path, store_path = str(tmp_path / "index.bin"), str(tmp_path / "chunks.bin")
+    faiss.write_index(index, index_path)
+    write_chunk_store(store_path, dict(zip(ids.tolist(), embedder.texts)))
+    return index_path, store_path
+
+def test_search_returns_most_relevant_chunks_first(vector_store, monkeypatch):
+    monkeypatch.setattr(retrieval, "get_embedder", lambda kind=None: FakeEmbedder())
+    retriever = ChunkRetriever(*vector_store)
+    assert retriever.load()
+    assert retriever.search("sushi", k=1) == ["sushi"]
+    assert retriever.search("curry", k=10)[0] == "curry"
+    assert len(retriever.search("curry", k=10)) == 4
+
+def test_missing_store_disables_retrieval_once(tmp_path, capsys):
+    pytest.importorskip("faiss")
+    retriever = ChunkRetriever(str(tmp_path / "missing.bin"), str(tmp_path / "missing_chunks.bin"))
+    assert not retriever.load()
+    capsys.readouterr()
+    assert not retriever.load()
+    assert capsys.readouterr().out == ""  # Not retried (or re-logged) on every question
+
+def test_store_out_of_sync_with_index_disables_retrieval(vector_store, monkeypatch):
+    monkeypatch.setattr(retrieval, "get_embedder", lambda kind=None: FakeEmbedder())
+    index_path, store_path = vector_store
+    write_chunk_store(store_path, {10: "pasta"})
+    assert not ChunkRetriever(index_path, store_path).load()
+
+def test_hashing_fallback_embedder_is_not_used_for_search(vector_store, monkeypatch):
+    class Hashing(FakeEmbedder):
+        name = "hashing"  # What get_embedder("minilm") returns without sentence-transformers
+    monkeypatch.setattr(retrieval, "get_embedder", lambda kind=None: Hashing())
+    assert not ChunkRetriever(*vector_store).load()
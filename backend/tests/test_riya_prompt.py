@@ -0,0 +1,47 @@
+import json
+
+import core.hospitality_services as hs
+from bench_prompt import HISTORY, TURNS, legacy_riya_prompt
+from core.hospitality_services import INTENT_BEHAVIOURS, RIYA_STATIC_PREFIX, build_riya_messages, build_riya_prompt
+from core.metrics import metrics
+
+BOOKING = {
+    "name": "Priya", "phone": "9876543210", "party_size": 4, "date": None, "time": "",
+    "history": ["Riya: Who am I speaking with?", "Caller: Priya", "Riya: How many people?", "Caller: four of us"],
+    "retries": {"date": 2},
+}
+
+def test_system_prefix_is_identical_every_turn():
+    first, _ = build_riya_messages("ask_date", BOOKING, "four of us")
+    second, _ = build_riya_messages("confirm_booking", {}, "")
+    assert first[0] == second[0] == {"role": "system", "content": RIYA_STATIC_PREFIX}
+
+def test_turn_message_has_only_this_intent_and_filled_fields():
+    prompt = build_riya_prompt("ask_date", BOOKING, "four of us")
+    assert INTENT_BEHAVIOURS["ask_date"] in prompt
+    assert INTENT_BEHAVIOURS["ask_time"] not in prompt
+    state = json.loads(prompt.split("Booking so far: ")[1].split("\n")[0])
+    assert state == {"name": "Priya", "phone": "9876543210", "party_size": 4}
+
+def test_last_caller_line_is_not_repeated_from_history():
+    prompt = build_riya_prompt("ask_date", BOOKING, "four of us")
+    assert prompt.count("four of us") == 1
+    assert "Riya: How many people?" in prompt
+
+def test_history_is_trimmed_oldest_first_to_the_budget(monkeypatch):
+    monkeypatch.setattr(hs, "PROMPT_TOKEN_BUDGET", hs.STATIC_PREFIX_TOKENS + 120)
+    long_history = [f"Caller: line {i} " + "x" * 80 for i in range(6)]
+    before = metrics.counters["generator.prompt_history_trimmed"]
+    prompt = build_riya_prompt("ask_date", {"history": long_history}, "hello")
+    assert "line 5" in prompt and "line 0" not in prompt
+    assert metrics.counters["generator.prompt_history_trimmed"] == before + 1
+
+def test_token_estimate_covers_both_messages():
+    messages, tokens = build_riya_messages("ask_date", BOOKING, "four of us")
+    assert tokens == hs.STATIC_PREFIX_TOKENS + hs.estimate_tokens(messages[1]["content"])
+
+def test_compact_prompt_is_smaller_than_the_legacy_one_every_turn():
+    for turn, (intent, fields, last_user_text) in enumerate(TURNS):
+        collected_data = {**fields, "history": HISTORY[:2 * turn]}
+        _, compact = build_riya_messages(intent, collected_data, last_user_text)
+        assert compact < hs.estimate_tokens(hs.RIYA_SYSTEM_PROMPT + legacy_riya_prompt(intent, collected_data, last_user_text))
@@ -0,0 +1,92 @@
+import os
+import json
+import time
+import asyncio
+
+import pytest
+
+import core.ai_services as ai_services
+from core.embeddings import HashingEmbedder
+from core.semantic_router import SemanticRouter
+
+SEEDS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "seeds.json")
+
+@pytest.fixture(scope="module")
+def trigger_map():
+    with open(SEEDS_FILE) as f:
+        return {row["slug"]: row["triggers"] for row in json.load(f)}
+
+@pytest.fixture
+def router(trigger_map):
+    router = SemanticRouter(HashingEmbedder())
+    router.fit(trigger_map)
+    return router
+
+# ---------- Hashing thresholds ----------
+@pytest.mark.parametrize("text, slug", [
+    ("Tell me about yourself.", "intro"),
+    ("Who are you?", "intro"),
+    ("tell me about yourself please", "intro"),
+    ("What's your biggest strength", "superpower"),
+    ("What have you built?", "projects"),
+])
+def test_near_verbatim_triggers_are_routed_locally(router, text, slug):
+    assert router.route(text)[0] == slug
+
+@pytest.mark.parametrize("text", [
+    "Which tech stack do you hate?",     # Shares "tech stack", asks the opposite
+    "Which projects do you hate?",
+    "What's your greatest weakness?",    # Paraphrase: hashing can't tell, the LLM can
+    "What are your hobbies?",
+])
+def test_word_overlap_alone_is_not_accepted(router, text):
+    assert router.route(text)[0] is None
+
+def test_process_questions_go_to_the_llm(router):
+    assert router.route("How did you build this?")[0] is None
+
+def test_clear_misses_go_straight_to_research(router):
+    assert router.route("Quantum chromodynamics lattice QCD")[0] == "research"
+
+# ---------- get_query_intent ----------
+class SlowEmbedder(HashingEmbedder):
+    def encode(self, texts):
+        time.sleep(0.05)  # Stands in for MiniLM
+        return super().encode(texts)
+
+def test_router_is_fitted_once_off_the_event_loop(monkeypatch, trigger_map):
+    router = SemanticRouter(SlowEmbedder())
+    fits = []
+    real_fit = router.fit
+    monkeypatch.setattr(router, "fit", lambda tm: fits.append(1) or real_fit(tm))
+    monkeypatch.setattr(ai_services, "semantic_router", router)
+    monkeypatch.setattr(ai_services, "_router_fit", None)
+    monkeypatch.setattr(ai_services.cache_manager, "valid_slugs", list(trigger_map))
+    monkeypatch.setattr(ai_services.cache_manager, "trigger_map", trigger_map)
+
+    async def llm_router(*args, **kwargs):
+        raise RuntimeError("offline")
+    monkeypatch.setattr(ai_services.groq_pool, "call", llm_router)
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        clock = asyncio.create_task(ticker())
+        # Before the fit finishes queries fall back to the LLM router (here: offline -> research)
+        first = await asyncio.gather(*(ai_services.get_query_intent("Who are you?") for _ in range(3)))
+        await ai_services.start_semantic_router()
+        routed = await ai_services.get_query_intent("Who are you?")
+        clock.cancel()
+        return first, routed, ticks
+
+    first, routed, ticks = asyncio.run(run())
+    assert first == ["research"] * 3
+    assert routed == "intro"
+    assert fits == [1]
+    assert ticks >= 5  # The loop kept running while triggers were embedded
@@ -0,0 +1,101 @@
+import asyncio
+
+from core import session_store as store_module
+from core.session_store import SessionStore
+
+class FakeDB:
+    """Stands in for SessionManager: records writes, can fail or stall them."""
+
+    def __init__(self):
+        self.rows = {}
+        self.writes = []
+        self.deletes = []
+        self.fail_next = 0
+        self.stall = None
+
+    async def get_state(self, key):
+        return self.rows.get(key)
+
+    async def update_state(self, key, step, data=None):
+        if self.stall:
+            await self.stall.wait()
+        if self.fail_next:
+            self.fail_next -= 1
+            return None
+        row = {"phone": key, "current_step": step, "collected_data": dict(data or {})}
+        self.rows[key] = row
+        self.writes.append((key, step))
+        return row
+
+    async def clear_session(self, key):
+        self.rows.pop(key, None)
+        self.deletes.append(key)
+
+def make_store(monkeypatch, **kwargs):
+    db = FakeDB()
+    monkeypatch.setattr(store_module, "SessionManager", db)
+    return SessionStore(**{"durability": "batched", "flush_delay": 0.01, **kwargs}), db
+
+def test_writes_are_coalesced(monkeypatch):
+    store, db = make_store(monkeypatch)
+
+    async def main():
+        db.rows["s1"] = {"phone": "s1", "current_step": "ask_name", "collected_data": {}}
+        await store.get_state("s1")
+        for step in ("ask_phone", "ask_date", "ask_time"):
+            await store.update_state("s1", step, {step: True})
+        await asyncio.sleep(0.05)
+
+    asyncio.run(main())
+    assert db.writes == [("s1", "ask_time")]
+    assert set(db.rows["s1"]["collected_data"]) == {"ask_phone", "ask_date", "ask_time"}
+
+def test_failed_flush_is_retried_without_further_updates(monkeypatch):
+    store, db = make_store(monkeypatch)
+
+    async def main():
+        db.rows["s1"] = {"phone": "s1", "current_step": "ask_name", "collected_data": {}}
+        await store.get_state("s1")
+        db.fail_next = 2
+        await store.update_state("s1", "ask_phone", {"name": "John"})
+        await asyncio.sleep(0.3)  # 0.01 + 0.02 + 0.04 backoff
+
+    asyncio.run(main())
+    assert db.writes == [("s1", "ask_phone")]
+    assert db.rows["s1"]["collected_data"] == {"name": "John"}
+
+def test_clear_session_waits_for_in_flight_flush(monkeypatch):
+    store, db = make_store(monkeypatch)
+
+    async def main():
+        db.rows["s1"] = {"phone": "s1", "current_step": "ask_name", "collected_data": {}}
+        await store.get_state("s1")
+        await store.update_state("s1", "ask_phone", {"name": "John"})
+        db.stall = asyncio.Event()
+        flushing = asyncio.create_task(store.flush("s1"))
+        await asyncio.sleep(0)  # Flush now holds the entry lock, stalled in update_state
+        clearing = asyncio.create_task(store.clear_session("s1"))
+        await asyncio.sleep(0.01)
+        assert db.deletes == []  # Delete waits for the write it would otherwise race
+        db.stall.set()
+        await asyncio.gather(flushing, clearing)
+        return await store.get_state("s1")
+
+    assert asyncio.run(main()) is None
+    assert db.deletes == ["s1"]
+    assert "s1" not in db.rows
+
+def test_pending_flush_of_cleared_session_is_a_no_op(monkeypatch):
+    store, db = make_store(monkeypatch, flush_delay=10)
+
+    async def main():
+        db.rows["s1"] = {"phone": "s1", "current_step": "ask_name", "collected_data": {}}
+        await store.get_state("s1")
+        await store.update_state("s1", "ask_phone", {"name": "John"})
+        old = store._sessions["s1"]
+        await store.clear_session("s1")
+        store._sessions["s1"] = old  # Flush that grabbed the old entry before the clear
+        await store.flush("s1")
+
+    asyncio.run(main())
+    assert db.writes == []
@@ -0,0 +1,39 @@
+import asyncio
+
+from core.hospitality_services import Speculation, predict_next_intent
+from core.metrics import metrics
+
+def test_predicts_the_field_after_the_one_being_asked():
+    # Riya just asked for the phone; once answered, she'll ask for the party size
+    assert predict_next_intent({"name": "John"}) == "ask_party_size"
+    assert predict_next_intent({}) == "ask_phone"
+
+def test_invalid_phone_counts_as_missing():
+    assert predict_next_intent({"name": "John", "phone": "123"}) == "ask_party_size"
+
+def test_no_guess_before_confirmation():
+    data = {"name": "John", "phone": "7994335235", "party_size": 4, "date": "2025-01-09"}
+    assert predict_next_intent(data) is None
+
+def run_speculation(take_intent):
+    async def main():
+        task = asyncio.create_task(asyncio.sleep(10, result="reply"))
+        speculation = Speculation("ask_date", prompt_tokens=300, task=task)
+        taken = speculation.take(take_intent)
+        speculation.discard()
+        await asyncio.sleep(0)
+        return taken, task
+    return asyncio.run(main())
+
+def test_wrong_guess_is_cancelled_and_counted_as_waste():
+    wasted = metrics.counters["speculation.wasted_tokens"]
+    taken, task = run_speculation("ask_time")
+    assert taken is None
+    assert task.cancelled()
+    assert metrics.counters["speculation.wasted_tokens"] - wasted == 300
+
+def test_right_guess_is_committed_and_discard_is_a_no_op():
+    misses = metrics.counters["speculation.misses"]
+    taken, task = run_speculation("ask_date")
+    assert taken is task
+    assert metrics.counters["speculation.misses"] == misses
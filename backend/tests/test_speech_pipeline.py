@@ -0,0 +1,79 @@
+import asyncio
+from types import SimpleNamespace
+
+import core.hospitality_services as hs
+from core.hospitality_services import ClauseSegmenter, SpeechPipeline
+
+def segment(deltas, **kwargs):
+    segmenter = ClauseSegmenter(**kwargs)
+    clauses = []
+    for delta in deltas:
+        clauses += segmenter.feed(delta)
+    return clauses, segmenter.flush()
+
+# ---------- ClauseSegmenter ----------
+def test_sentences_are_cut_as_soon_as_they_end():
+    clauses, rest = segment(["Perfect, a ta", "ble for 4! What ", "time works best?"])
+    assert clauses == ["Perfect, a table for 4!"]
+    assert rest == ["What time works best?"]
+
+def test_commas_only_split_long_sentences():
+    short, _ = segment(["Got it, thanks. "])
+    assert short == ["Got it, thanks."]
+    long_clauses, rest = segment(["Amazing, you're all set for four people on Thursday the ninth, ", "see you then"])
+    assert long_clauses == ["Amazing, you're all set for four people on Thursday the ninth,"]
+    assert rest == ["see you then"]
+
+def test_no_cut_without_trailing_space():
+    clauses, rest = segment(["Table for 4.", "5 people"])
+    assert clauses == []
+    assert rest == ["Table for 4.5 people"]
+
+def test_flush_of_empty_buffer():
+    assert ClauseSegmenter().flush() == []
+
+# ---------- SpeechPipeline ----------
+def fake_tts(delays):
+    async def get_speech_from_text(text, audio_format="wav", lane=None):
+        await asyncio.sleep(delays.get(text, 0))
+
+        async def stream():
+            yield text.encode()
+        return stream()
+    return get_speech_from_text
+
+def test_audio_is_yielded_in_clause_order(monkeypatch):
+    # The second clause synthesises faster but must still play second
+    monkeypatch.setattr(hs, "get_speech_from_text", fake_tts({"first": 0.05, "second": 0}))
+
+    async def main():
+        speech = SpeechPipeline()
+        speech.say("first")
+        speech.say("second")
+        speech.close()
+        return [chunk async for chunk in speech.audio()]
+
+    assert asyncio.run(main()) == [b"first", b"second"]
+
+def test_streamed_completion_hands_over_clauses_while_generating(monkeypatch):
+    heard = []
+
+    async def chunks():
+        for delta in ["Got it! ", "How many ", "people?"]:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))])
+            heard.append(f"after {delta!r}")
+
+    class Stream:
+        def __aiter__(self): return chunks()
+        async def close(self): pass
+
+    class Pool:
+        async def call(self, op, **kwargs):
+            return Stream()
+
+    monkeypatch.setattr(hs, "groq_pool", Pool())
+    text = asyncio.run(hs._stream_riya_completion([], lambda clause: heard.append(clause), 100, hs.Lane.DIALOGUE, "m"))
+    assert text == "Got it! How many people?"
+    # The first clause is spoken before the rest of the reply has arrived
+    assert heard.index("Got it!") < heard.index("after 'How many '")
+    assert heard[-1] == "How many people?"
@@ -0,0 +1,149 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import core.ai_services as ai_services
+import core.hospitality_services as hs
+import core.speech_synthesis as speech
+import core.turn_context as turn_context
+from core.tts_cache import TTSCache
+from core.turn_context import TurnContext, use_turn
+
+class FakeResponse:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.closed = False
+
+    async def __aenter__(self): return self
+
+    async def __aexit__(self, *exc):
+        self.closed = True
+        return False
+
+    async def iter_bytes(self, chunk_size=None):
+        for chunk in self.chunks:
+            yield chunk
+
+class FakePool:
+    """Runs op() against a fake client whose TTS streams `chunks` (or fails)."""
+
+    def __init__(self, chunks=(b"RIFF", b"-audio"), fail=False):
+        self.clients = [None]
+        self.requests, self.responses = [], []
+        self.chunks, self.fail = list(chunks), fail
+        self.delay = 0
+
+        def create(**kwargs):
+            self.requests.append(kwargs["input"])
+            self.responses.append(FakeResponse(self.chunks))
+            return self.responses[-1]
+        self.client = SimpleNamespace(audio=SimpleNamespace(speech=SimpleNamespace(
+            with_streaming_response=SimpleNamespace(create=create))))
+
+    async def call(self, op, **kwargs):
+        await asyncio.sleep(self.delay)
+        if self.fail: raise RuntimeError("every key rate limited")
+        return await op(self.client)
+
+@pytest.fixture
+def tts(monkeypatch):
+    pool = FakePool()
+    monkeypatch.setattr(speech, "get_groq_pool", lambda: pool)
+    monkeypatch.setattr(speech, "tts_cache", TTSCache(max_bytes=1_000_000, disk_dir=""))
+    monkeypatch.setattr(speech.phrase_cache, "get", lambda text, model=None, voice=None: b"PACK" if text == "Got it!" else None)
+    monkeypatch.setattr(speech.fragment_assembler, "plan", lambda *args, **kwargs: None)
+    gtts_calls = pool.gtts_calls = []
+    monkeypatch.setattr(speech, "_gtts_audio", lambda text: gtts_calls.append(text) or b"MP3")
+    return pool
+
+def say(text, audio_format="wav"):
+    async def run():
+        stream = await speech.get_speech_from_text(text, audio_format)
+        return await speech.read_audio(stream) if stream else None
+    return asyncio.run(run())
+
+def test_both_services_share_one_tts_path():
+    assert hs.get_speech_from_text is speech.get_speech_from_text
+    assert ai_services.get_speech_from_text is speech.get_speech_from_text
+
+def test_phrase_pack_skips_the_network(tts):
+    assert say("Got it!") == b"PACK"
+    assert tts.requests == []
+
+def test_groq_audio_is_streamed_then_cached(tts):
+    assert say("Your table is ready.") == b"RIFF-audio"
+    assert say("your table is ready") == b"RIFF-audio"
+    assert tts.requests == ["Your table is ready."]  # Second time from the TTS cache
+
+def test_gtts_fallback_is_not_cached(tts):
+    tts.fail = True
+    assert say("Sorry about that.") == b"MP3"
+    tts.fail = False
+    assert say("Sorry about that.") == b"RIFF-audio"
+
+def test_encoded_audio_is_cached_per_format(tts, monkeypatch):
+    encoded = []
+
+    async def encode_audio(wav, audio_format):
+        encoded.append(audio_format)
+        return b"OGG" + wav
+    monkeypatch.setattr(speech, "encode_audio", encode_audio)
+    assert say("See you soon.", "opus") == b"OGGRIFF-audio"
+    assert say("See you soon.", "opus") == b"OGGRIFF-audio"
+    assert encoded == ["opus"]
+    assert tts.requests == ["See you soon."]
+
+def test_over_budget_tts_skips_the_clause_instead_of_falling_back_to_gtts(tts, monkeypatch):
+    monkeypatch.setattr(turn_context, "MIN_STAGE_S", 0.01)
+    tts.delay = 1  # Groq queued behind the TPM limit
+
+    async def run():
+        with use_turn(TurnContext(budget_ms=20), report=False) as turn:
+            return await speech.get_speech_from_text("Your table is ready."), turn
+
+    stream, turn = asyncio.run(run())
+    assert stream is None
+    assert turn.degraded == ["tts"]
+    assert tts.gtts_calls == []
+
+def test_provider_failure_within_budget_still_falls_back_to_gtts(tts):
+    tts.fail = True
+
+    async def run():
+        with use_turn(report=False):
+            return await speech.read_audio(await speech.get_speech_from_text("Sorry about that."))
+
+    assert asyncio.run(run()) == b"MP3"
+    assert tts.gtts_calls == ["Sorry about that."]
+
+# ---------- Closing streams ----------
+def test_discarded_hedge_loser_closes_the_provider_response(tts):
+    from core.groq_pool import _discard
+
+    async def run():
+        stream = await speech._open_groq_tts(tts.client, "Your table is ready.")
+        assert not tts.responses[0].closed  # Open after the first chunk
+        await _discard(stream)              # Never iterated
+        return tts.responses[0].closed      # Before the loop's shutdown finalises leftovers
+
+    assert asyncio.run(run())
+
+def test_cancelled_playback_closes_the_provider_response(tts):
+    tts.chunks = [b"RIFF", b"-one", b"-two"]
+
+    async def run():
+        stream = await speech._open_groq_tts(tts.client, "Your table is ready.")
+        chunks = aiter(stream)
+        assert await anext(chunks) == b"RIFF"
+        await chunks.aclose()  # Barge-in mid-clause
+        return tts.responses[0].closed
+
+    assert asyncio.run(run())
+
+def test_cached_whole_line_skips_fragment_gap_synthesis(tts, monkeypatch):
+    planned = []
+    monkeypatch.setattr(speech.fragment_assembler, "plan", lambda *args, **kwargs: planned.append(args) or None)
+    asyncio.run(speech.tts_cache.put("Table for 4, Priya.", speech.TTS_VOICE, speech.TTS_MODEL, b"RIFF-cached"))
+    assert say("Table for 4, Priya.") == b"RIFF-cached"
+    assert planned == [] and tts.requests == []
@@ -0,0 +1,107 @@
+import asyncio
+
+import numpy as np
+
+from core import streaming_stt
+from core.rate_limiter import Lane
+from core.streaming_stt import RingBuffer, StreamingTranscriber
+
+RATE = 16000
+
+def speech(seconds: float) -> np.ndarray:
+    t = np.arange(int(RATE * seconds)) / RATE
+    return (6000 * np.sin(2 * np.pi * 300 * t)).astype("<i2")
+
+def silence(seconds: float) -> np.ndarray:
+    return np.zeros(int(RATE * seconds), dtype="<i2")
+
+# ---------- RingBuffer ----------
+def test_ring_buffer_reads_by_absolute_index_across_wraparound():
+    ring = RingBuffer(10)
+    ring.append(np.arange(7, dtype=np.int16))
+    ring.append(np.arange(7, 14, dtype=np.int16))
+    assert ring.written == 14 and ring.oldest == 4
+    assert ring.read(0, 14).tolist() == list(range(4, 14))  # Overwritten audio is clamped away
+    assert ring.read(8, 12).tolist() == [8, 9, 10, 11]
+
+def test_ring_buffer_append_larger_than_capacity_keeps_the_tail():
+    ring = RingBuffer(4)
+    ring.append(np.arange(10, dtype=np.int16))
+    assert ring.written == 10
+    assert ring.read(0, 10).tolist() == [6, 7, 8, 9]
+
+# ---------- StreamingTranscriber ----------
+class FakeWhisper:
+    def __init__(self):
+        self.calls = []
+        self.lanes = []
+
+    async def __call__(self, wav: bytes, lane: Lane = Lane.DIALOGUE) -> str:
+        self.calls.append(len(wav))
+        self.lanes.append(lane)
+        await asyncio.sleep(0)
+        return f"part{len(self.calls)}"
+
+def test_quietest_cut_lands_in_the_pause():
+    transcriber = StreamingTranscriber(FakeWhisper())
+    transcriber.buffer.append(np.concatenate([speech(1.0), silence(0.3), speech(0.7)]))
+    cut = transcriber._quietest_cut(0, transcriber.buffer.written)
+    assert RATE * 1.0 <= cut <= RATE * 1.3
+
+def test_partials_while_speaking_and_silence_reuses_the_last_one():
+    whisper = FakeWhisper()
+
+    async def main():
+        transcriber = StreamingTranscriber(whisper)
+        for _ in range(10):  # 1 s of speech in 100 ms frames -> one partial
+            transcriber.feed(speech(0.1).tobytes())
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.01)
+        transcriber.feed(silence(0.1).tobytes())  # Caller stopped: nothing new said
+        return await transcriber.finish()
+
+    assert asyncio.run(main()) == "part1"
+    assert len(whisper.calls) == 1
+
+def test_finish_transcribes_speech_after_the_last_partial():
+    whisper = FakeWhisper()
+
+    async def main():
+        transcriber = StreamingTranscriber(whisper)
+        transcriber.feed(speech(1.0).tobytes())
+        await asyncio.sleep(0.01)
+        transcriber.feed(speech(0.5).tobytes())
+        return await transcriber.finish()
+
+    assert asyncio.run(main()) == "part2"
+    # Partials never queue ahead of a final transcript for the STT budget
+    assert whisper.lanes == [Lane.BACKGROUND, Lane.DIALOGUE]
+
+def test_partials_are_capped_per_utterance(monkeypatch):
+    monkeypatch.setattr(streaming_stt, "STT_MAX_PARTIALS", 2)
+    whisper = FakeWhisper()
+
+    async def main():
+        transcriber = StreamingTranscriber(whisper)
+        for _ in range(5):
+            transcriber.feed(speech(1.0).tobytes())
+            await asyncio.sleep(0.01)
+        return await transcriber.finish()
+
+    assert asyncio.run(main()) == "part3"
+    assert whisper.lanes == [Lane.BACKGROUND, Lane.BACKGROUND, Lane.DIALOGUE]
+
+def test_full_window_commits_up_to_a_quiet_point(monkeypatch):
+    monkeypatch.setattr(streaming_stt, "STT_WINDOW_S", 2.0)
+    whisper = FakeWhisper()
+
+    async def main():
+        transcriber = StreamingTranscriber(whisper)
+        transcriber.buffer.append(np.concatenate([speech(1.5), silence(0.2), speech(1.3)]))
+        await transcriber._partial(transcriber.buffer.written)
+        return transcriber
+
+    transcriber = asyncio.run(main())
+    assert transcriber.committed_text == "part1"
+    assert RATE * 1.5 <= transcriber.committed_at <= RATE * 1.7
+    assert transcriber.text == "part1 part2"
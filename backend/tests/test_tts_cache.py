@@ -0,0 +1,50 @@
+import asyncio
+
+from core.tts_cache import TTSCache, tts_cache_key
+
+def put(cache, text, audio, **kwargs):
+    asyncio.run(cache.put(text, "v", "m", audio, **kwargs))
+
+def get(cache, text, **kwargs):
+    return asyncio.run(cache.get(text, "v", "m", **kwargs))
+
+def test_key_is_content_addressed():
+    assert tts_cache_key("Got it!", "v", "m") == tts_cache_key("got it", "v", "m")
+    assert tts_cache_key("Got it!", "v", "m") != tts_cache_key("Got it!", "other", "m")
+    assert tts_cache_key("Got it!", "v", "m", "wav") != tts_cache_key("Got it!", "v", "m", "opus")
+
+def test_memory_tier_is_bounded_in_bytes_lru_first():
+    cache = TTSCache(max_bytes=100, disk_dir="")
+    put(cache, "a", b"x" * 20)
+    put(cache, "b", b"x" * 20)
+    put(cache, "c", b"x" * 20)
+    assert get(cache, "a")             # a is now most recently used
+    for text in ("d", "e", "f"):
+        put(cache, text, b"x" * 20)    # 120 bytes total: the oldest (b) goes
+    assert cache._bytes <= 100
+    assert get(cache, "b") is None
+    assert get(cache, "a") is not None
+
+def test_oversized_audio_is_not_kept_in_memory():
+    cache = TTSCache(max_bytes=100, disk_dir="")
+    put(cache, "small", b"x" * 10)
+    put(cache, "huge", b"x" * 26)  # > max_bytes / 4
+    assert get(cache, "huge") is None
+    assert get(cache, "small") == b"x" * 10
+
+def test_replacing_an_entry_does_not_double_count():
+    cache = TTSCache(max_bytes=100, disk_dir="")
+    put(cache, "a", b"x" * 20)
+    put(cache, "a", b"y" * 10)
+    assert cache._bytes == 10
+
+def test_disk_tier_survives_a_new_instance(tmp_path):
+    put(TTSCache(max_bytes=100, disk_dir=str(tmp_path)), "Got it!", b"AUDIO")
+    assert get(TTSCache(max_bytes=100, disk_dir=str(tmp_path)), "got it") == b"AUDIO"
+
+def test_disk_tier_is_pruned_to_its_budget(tmp_path):
+    cache = TTSCache(max_bytes=1000, disk_dir=str(tmp_path), disk_max_bytes=100)
+    for i in range(50):  # Pruning runs every 50 writes
+        put(cache, f"line {i}", b"x" * 10)
+    on_disk = sum(f.stat().st_size for f in tmp_path.rglob("*.audio"))
+    assert on_disk <= 100
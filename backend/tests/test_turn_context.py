@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+import core.groq_pool as groq_pool
+import core.turn_context as turn_context
+from core.turn_context import STAGE_SHARES, TurnContext, current_turn, turn_deadline, use_turn, within_budget
+
+@pytest.fixture
+def frozen_clock(monkeypatch):
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(turn_context.time, "monotonic", lambda: clock["now"])
+    return clock
+
+# ---------- stage_budget ----------
+def test_stage_budget_is_its_share_of_the_whole_turn(frozen_clock):
+    turn = TurnContext(budget_ms=10_000)
+    assert turn.stage_budget("stt") == pytest.approx(10 * STAGE_SHARES["stt"])
+    assert turn.stage_budget("generate") == pytest.approx(10 * STAGE_SHARES["generate"])
+
+def test_skipped_stages_hand_their_share_on(frozen_clock):
+    turn = TurnContext(budget_ms=10_000)
+    frozen_clock["now"] += 1.0                    # STT took 1 s
+    turn.stages_done |= {"stt", "extract"}        # Extraction was the fast path
+    pending = STAGE_SHARES["generate"] + STAGE_SHARES["tts"]
+    assert turn.stage_budget("generate") == pytest.approx(9 * STAGE_SHARES["generate"] / pending)
+    turn.stages_done.add("generate")
+    assert turn.stage_budget("tts") == pytest.approx(9.0)  # Last stage gets everything left
+
+def test_overdrawn_turn_still_gets_a_minimum(frozen_clock):
+    turn = TurnContext(budget_ms=1000)
+    frozen_clock["now"] += 5
+    assert turn.remaining() == 0
+    assert turn.stage_budget("tts") == turn_context.MIN_STAGE_S
+
+# ---------- within_budget ----------
+def test_outside_a_turn_the_stage_just_runs():
+    async def slow():
+        await asyncio.sleep(0.01)
+        return "done"
+
+    assert turn_deadline() is None
+    assert asyncio.run(within_budget("tts", slow())) == "done"
+
+def test_over_budget_stage_is_cancelled_and_falls_back(monkeypatch):
+    monkeypatch.setattr(turn_context, "MIN_STAGE_S", 0.01)
+    cancelled = []
+
+    async def hung():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def run():
+        with use_turn(TurnContext(budget_ms=40), report=False) as turn:
+            result = await within_budget("stt", hung(), fallback=lambda: "")
+            return turn, result
+
+    turn, result = asyncio.run(run())
+    assert result == ""
+    assert cancelled == [True]
+    assert turn.degraded == ["stt"]
+    assert "stt" in turn.stages_done and turn.spent["stt"] > 0
+
+def test_turn_is_inherited_by_child_tasks_and_reset_after():
+    async def child():
+        return current_turn.get()
+
+    async def run():
+        with use_turn(report=False) as turn:
+            seen = await asyncio.create_task(child())
+            assert turn_deadline() == turn.deadline
+        return turn, seen
+
+    turn, seen = asyncio.run(run())
+    assert seen is turn
+    assert current_turn.get() is None
+
+# ---------- Hedging ----------
+def test_hedge_fires_early_enough_for_the_backup_to_make_the_deadline(frozen_clock, monkeypatch):
+    monkeypatch.setattr(groq_pool, "GROQ_HEDGE", True)
+    pool = groq_pool.GroqPool(["key-1", "key-2"])
+    pool.latencies["chat"].extend([2000.0] * 50)  # p90 = 2 s
+    assert pool.hedge_delay("chat") == pytest.approx(2.0)
+    with use_turn(TurnContext(budget_ms=1000), report=False):
+        assert pool.hedge_delay("chat") == pytest.approx(0.5)  # Half of what's left
@@ -0,0 +1,79 @@
+import io
+import wave
+
+import numpy as np
+
+from core import vad
+from core.vad import VoiceActivityDetector, speech_bounds, trim_wav
+
+RATE = 16000
+rng = np.random.default_rng(0)
+
+def noise(seconds: float, level: float = 30) -> np.ndarray:
+    return (rng.normal(0, level, int(RATE * seconds))).astype("<i2")
+
+def speech(seconds: float) -> np.ndarray:
+    t = np.arange(int(RATE * seconds)) / RATE
+    return (noise(seconds) + 5000 * np.sin(2 * np.pi * 200 * t)).astype("<i2")
+
+def run(detector: VoiceActivityDetector, samples: np.ndarray, frame_s: float = 0.02):
+    """Feed in 20 ms frames; returns [(event, time_s)]."""
+    events, step = [], int(RATE * frame_s)
+    for i in range(0, len(samples), step):
+        for event in detector.process(samples[i:i + step].tobytes()):
+            events.append((event, (i + step) / RATE))
+    return events
+
+def wav(samples: np.ndarray) -> bytes:
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(RATE)
+        w.writeframes(samples.tobytes())
+    return buf.getvalue()
+
+# ---------- Offline trim ----------
+def test_speech_bounds_find_the_speech_with_padding():
+    start, end = speech_bounds(np.concatenate([noise(1), speech(1), noise(1)]), RATE)
+    assert abs(start / RATE - (1 - vad.VAD_PAD_MS / 1000)) < 0.03
+    assert abs(end / RATE - (2 + vad.VAD_PAD_MS / 1000)) < 0.03
+
+def test_noise_and_clicks_are_not_speech():
+    assert speech_bounds(noise(2), RATE) is None
+    assert speech_bounds(np.concatenate([noise(1), speech(0.06), noise(1)]), RATE) is None
+
+def test_trim_wav():
+    trimmed = trim_wav(wav(np.concatenate([noise(2), speech(1), noise(2)])))
+    with wave.open(io.BytesIO(trimmed), "rb") as w:
+        assert w.getnframes() < RATE * 1.5
+    assert trim_wav(wav(noise(1))) == b""
+    assert trim_wav(b"webm-blob") == b"webm-blob"  # Not PCM16 WAV: untouched
+
+# ---------- Streaming endpointer ----------
+def test_end_of_utterance_after_the_hangover():
+    detector = VoiceActivityDetector(RATE)
+    events = run(detector, np.concatenate([noise(0.5), speech(1), noise(2)]))
+    assert [e for e, _ in events] == ["speech_start", "end_of_utterance"]
+    hangover = (vad.VAD_MIN_HANGOVER_MS + vad.VAD_MAX_HANGOVER_MS) / 2000  # No pauses seen yet
+    assert abs(events[1][1] - (1.5 + hangover)) < 0.05
+
+def test_mid_sentence_pause_shorter_than_the_hangover_does_not_end_the_turn():
+    detector = VoiceActivityDetector(RATE)
+    events = run(detector, np.concatenate([noise(0.5), speech(0.6), noise(0.3), speech(0.6), noise(2)]))
+    assert [e for e, _ in events] == ["speech_start", "end_of_utterance"]
+
+def test_hangover_adapts_to_the_callers_pauses():
+    detector = VoiceActivityDetector(RATE)
+    assert detector.hangover_ms == (vad.VAD_MIN_HANGOVER_MS + vad.VAD_MAX_HANGOVER_MS) // 2
+    detector.pauses.extend([100, 120, 100])   # Quick talker
+    assert detector.hangover_ms == vad.VAD_MIN_HANGOVER_MS
+    detector.pauses.clear()
+    detector.pauses.extend([900, 1000, 950])  # Long thinking pauses
+    assert detector.hangover_ms == vad.VAD_MAX_HANGOVER_MS
+
+def test_pauses_are_learned_from_the_stream():
+    detector = VoiceActivityDetector(RATE)
+    run(detector, np.concatenate([noise(0.5), speech(0.5), noise(0.3), speech(0.5)]))
+    assert len(detector.pauses) == 1
+    assert abs(detector.pauses[0] - 300) <= 40
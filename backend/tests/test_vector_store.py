@@ -0,0 +1,62 @@
+import zlib
+
+import numpy as np
+import pytest
+
+import create_vector_store as vs
+from core.retrieval import read_chunk_store
+
+PROJECTS = "Voice bot: FastAPI + Groq\n---\nRAG twin: FAISS + MiniLM\n---\n\n---\nBooking agent: Supabase\n"
+
+class CountingEmbedder:
+    encoded = []
+
+    def encode(self, texts):
+        CountingEmbedder.encoded += texts
+        return np.stack([np.random.default_rng(zlib.crc32(t.encode())).random(8, dtype=np.float32) for t in texts])
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for name, filename in [("FAISS_INDEX_FILE", "faiss_index.bin"), ("CHUNK_STORE_FILE", "chunk_store.bin")]:
+        monkeypatch.setattr(vs, name, filename)
+    monkeypatch.setattr(vs, "MiniLMEmbedder", CountingEmbedder)
+    CountingEmbedder.encoded = []
+    (tmp_path / vs.SOURCE_FILE).write_text(PROJECTS, encoding="utf-8")
+    return tmp_path
+
+def test_chunk_id_is_stable_and_positive():
+    assert vs.chunk_id("Voice bot") == vs.chunk_id("Voice bot")
+    assert vs.chunk_id("Voice bot") != vs.chunk_id("Voice bot!")
+    assert 0 <= vs.chunk_id("Voice bot") < 2**63
+
+def test_load_chunks_keeps_document_order_and_drops_empties(workdir):
+    chunks = vs.load_chunks()
+    assert list(chunks.values()) == ["Voice bot: FastAPI + Groq", "RAG twin: FAISS + MiniLM", "Booking agent: Supabase"]
+    assert list(chunks) == [vs.chunk_id(c) for c in chunks.values()]
+
+def test_load_chunks_without_projects_fails(workdir):
+    (workdir / vs.SOURCE_FILE).write_text("---\n---", encoding="utf-8")
+    with pytest.raises(ValueError):
+        vs.load_chunks()
+
+def test_rebuild_only_embeds_changed_chunks(workdir):
+    faiss = pytest.importorskip("faiss")
+    vs.build()
+    assert len(CountingEmbedder.encoded) == 3
+
+    # Nothing changed: no embedding, no model load
+    CountingEmbedder.encoded = []
+    vs.build()
+    assert CountingEmbedder.encoded == []
+
+    # One chunk edited, one removed
+    (workdir / vs.SOURCE_FILE).write_text("Voice bot: FastAPI + Groq + VAD\n---\nRAG twin: FAISS + MiniLM\n", encoding="utf-8")
+    vs.build()
+    assert CountingEmbedder.encoded == ["Voice bot: FastAPI + Groq + VAD"]
+
+    chunks = vs.load_chunks()
+    index = faiss.read_index(vs.FAISS_INDEX_FILE)
+    assert sorted(faiss.vector_to_array(index.id_map).tolist()) == sorted(chunks)
+    assert read_chunk_store(vs.CHUNK_STORE_FILE) == chunks
+    assert (workdir / vs.CHUNKS_FILE).read_text(encoding="utf-8").split(vs.CHUNK_SEPARATOR)[:-1] == list(chunks.values())
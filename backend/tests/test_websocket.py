@@ -0,0 +1,132 @@
+import json
+import asyncio
+
+import main
+
+class FakeSocket:
+    """Feeds scripted client messages and records everything the server sends."""
+
+    def __init__(self, messages):
+        self.incoming = asyncio.Queue()
+        for message in messages:
+            self.incoming.put_nowait(message)
+        self.sent = []
+
+    async def receive(self):
+        return await self.incoming.get()
+
+    async def send_bytes(self, data):
+        self.sent.append(data)
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+def text(payload):
+    return {"type": "websocket.receive", "text": json.dumps(payload)}
+
+# ---------- Reader ----------
+def test_reader_queues_messages_and_handles_interrupt_itself():
+    async def run():
+        socket = FakeSocket([
+            text({"event": "text_input", "text": "hi"}),
+            {"type": "websocket.receive", "text": "not json"},
+            {"type": "websocket.receive", "bytes": b"\x00\x01"},
+            text({"event": "interrupt"}),
+            {"type": "websocket.disconnect"},
+        ])
+        call = main.CallState(socket)
+
+        async def speaking():
+            await asyncio.sleep(10)
+
+        call.start_turn(speaking())
+        turn = call.turn_task
+        await main.ws_reader(call)
+        queued = []
+        while not call.inbox.empty():
+            queued.append(call.inbox.get_nowait())
+        return turn, queued
+
+    turn, queued = asyncio.run(run())
+    # Barge-in is acted on straight away, never queued behind audio
+    assert turn.cancelled()
+    assert queued == [("event", {"event": "text_input", "text": "hi"}), ("audio", b"\x00\x01")]
+
+# ---------- Writer ----------
+def test_writer_sends_in_queue_order():
+    async def run():
+        socket = FakeSocket([])
+        call = main.CallState(socket)
+        await call.send({"event": "codec", "codec": "wav"})
+        await call.send(b"audio")
+        await call.send({"event": "response_complete"})
+        writer = asyncio.create_task(main.ws_writer(call))
+        while not call.outbox.empty():
+            await asyncio.sleep(0)
+        writer.cancel()
+        return socket.sent
+
+    assert asyncio.run(run()) == [{"event": "codec", "codec": "wav"}, b"audio", {"event": "response_complete"}]
+
+# ---------- Processor ----------
+def test_processor_keeps_draining_while_a_turn_runs(monkeypatch):
+    started = []
+
+    async def text_turn(call, user_text):
+        started.append(user_text)
+        await asyncio.sleep(10)  # Riya still thinking
+
+    monkeypatch.setattr(main, "text_turn", text_turn)
+
+    async def wait_for_turns(count):
+        while len(started) < count:
+            await asyncio.sleep(0)
+
+    async def run():
+        call = main.CallState(FakeSocket([]))
+        processor = asyncio.create_task(main.ws_processor(call))
+        await call.inbox.put(("event", {"event": "text_input", "text": "first"}))
+        await asyncio.wait_for(wait_for_turns(1), 1)
+        first = call.turn_task
+        # Handled while the first turn is still running, which it replaces
+        await call.inbox.put(("event", {"event": "text_input", "text": "second"}))
+        await asyncio.wait_for(wait_for_turns(2), 1)
+        second = call.turn_task
+        processor.cancel()
+        await call.cancel_turn("hang-up")
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert started == ["first", "second"]
+    assert first.cancelled() and second.cancelled()
+
+# ---------- stream_turn ----------
+def test_failed_turn_apologises_and_still_completes(monkeypatch):
+    async def get_speech_from_text(text, audio_format="wav"):
+        async def stream():
+            yield b"sorry audio"
+        return stream()
+
+    monkeypatch.setattr(main, "get_speech_from_text", get_speech_from_text)
+
+    async def run():
+        call = main.CallState(websocket=None)
+
+        async def audio_chunks():
+            yield b"clause"
+            raise RuntimeError("LLM down")
+
+        async def failed_turn():
+            raise RuntimeError("LLM down")
+
+        turn = asyncio.ensure_future(failed_turn())
+        await main.stream_turn(call, audio_chunks(), turn)
+        sent = []
+        while not call.outbox.empty():
+            sent.append(call.outbox.get_nowait()[1])
+        return sent
+
+    sent = asyncio.run(run())
+    assert sent[0] == b"clause"
+    assert sent[1]["event"] == "error"
+    assert sent[2:] == [b"sorry audio", {"event": "response_complete"}]